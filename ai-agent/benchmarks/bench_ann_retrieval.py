@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark two-stage ANN retrieval against full-sort scoring.
+
+Reports recall@K (overlap with the exact full-sort top-K, seen items
+excluded) and latency for:
+
+* the loaded checkpoint, comparing ``CHATBOT_RETRIEVAL=full`` and ``ann``;
+* synthetic clustered catalogs of growing size with the model's hidden size,
+  where full-sort cost grows linearly and ANN cost with ``nprobe``.
+
+Usage:
+  python benchmarks/bench_ann_retrieval.py --catalog-sizes 10000 100000 --nprobe 4 8 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import torch
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.api import app as service  # noqa: E402
+from services.api.ann_index import IVFIndex  # noqa: E402
+from services.api.inference_backends import AnnBackend  # noqa: E402
+from services.api.inference_batcher import score_sequences  # noqa: E402
+
+
+def recall(expected: np.ndarray, actual: np.ndarray, counts: np.ndarray) -> float:
+    hits = [len(set(want[:count]) & set(got[:count])) / count for want, got, count in zip(expected, actual, counts) if count]
+    return round(float(np.mean(hits)), 4) if hits else 0.0
+
+
+def percentile_ms(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def bench_checkpoint(args: argparse.Namespace) -> List[Dict[str, object]]:
+    artifacts = service.load_artifacts()
+    model = artifacts["model"]
+    item_lookup = artifacts["item_lookup"]
+    history_index = artifacts["history_index"]
+    max_len = int(artifacts["config"]["MAX_ITEM_LIST_LENGTH"])
+    users = np.flatnonzero(np.diff(history_index.offsets) > 0)[: args.users]
+    sequences = [history_index.recent(int(uid), max_len).tolist() for uid in users]
+    seen = [history_index.history(int(uid)) for uid in users]
+
+    def run(scorer) -> Dict[str, object]:
+        samples: List[float] = []
+        indices = []
+        for start in range(0, len(sequences), args.batch_size):
+            started = time.perf_counter()
+            scores = score_sequences(scorer, sequences[start : start + args.batch_size])
+            samples.append(time.perf_counter() - started)
+            indices.append(item_lookup.top_indices_batch(scores, seen[start : start + args.batch_size], args.topk))
+        return {
+            "ids": np.vstack([part[0] for part in indices]),
+            "counts": np.concatenate([part[2] for part in indices]),
+            "p50_ms": percentile_ms(samples, 50),
+            "p99_ms": percentile_ms(samples, 99),
+        }
+
+    full = run(model)
+    results: List[Dict[str, object]] = [
+        {"mode": "full", "batch_size": args.batch_size, "p50_ms": full["p50_ms"], "p99_ms": full["p99_ms"]}
+    ]
+    valid_items = np.flatnonzero(~item_lookup.invalid_mask.numpy())
+    for nprobe in args.nprobe:
+        started = time.perf_counter()
+        backend = AnnBackend.build(model, valid_items, n_candidates=args.candidates, nprobe=nprobe)
+        build_ms = (time.perf_counter() - started) * 1000
+        ann = run(backend)
+        results.append({
+            "mode": "ann",
+            "nprobe": nprobe,
+            "n_lists": backend.index.n_lists,
+            "candidates": args.candidates,
+            "build_ms": round(build_ms, 2),
+            "batch_size": args.batch_size,
+            "p50_ms": ann["p50_ms"],
+            "p99_ms": ann["p99_ms"],
+            f"recall@{args.topk}": recall(full["ids"], ann["ids"], full["counts"]),
+        })
+    return [{"catalog": "checkpoint", "items": int(model.n_items), "users": len(users), "results": results}]
+
+
+def bench_synthetic(args: argparse.Namespace, dim: int) -> List[Dict[str, object]]:
+    rng = np.random.default_rng(0)
+    reports = []
+    for size in args.catalog_sizes:
+        # Clustered vectors stand in for trained embeddings, which are far from uniform.
+        centers = rng.normal(size=(max(8, size // 500), dim)).astype(np.float32)
+        embeddings = centers[rng.integers(len(centers), size=size)] + 0.3 * rng.normal(size=(size, dim)).astype(np.float32)
+        bias = 0.1 * rng.normal(size=size).astype(np.float32)
+        queries = centers[rng.integers(len(centers), size=args.users)] + 0.3 * rng.normal(size=(args.users, dim)).astype(np.float32)
+        item_tensor = torch.from_numpy(embeddings)
+        bias_tensor = torch.from_numpy(bias)
+
+        full_samples: List[float] = []
+        expected = []
+        for start in range(0, args.users, args.batch_size):
+            batch = torch.from_numpy(queries[start : start + args.batch_size])
+            started = time.perf_counter()
+            top = torch.topk(batch @ item_tensor.T + bias_tensor, k=args.topk, dim=1).indices
+            full_samples.append(time.perf_counter() - started)
+            expected.append(top.numpy())
+        expected_ids = np.vstack(expected)
+
+        started = time.perf_counter()
+        index = IVFIndex.build(embeddings, bias, np.arange(size))
+        build_ms = (time.perf_counter() - started) * 1000
+        results: List[Dict[str, object]] = [
+            {"mode": "full", "p50_ms": percentile_ms(full_samples, 50), "p99_ms": percentile_ms(full_samples, 99)}
+        ]
+        for nprobe in args.nprobe:
+            samples: List[float] = []
+            actual = []
+            for start in range(0, args.users, args.batch_size):
+                batch = queries[start : start + args.batch_size]
+                started = time.perf_counter()
+                candidates = torch.from_numpy(index.search(batch, args.candidates, nprobe)).clamp(min=0)
+                exact = torch.einsum("bh,bch->bc", torch.from_numpy(batch), item_tensor[candidates]) + bias_tensor[candidates]
+                top = candidates.gather(1, torch.topk(exact, k=args.topk, dim=1).indices)
+                samples.append(time.perf_counter() - started)
+                actual.append(top.numpy())
+            results.append({
+                "mode": "ann",
+                "nprobe": nprobe,
+                "p50_ms": percentile_ms(samples, 50),
+                "p99_ms": percentile_ms(samples, 99),
+                f"recall@{args.topk}": recall(expected_ids, np.vstack(actual), np.full(args.users, args.topk)),
+            })
+        reports.append({
+            "catalog": "synthetic",
+            "items": size,
+            "dim": dim,
+            "n_lists": index.n_lists,
+            "build_ms": round(build_ms, 1),
+            "batch_size": args.batch_size,
+            "results": results,
+        })
+    return reports
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ANN candidate retrieval against full-sort.")
+    parser.add_argument("--catalog-sizes", nargs="*", type=int, default=[10_000, 100_000])
+    parser.add_argument("--nprobe", nargs="+", type=int, default=[2, 8, 32])
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--topk", type=int, default=10)
+    parser.add_argument("--users", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=16)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    torch.set_num_threads(1)
+    with torch.no_grad():
+        reports = bench_checkpoint(args)
+        dim = int(service.load_artifacts()["model"].item_embedding.embedding_dim)
+        reports.extend(bench_synthetic(args, dim))
+    print(json.dumps(reports, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark ``POST /recommendations/batch`` throughput.
+
+Requests recommendations for every known user (repeated up to ``--users``)
+through the FastAPI test client once per batch size and reports users/sec and
+time to the first NDJSON chunk.
+
+Usage:
+  python benchmarks/bench_batch_recommendations.py --users 5000 --batch-sizes 16 64 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from services.api import app as service  # noqa: E402
+
+
+def run(client: TestClient, users: List[str], batch_size: int, topk: int) -> Dict[str, object]:
+    payload = {"user_ids": users, "top_k": topk, "batch_size": batch_size}
+    started = time.perf_counter()
+    response = client.post("/recommendations/batch", json=payload)
+    response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    lines = sum(1 for line in response.text.splitlines() if line)
+    assert lines == len(users), (lines, len(users))
+
+    # The test client buffers the whole body, so time the first chunk on the generator itself.
+    started = time.perf_counter()
+    next(service.iter_batch_recommendations(service.ARTIFACTS, users, topk, batch_size))
+    first_chunk = time.perf_counter() - started
+    return {
+        "batch_size": batch_size,
+        "users": len(users),
+        "users_per_s": round(len(users) / elapsed, 1),
+        "elapsed_s": round(elapsed, 3),
+        "first_chunk_ms": round(first_chunk * 1000, 2),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the batch recommendation endpoint.")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 16, 64, 256, 1024])
+    parser.add_argument("--topk", type=int, default=10)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    service.BULK_MAX_USERS = max(service.BULK_MAX_USERS, args.users)
+    with TestClient(service.app) as client:
+        dataset = service.ARTIFACTS["dataset"]
+        known = [str(token) for token in dataset.field2id_token[service.ARTIFACTS["uid_field"]][1:]]
+        users = (known * (args.users // len(known) + 1))[: args.users]
+        results = [run(client, users, size, args.topk) for size in args.batch_sizes]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
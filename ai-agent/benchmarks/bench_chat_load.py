@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Load test for the chatbot service over HTTP.
+
+Replays a weighted mix of ``/chat`` requests:
+
+* ``faq``          – FAQ questions answered from the preset replies;
+* ``known_user``   – recommendation requests for users sampled from ``ecommerce.inter``;
+* ``unknown_user`` – recommendation requests for users the model has never seen
+  (popular-items fallback).
+
+Without ``--url`` the FastAPI app is started in-process under uvicorn on a free
+local port. When no checkpoint can be resolved (or with ``--synthetic``) a
+small randomly initialised BERT4Rec checkpoint, serving bundle and interaction
+file are generated in a temporary directory, so the test runs offline.
+
+Load is either closed-loop (``--concurrency`` clients back to back) or
+open-loop at ``--rps``; in open-loop mode latency is measured from the
+scheduled send time so a stalled server is not hidden by a slowed-down client.
+The JSON report (throughput, p50/p95/p99, error rate, per-kind breakdown and
+the git commit) is printed and optionally written to ``--output``.
+
+Usage:
+  python benchmarks/bench_chat_load.py --concurrency 16 --duration 30
+  python benchmarks/bench_chat_load.py --rps 200 --mix faq=0.2,known_user=0.6,unknown_user=0.2
+  python benchmarks/bench_chat_load.py --url http://localhost:8008 --rps 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+DEFAULT_INTER_FILE = BASE_DIR / "recommender" / "dataset" / "ecommerce" / "ecommerce.inter"
+REQUEST_KINDS = ("faq", "known_user", "unknown_user")
+FAQ_MESSAGES = [
+    "Bao lâu thì đơn hàng được giao?",
+    "Phí ship cho đơn nhỏ là bao nhiêu?",
+    "Sản phẩm có bảo hành không?",
+    "Làm sao theo dõi order của tôi?",
+    "Shop hỗ trợ thanh toán những hình thức nào?",
+]
+RECOMMENDATION_MESSAGES = ["Gợi ý sản phẩm cho tôi", "goi y giup minh vai mon", "Bạn có thể recommend gì không?"]
+
+# Small enough to generate in a second, same architecture as recommender/configs/bert4rec.yaml.
+SYNTHETIC_CONFIG = {
+    "USER_ID_FIELD": "user_id",
+    "ITEM_ID_FIELD": "item_id",
+    "TIME_FIELD": "timestamp",
+    "LIST_SUFFIX": "_list",
+    "ITEM_LIST_LENGTH_FIELD": "item_length",
+    "NEG_PREFIX": "neg_",
+    "MAX_ITEM_LIST_LENGTH": 50,
+    "n_layers": 2,
+    "n_heads": 2,
+    "hidden_size": 64,
+    "inner_size": 256,
+    "hidden_dropout_prob": 0.2,
+    "attn_dropout_prob": 0.2,
+    "hidden_act": "gelu",
+    "layer_norm_eps": 1e-12,
+    "mask_ratio": 0.2,
+    "MASK_ITEM_SEQ": "Mask_item_id_list",
+    "POS_ITEMS": "Pos_item_id",
+    "NEG_ITEMS": "Neg_item_id",
+    "MASK_INDEX": "MASK_INDEX",
+    "loss_type": "CE",
+    "initializer_range": 0.02,
+    "device": "cpu",
+}
+
+
+def write_synthetic_checkpoint(directory: Path, users: int, items: int, seed: int = 0) -> Tuple[Path, Path]:
+    """Write ``BERT4Rec-synthetic.pth`` + serving bundle + ``ecommerce.inter``; return (checkpoint, inter file)."""
+    import torch
+    from recbole.model.sequential_recommender import BERT4Rec
+
+    from services.api.history_index import UserHistoryIndex
+    from services.api.serving_bundle import ServingDataset, serving_bundle_path, write_serving_bundle
+
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 40, size=users)
+    user_ids = np.repeat(np.arange(1, users + 1), lengths)
+    # Zipf-like item popularity, as in real catalogs.
+    item_ids = np.minimum(rng.zipf(1.3, size=len(user_ids)), items)
+    timestamps = 1_700_000_000 + rng.integers(0, 90 * 86400, size=len(user_ids))
+
+    inter_file = directory / "ecommerce.inter"
+    pd.DataFrame({
+        "user_id:token": user_ids,
+        "item_id:token": item_ids,
+        "timestamp:float": timestamps,
+        "label:float": 0,
+    }).to_csv(inter_file, sep="\t", index=False)
+
+    user_tokens = np.array(["[PAD]"] + [str(uid) for uid in range(1, users + 1)])
+    item_tokens = np.array(["[PAD]"] + [str(iid) for iid in range(1, items + 1)])
+    history_index = UserHistoryIndex.build(user_ids, item_ids, timestamps=timestamps, user_num=users + 1)
+
+    torch.manual_seed(seed)
+    model = BERT4Rec(SYNTHETIC_CONFIG, ServingDataset(SYNTHETIC_CONFIG, user_tokens, item_tokens))
+    checkpoint = directory / "BERT4Rec-synthetic.pth"
+    torch.save({"state_dict": model.state_dict()}, checkpoint)
+    weights = {name: tensor.numpy() for name, tensor in model.state_dict().items()}
+    write_serving_bundle(serving_bundle_path(checkpoint), SYNTHETIC_CONFIG, user_tokens, item_tokens, history_index, weights)
+    return checkpoint, inter_file
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+@contextmanager
+def in_process_server(checkpoint: Optional[Path]) -> Iterator[str]:
+    """Serve the app with uvicorn on a background thread; yields its base URL."""
+    import uvicorn
+
+    if checkpoint is not None:
+        os.environ["CHATBOT_MODEL_PATH"] = str(checkpoint)
+    from services.api import app as service
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(service.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="load-test-server", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Không khởi động được dịch vụ chatbot.")
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def resolve_target(args: argparse.Namespace, workdir: Path) -> Tuple[Optional[Path], Path, str]:
+    """Return (checkpoint to serve or None for the service default, inter file, checkpoint label)."""
+    if args.url:
+        return None, args.inter_file, "remote"
+    if not args.synthetic:
+        from services.api import app as service
+
+        try:
+            checkpoint = service.resolve_checkpoint()
+        except FileNotFoundError:
+            print("Không có checkpoint, dùng checkpoint tổng hợp.", file=sys.stderr)
+        else:
+            if args.inter_file.exists():
+                return None, args.inter_file, str(checkpoint)
+    checkpoint, inter_file = write_synthetic_checkpoint(workdir, args.synthetic_users, args.synthetic_items)
+    return checkpoint, inter_file, "synthetic"
+
+
+def parse_mix(raw: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in raw.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise argparse.ArgumentTypeError(f"Loại request không hợp lệ: {kind} (hỗ trợ: {', '.join(REQUEST_KINDS)})")
+        mix[kind] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("Tổng trọng số phải dương.")
+    return mix
+
+
+def build_plan(mix: Dict[str, float], known_users: List[str], count: int, seed: int) -> List[Tuple[str, Dict[str, object]]]:
+    """Pre-generate ``count`` (kind, JSON body) pairs so request building is off the timed path."""
+    rng = random.Random(seed)
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    plan = []
+    for index, kind in enumerate(rng.choices(kinds, weights=weights, k=count)):
+        if kind == "faq":
+            body: Dict[str, object] = {"message": rng.choice(FAQ_MESSAGES)}
+        elif kind == "known_user" and known_users:
+            body = {"message": rng.choice(RECOMMENDATION_MESSAGES), "user_id": rng.choice(known_users)}
+        else:
+            kind = "unknown_user"
+            body = {"message": rng.choice(RECOMMENDATION_MESSAGES), "user_id": f"khach-{seed}-{index}"}
+        plan.append((kind, body))
+    return plan
+
+
+class LoadRunner:
+    def __init__(self, base_url: str, timeout: float) -> None:
+        self.url = base_url.rstrip("/") + "/chat"
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.results: List[Tuple[str, float, str]] = []  # (kind, latency seconds, status)
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def send(self, kind: str, body: Dict[str, object], started: float, record: bool = True) -> None:
+        try:
+            response = self._session().post(self.url, json=body, timeout=self.timeout)
+            status = str(response.status_code)
+        except requests.RequestException as exc:
+            status = type(exc).__name__
+        latency = time.perf_counter() - started
+        if record:
+            with self._lock:
+                self.results.append((kind, latency, status))
+
+    def closed_loop(self, plan: List[Tuple[str, Dict[str, object]]], concurrency: int, duration: float) -> float:
+        deadline = time.perf_counter() + duration
+        cursor = itertools.count()
+        cursor_lock = threading.Lock()
+
+        def client() -> None:
+            while time.perf_counter() < deadline:
+                with cursor_lock:
+                    index = next(cursor)
+                kind, body = plan[index % len(plan)]
+                self.send(kind, body, time.perf_counter())
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def open_loop(self, plan: List[Tuple[str, Dict[str, object]]], rps: float, max_inflight: int, duration: float) -> float:
+        interval = 1.0 / rps
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="load-client") as pool:
+            for index in range(int(duration * rps)):
+                scheduled = started + index * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                kind, body = plan[index % len(plan)]
+                pool.submit(self.send, kind, body, scheduled)
+        return time.perf_counter() - started
+
+
+def summarize(samples: List[Tuple[str, float, str]], elapsed: float) -> Dict[str, object]:
+    if not samples:
+        return {"requests": 0}
+    latencies = np.array([latency for _, latency, _ in samples]) * 1000
+    errors = sum(1 for _, _, status in samples if not status.startswith("2"))
+    status_codes: Dict[str, int] = {}
+    for _, _, status in samples:
+        status_codes[status] = status_codes.get(status, 0) + 1
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "error_rate": round(errors / len(samples), 4),
+        "status_codes": dict(sorted(status_codes.items())),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 3),
+            "p50": round(float(np.percentile(latencies, 50)), 3),
+            "p95": round(float(np.percentile(latencies, 95)), 3),
+            "p99": round(float(np.percentile(latencies, 99)), 3),
+            "max": round(float(latencies.max()), 3),
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the chatbot /chat endpoint.")
+    parser.add_argument("--url", help="Base URL of a running service; omit to start the app in-process.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("faq=0.3,known_user=0.5,unknown_user=0.2"))
+    parser.add_argument("--concurrency", type=int, default=16, help="Closed-loop clients, or max in-flight with --rps.")
+    parser.add_argument("--rps", type=float, help="Open-loop target request rate.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of measured load.")
+    parser.add_argument("--warmup", type=int, default=50, help="Unrecorded requests sent before measuring.")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--inter-file", type=Path, default=DEFAULT_INTER_FILE, help="Source of known user ids.")
+    parser.add_argument("--synthetic", action="store_true", help="Serve a generated checkpoint even if a real one exists.")
+    parser.add_argument("--synthetic-users", type=int, default=5000)
+    parser.add_argument("--synthetic-items", type=int, default=2000)
+    parser.add_argument("--output", type=Path, help="Also write the JSON report to this file.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="chat-load-") as workdir:
+        checkpoint, inter_file, checkpoint_label = resolve_target(args, Path(workdir))
+        known_users: List[str] = []
+        if inter_file.exists():
+            known_users = pd.read_csv(inter_file, sep="\t", usecols=[0], dtype=str).iloc[:, 0].dropna().unique().tolist()
+        plan = build_plan(args.mix, known_users, count=10_000, seed=args.seed)
+
+        with nullcontext(args.url) if args.url else in_process_server(checkpoint) as base_url:
+            runner = LoadRunner(base_url, args.timeout)
+            for kind, body in plan[: args.warmup]:
+                runner.send(kind, body, time.perf_counter(), record=False)
+            if args.rps:
+                elapsed = runner.open_loop(plan, args.rps, args.concurrency, args.duration)
+            else:
+                elapsed = runner.closed_loop(plan, args.concurrency, args.duration)
+
+    report = {
+        "commit": git_commit(),
+        "target": args.url or "in-process",
+        "checkpoint": checkpoint_label,
+        "load": {"mode": "open", "rps": args.rps} if args.rps else {"mode": "closed", "concurrency": args.concurrency},
+        "mix": args.mix,
+        "duration_s": round(elapsed, 2),
+        "known_users": len(known_users),
+        **summarize(runner.results, elapsed),
+        "by_kind": {
+            kind: summarize([sample for sample in runner.results if sample[0] == kind], elapsed)
+            for kind in REQUEST_KINDS
+            if any(sample[0] == kind for sample in runner.results)
+        },
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
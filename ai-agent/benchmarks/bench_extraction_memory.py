@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the interaction extraction against the number of events.
+
+Compares the streaming export of ``user_behavior_advanced.py`` with the
+previous fully buffered one, for both paths:
+
+* ``cursor_fetchall`` / ``cursor_stream`` – DB-API cursor (SQLite stands in
+  for Postgres): ``fetchall()`` into one DataFrame vs ``fetchmany`` chunks;
+* ``psql_buffered`` / ``psql_stream`` – ``COPY ... TO STDOUT`` from a fake
+  ``psql`` that prints a pre-generated CSV: ``capture_output`` into one string
+  vs incremental ``read_csv`` over the pipe.
+
+Every (mode, rows) pair runs in a fresh subprocess; ``peak_rss_mib`` is its
+``VmHWM`` above the RSS measured once imports are done.
+
+Usage:
+  python benchmarks/bench_extraction_memory.py --rows 100000 1000000 3000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from data.preprocessing import user_behavior_advanced as extraction  # noqa: E402
+
+MODES = ("cursor_fetchall", "cursor_stream", "psql_buffered", "psql_stream")
+CONN = {"host": "localhost", "port": "5432", "user": "bench", "dbname": "bench", "password": "bench"}
+
+
+def proc_status() -> Dict[str, float]:
+    fields = {}
+    with open("/proc/self/status") as fp:
+        for line in fp:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+
+def synthetic_events(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    occurred = pd.Timestamp("2025-01-01", tz="UTC") + pd.to_timedelta(np.sort(rng.integers(0, 90 * 86400, rows)), unit="s")
+    return pd.DataFrame({
+        "id": [f"{index:032x}" for index in range(rows)],
+        "sessionId": (rng.integers(0, rows // 8 + 1, rows)).astype(str),
+        "userId": rng.integers(1, 50_000, rows).astype(str),
+        "productId": rng.integers(1, 20_000, rows).astype(str),
+        "eventType": rng.choice(["view", "click", "add_to_cart", "purchase"], rows, p=[0.6, 0.25, 0.1, 0.05]),
+        "occurredAt": occurred.strftime("%Y-%m-%d %H:%M:%S+00"),
+    })
+
+
+def write_sources(directory: Path, rows: int) -> Dict[str, Path]:
+    events = synthetic_events(rows)
+    database = directory / f"events-{rows}.sqlite"
+    with sqlite3.connect(database) as connection:
+        events.to_sql("ai_interaction_events", connection, index=False, chunksize=100_000)
+    copy_output = directory / f"events-{rows}.csv"
+    events.rename(columns={
+        "id": "event_id", "sessionId": "session_id", "userId": "user_id",
+        "productId": "product_id", "eventType": "event_type", "occurredAt": "occurred_at",
+    })[extraction.QUERY_COLUMNS].to_csv(copy_output, index=False)
+    psql = directory / "psql"
+    psql.write_text('#!/bin/sh\nexec cat "$FAKE_PSQL_OUTPUT"\n')
+    psql.chmod(0o755)
+    return {"database": database, "copy_output": copy_output, "psql": psql}
+
+
+class SqliteCursor:
+    """psycopg-style (``%s``) cursor over SQLite."""
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self._cursor = connection.cursor()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query: str, params) -> None:
+        self._cursor.execute(query.replace("%s", "?"), params)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+
+def write_buffered(raw: pd.DataFrame, store: Path) -> int:
+    """The previous export: one DataFrame for every event, then one CSV."""
+    events = extraction.normalize_events(raw)
+    store.mkdir(parents=True, exist_ok=True)
+    events.to_csv(store / "events.csv", index=False)
+    return len(events)
+
+
+def run_child(args: argparse.Namespace) -> int:
+    store = Path(args.store)
+    baseline = proc_status()["VmRSS"]
+    started = time.perf_counter()
+    if args.mode.startswith("cursor"):
+        with sqlite3.connect(args.database) as connection:
+            cursor = SqliteCursor(connection)
+            if args.mode == "cursor_fetchall":
+                query, params = extraction.build_query(None)
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                written = write_buffered(pd.DataFrame(rows, columns=[c[0] for c in cursor.description]), store)
+            else:
+                written = extraction.write_batch(extraction.fetch_events(cursor, None, args.chunk_rows), store)["rows"]
+    elif args.mode == "psql_buffered":
+        process = subprocess.run([os.environ["PSQL_COMMAND"]], capture_output=True, text=True, check=True)
+        written = write_buffered(pd.read_csv(io.StringIO(process.stdout), dtype={"event_id": str}), store)
+    else:
+        written = extraction.write_batch(extraction.export_via_psql(CONN, None, args.chunk_rows), store)["rows"]
+    seconds = time.perf_counter() - started
+    print(json.dumps({
+        "rows": written,
+        "seconds": round(seconds, 2),
+        "peak_rss_mib": round(proc_status()["VmHWM"] - baseline, 1),
+    }))
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Peak RSS of interaction extraction vs. event count.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--chunk-rows", type=int, default=extraction.FETCH_ROWS)
+    parser.add_argument("--child", choices=MODES, dest="mode", help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    parser.add_argument("--store", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.mode:
+        return run_child(args)
+
+    results: Dict[str, List[Dict[str, object]]] = {mode: [] for mode in args.modes}
+    with tempfile.TemporaryDirectory(prefix="extraction-bench-") as tmp:
+        workdir = Path(tmp)
+        for rows in args.rows:
+            sources = write_sources(workdir, rows)
+            env = {**os.environ, "PSQL_COMMAND": str(sources["psql"]), "FAKE_PSQL_OUTPUT": str(sources["copy_output"])}
+            for mode in args.modes:
+                command = [
+                    sys.executable, __file__, "--child", mode,
+                    "--database", str(sources["database"]),
+                    "--store", str(workdir / f"store-{mode}-{rows}"),
+                    "--chunk-rows", str(args.chunk_rows),
+                ]
+                output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+                results[mode].append(json.loads(output.strip().splitlines()[-1]))
+            for source in sources.values():
+                source.unlink()
+    print(json.dumps({"chunk_rows": args.chunk_rows, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-user history lookup used by ``recommend_for_user``.
+
+Compares the former boolean-mask scan over the whole interaction column with
+the CSR ``UserHistoryIndex`` built at load time, for growing interaction counts.
+
+Usage:
+  python benchmarks/bench_history_lookup.py --sizes 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.api.history_index import UserHistoryIndex  # noqa: E402
+
+
+def percentile_ms(samples: List[float], pct: float) -> float:
+    return round(float(np.percentile(samples, pct)) * 1000, 4)
+
+
+def measure(fn: Callable[[int], object], user_ids: np.ndarray) -> Dict[str, float]:
+    samples: List[float] = []
+    for uid in user_ids:
+        started = time.perf_counter()
+        fn(int(uid))
+        samples.append(time.perf_counter() - started)
+    return {"p50_ms": percentile_ms(samples, 50), "p99_ms": percentile_ms(samples, 99)}
+
+
+def run(size: int, users: int, items: int, max_len: int, queries: int, seed: int) -> Dict[str, object]:
+    rng = np.random.default_rng(seed)
+    user_col = rng.integers(1, users, size=size)
+    item_col = rng.integers(1, items, size=size)
+    time_col = np.sort(rng.integers(0, 10**9, size=size))
+
+    user_tensor = torch.from_numpy(user_col)
+    item_tensor = torch.from_numpy(item_col)
+
+    def mask_lookup(uid: int) -> List[int]:
+        mask = user_tensor == uid
+        return item_tensor[mask].tolist()[-max_len:]
+
+    build_started = time.perf_counter()
+    index = UserHistoryIndex.build(user_col, item_col, timestamps=time_col, user_num=users)
+    build_seconds = time.perf_counter() - build_started
+
+    def index_lookup(uid: int) -> List[int]:
+        return index.recent(uid, max_len).tolist()
+
+    sample_users = rng.integers(1, users, size=queries)
+    return {
+        "interactions": size,
+        "users": users,
+        "index_build_ms": round(build_seconds * 1000, 3),
+        "mask_scan": measure(mask_lookup, sample_users),
+        "csr_index": measure(index_lookup, sample_users),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark user history lookup strategies.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--items", type=int, default=2_000)
+    parser.add_argument("--max-len", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    results = [
+        run(size, args.users, args.items, args.max_len, args.queries, args.seed)
+        for size in args.sizes
+    ]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark the chatbot inference backends (eager, scripted, quantized).
+
+Each backend runs in its own subprocess so resident memory is comparable. The
+worker loads the artifacts through ``load_artifacts()``, times full-sort
+scoring at several batch sizes and checks its top-k against the eager model.
+
+Usage:
+  python benchmarks/bench_inference_backends.py --backends eager scripted quantized --batch-sizes 1 16 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import torch
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.api import app as service  # noqa: E402
+from services.api.inference_backends import INFERENCE_BACKENDS, backend_artifact_path  # noqa: E402
+
+
+def rss_mb() -> Dict[str, float]:
+    """Current and peak resident set size of this process."""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as fp:
+            fields = dict(line.split(":", 1) for line in fp if ":" in line)
+        return {
+            "rss_mb": round(int(fields["VmRSS"].split()[0]) / 1024, 1),
+            "peak_rss_mb": round(int(fields["VmHWM"].split()[0]) / 1024, 1),
+        }
+    except (OSError, KeyError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return {"rss_mb": round(peak, 1), "peak_rss_mb": round(peak, 1)}
+
+
+def batch_inputs(sequences: List[List[int]]) -> Dict[str, torch.Tensor]:
+    lengths = [len(sequence) for sequence in sequences]
+    item_seq = torch.zeros((len(sequences), max(lengths)), dtype=torch.long)
+    for row, sequence in enumerate(sequences):
+        item_seq[row, : len(sequence)] = torch.as_tensor(sequence, dtype=torch.long)
+    return {"item_id_list": item_seq, "item_length": torch.tensor(lengths, dtype=torch.long)}
+
+
+def time_batches(scorer, sequences: List[List[int]], batch_size: int, repeats: int) -> Dict[str, float]:
+    batches = [
+        batch_inputs(sequences[start : start + batch_size])
+        for start in range(0, len(sequences) - batch_size + 1, batch_size)
+    ][:repeats]
+    samples: List[float] = []
+    with torch.no_grad():
+        scorer.full_sort_predict(batches[0])
+        for interaction in batches * max(1, repeats // len(batches)):
+            started = time.perf_counter()
+            scorer.full_sort_predict(interaction)
+            samples.append(time.perf_counter() - started)
+    return {
+        "batch_size": batch_size,
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 3),
+        "sequences_per_s": round(batch_size * len(samples) / sum(samples), 1),
+    }
+
+
+def compare_topk(eager, scorer, sequences: List[List[int]], topk: int) -> Dict[str, float]:
+    exact = overlap = 0.0
+    max_diff = 0.0
+    with torch.no_grad():
+        for start in range(0, len(sequences), 64):
+            interaction = batch_inputs(sequences[start : start + 64])
+            expected = eager.full_sort_predict(interaction)
+            actual = scorer.full_sort_predict(interaction)
+            max_diff = max(max_diff, float((expected - actual).abs().max()))
+            expected_top = expected.topk(topk).indices.tolist()
+            actual_top = actual.topk(topk).indices.tolist()
+            for want, got in zip(expected_top, actual_top):
+                exact += want == got
+                overlap += len(set(want) & set(got)) / topk
+    return {
+        "users": len(sequences),
+        "topk": topk,
+        "exact_match_rate": round(exact / len(sequences), 4),
+        "mean_overlap": round(overlap / len(sequences), 4),
+        "max_abs_score_diff": round(max_diff, 6),
+    }
+
+
+def run_worker(args: argparse.Namespace) -> Dict[str, object]:
+    torch.set_num_threads(args.threads)
+    service.INFERENCE_BACKEND = args.worker
+    before = rss_mb()
+    started = time.perf_counter()
+    artifacts = service.load_artifacts()
+    load_ms = (time.perf_counter() - started) * 1000
+    after_load = rss_mb()
+
+    history_index = artifacts["history_index"]
+    max_len = int(artifacts["config"]["MAX_ITEM_LIST_LENGTH"])
+    users = np.flatnonzero(np.diff(history_index.offsets) > 0)[: args.users]
+    sequences = [history_index.recent(int(uid), max_len).tolist() for uid in users]
+
+    scorer = artifacts["scorer"]
+    artifact = backend_artifact_path(artifacts["checkpoint_path"], args.worker) if args.worker != "eager" else None
+    latency = [time_batches(scorer, sequences, size, args.repeats) for size in args.batch_sizes]
+    return {
+        "backend": args.worker,
+        "artifact": str(artifact) if artifact and artifact.exists() else None,
+        "threads": args.threads,
+        "load_ms": round(load_ms, 1),
+        "rss_mb_before_load": before["rss_mb"],
+        "rss_mb_after_load": after_load["rss_mb"],
+        **rss_mb(),
+        "latency": latency,
+        "equivalence": compare_topk(artifacts["model"], scorer, sequences, args.topk),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark chatbot inference backends.")
+    parser.add_argument("--backends", nargs="+", default=list(INFERENCE_BACKENDS), choices=INFERENCE_BACKENDS)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 16, 64])
+    parser.add_argument("--repeats", type=int, default=50, help="Timed forward passes per batch size.")
+    parser.add_argument("--users", type=int, default=512, help="Users with history to score.")
+    parser.add_argument("--topk", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=1, help="torch.set_num_threads for each worker.")
+    parser.add_argument("--worker", choices=INFERENCE_BACKENDS, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.worker:
+        print(json.dumps(run_worker(args)))
+        return 0
+
+    results = []
+    for backend in args.backends:
+        command = [
+            sys.executable,
+            str(Path(__file__).resolve()),
+            "--worker", backend,
+            "--batch-sizes", *map(str, args.batch_sizes),
+            "--repeats", str(args.repeats),
+            "--users", str(args.users),
+            "--topk", str(args.topk),
+            "--threads", str(args.threads),
+        ]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark micro-batched BERT4Rec inference in the chatbot service.
+
+Loads the published checkpoint through ``load_artifacts()`` and fires
+``recommend_for_user`` from many threads at once, once per batcher setting, so
+throughput can be weighed against tail latency.
+
+Usage:
+  python benchmarks/bench_inference_batching.py --concurrency 16 --settings 1:0 8:2 16:5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.api import app as service  # noqa: E402
+from services.api.inference_batcher import InferenceBatcher  # noqa: E402
+
+
+def parse_setting(raw: str) -> Tuple[int, float]:
+    size, _, window = raw.partition(":")
+    return int(size), float(window or 0)
+
+
+def run(setting: Tuple[int, float], users: List[str], concurrency: int, requests: int) -> Dict[str, object]:
+    max_batch_size, window_ms = setting
+    service.INFERENCE_BATCHER = InferenceBatcher(
+        max_batch_size=max_batch_size,
+        max_wait_ms=window_ms,
+        lock=service.TORCH_INFERENCE_LOCK,
+    )
+
+    def call(idx: int) -> float:
+        started = time.perf_counter()
+        service.recommend_for_user(users[idx % len(users)], service.DEFAULT_TOPK)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    stats = service.INFERENCE_BATCHER.stats()
+    return {
+        "max_batch_size": max_batch_size,
+        "window_ms": window_ms,
+        "concurrency": concurrency,
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "batch_size_histogram": stats["batch_size_histogram"],
+        "mean_wait_ms": stats["wait_ms"]["mean"],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched chatbot inference.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument(
+        "--settings",
+        nargs="+",
+        default=["1:0", "8:2", "16:5"],
+        help="max_batch_size:window_ms pairs to compare (1:0 disables batching).",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    service.ARTIFACTS = service.load_artifacts()
+    service.MODEL_READY = True
+
+    dataset = service.ARTIFACTS["dataset"]
+    uid_field = service.ARTIFACTS["uid_field"]
+    users = [str(token) for token in dataset.field2id_token[uid_field][1:]]
+
+    results = [
+        run(parse_setting(raw), users, args.concurrency, args.requests)
+        for raw in args.settings
+    ]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
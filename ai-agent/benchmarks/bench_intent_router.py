@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled intent router against the previous per-message scans.
+
+The baseline reproduces the old ``/chat`` routing: lowercase the message up to
+three times and run a substring scan per keyword list plus two regexes. The
+router folds diacritics once and finds every hit with a single compiled regex.
+Both run over a synthetic corpus of chat messages, with the shipped keyword
+tables and with tables padded by ``--extra-keywords`` generated FAQ keywords.
+
+Usage:
+  python benchmarks/bench_intent_router.py --messages 200000 --extra-keywords 0 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.api.intent_router import IntentRouter  # noqa: E402
+
+INTENTS_FILE = BASE_DIR / "services" / "api" / "intents.json"
+FILLER = (
+    "shop ơi cho mình hỏi là cái áo này còn size không bạn nhé mình ở hà nội "
+    "với lại tuần sau có khuyến mãi gì không ạ điện thoại cũ còn bán không giá bao nhiêu"
+).split()
+TEMPLATES = [
+    "gợi ý sản phẩm cho user {user}",
+    "Goi y giup minh vai mon do, ma khach {user}",
+    "bạn có thể recommend gì cho tôi không",
+    "Khi nào giao hàng vậy shop?",
+    "phí ship đơn {user} là bao nhiêu",
+    "sản phẩm này bảo hành mấy tháng",
+    "cho mình check order {user}",
+    "thanh toán bằng thẻ được không",
+    "{filler}",
+]
+
+
+def legacy_router(faq_presets: Dict[str, str]) -> Callable[[str], Tuple[str, Optional[str]]]:
+    recommendation_keywords = ["gợi ý", "goi y", "recommend", "gợi ý sản phẩm", "suggest"]
+
+    def looks_like_recommendation_request(message: str) -> bool:
+        normalized = message.lower()
+        return any(keyword in normalized for keyword in recommendation_keywords)
+
+    def extract_user_id_from_message(message: str) -> Optional[str]:
+        match = re.search(r"user\s*(\w+)", message.lower())
+        if match:
+            return match.group(1)
+        digits = re.findall(r"\d+", message)
+        return digits[0] if digits else None
+
+    def match_faq(message: str) -> Optional[str]:
+        normalized = message.lower()
+        for keyword, reply in faq_presets.items():
+            if keyword in normalized:
+                return reply
+        return None
+
+    def route(message: str) -> Tuple[str, Optional[str]]:
+        user_id = extract_user_id_from_message(message)
+        if looks_like_recommendation_request(message):
+            return "recommendation", user_id
+        return ("faq" if match_faq(message) else "fallback"), user_id
+
+    return route
+
+
+def corpus(size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(size):
+        filler = " ".join(rng.choices(FILLER, k=rng.randint(3, 25)))
+        template = rng.choice(TEMPLATES)
+        messages.append(f"{filler} {template.format(user=rng.randint(1, 99999), filler=filler)}")
+    return messages
+
+
+def padded_config(extra: int, seed: int) -> Dict[str, object]:
+    config = json.loads(INTENTS_FILE.read_text(encoding="utf-8"))
+    rng = random.Random(seed)
+    syllables = ["khu", "vực", "đổi", "trả", "hàng", "lỗi", "màu", "mẫu", "tiền", "cọc", "hoàn", "phí", "kho", "mới"]
+    keywords = {f"{rng.choice(syllables)} {rng.choice(syllables)} {index}" for index in range(extra)}
+    if keywords:
+        config["faq"].append({"topic": "generated", "keywords": sorted(keywords), "reply": "..."})
+    return config
+
+
+def bench(route: Callable[[str], object], messages: List[str]) -> Dict[str, float]:
+    started = time.perf_counter()
+    for message in messages:
+        route(message)
+    elapsed = time.perf_counter() - started
+    return {"messages_per_s": round(len(messages) / elapsed), "us_per_message": round(elapsed / len(messages) * 1e6, 3)}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark chatbot intent routing.")
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--extra-keywords", nargs="+", type=int, default=[0, 500])
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    messages = corpus(args.messages, args.seed)
+    mean_length = sum(len(message) for message in messages) / len(messages)
+    reports = []
+    for extra in args.extra_keywords:
+        config = padded_config(extra, args.seed)
+        presets = {keyword.lstrip("*"): rule["reply"] for rule in config["faq"] for keyword in rule["keywords"]}
+        router = IntentRouter.from_config(config)
+        legacy = legacy_router(presets)
+        agreement = sum(
+            legacy(message)[0] == router.route(message).name for message in messages[:10_000]
+        ) / min(len(messages), 10_000)
+        reports.append({
+            "keywords": len(presets) + 5,
+            "legacy": bench(legacy, messages),
+            "router": bench(router.route, messages),
+            "intent_agreement": round(agreement, 4),
+        })
+    print(json.dumps({"messages": len(messages), "mean_chars": round(mean_length, 1), "results": reports}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
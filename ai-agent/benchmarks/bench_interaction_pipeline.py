@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+End-to-end runtime and I/O of one incremental interaction refresh.
+
+A history of ``--history`` events spread over 90 days already exists and an
+extraction run brings ``--batch`` new events from its last two days. Each mode
+stores the batch, folds it into the history and writes the RecBole ``.inter``:
+
+* ``csv`` – the previous text pipeline: the batch goes to a CSV, is read back
+  and re-parsed, concatenated with the full ``interactions.csv`` which is
+  rewritten, and timestamps are parsed once more for the ``.inter``;
+* ``columnar`` – ``write_day_partitions`` for the batch, then the append-only
+  merge of ``prepare_interactions_for_recbole.py`` into the columnar history
+  (key-index lookup, one new sorted segment per touched day).
+
+Every mode runs in a fresh subprocess that builds its starting history first;
+only the refresh is measured. ``merge_seconds`` is the part up to the updated
+history, before the full ``.inter`` is rebuilt. ``read_mib``/``written_mib`` are ``rchar``/
+``wchar`` from ``/proc/self/io`` (bytes through read/write syscalls, page cache
+included); columnar files are memory-mapped, so their reads do not show up
+there and ``history_mib`` gives the on-disk size of the history instead.
+
+Usage:
+  python benchmarks/bench_interaction_pipeline.py --history 1000000 5000000 --batch 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from data.preprocessing import prepare_interactions_for_recbole as prepare  # noqa: E402
+from data.storage.interaction_store import read_files, write_day_partitions  # noqa: E402
+
+MODES = ("csv", "columnar")
+HISTORY_DAYS = 90
+EVENT_TYPES = ["view", "click", "add_to_cart", "purchase"]
+
+
+def proc_io() -> Dict[str, int]:
+    fields = {}
+    with open("/proc/self/io") as fp:
+        for line in fp:
+            key, _, value = line.partition(":")
+            fields[key] = int(value)
+    return fields
+
+
+def synthetic_events(rows: int, first_day: int, days: int, seed: int) -> pd.DataFrame:
+    """Normalized events (epoch-microsecond timestamps) as the extraction produces them."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-01", tz="UTC").value // 1000 + first_day * prepare.MICROS_PER_DAY
+    return pd.DataFrame({
+        "session_id": rng.integers(0, rows // 8 + 1, rows).astype(str),
+        "user_id": rng.integers(1, 50_000, rows).astype(str),
+        "product_id": rng.integers(1, 20_000, rows).astype(str),
+        "timestamp": start + rng.integers(0, days * 86_400, rows) * 10**6,
+        "event_type": rng.choice(EVENT_TYPES, rows, p=[0.6, 0.25, 0.1, 0.05]),
+    })
+
+
+def as_text(events: pd.DataFrame) -> pd.DataFrame:
+    text = events.copy()
+    text["timestamp"] = pd.to_datetime(text["timestamp"], unit="us", utc=True).dt.strftime("%Y-%m-%d %H:%M:%S")
+    return text
+
+
+def refresh_csv(batch: pd.DataFrame, workdir: Path, timings: Dict[str, float]) -> int:
+    """The previous pipeline, step for step."""
+    partition = workdir / "user_behavior_interactions.csv"
+    batch.to_csv(partition, index=False)
+
+    new_df = pd.read_csv(partition).astype(str)
+    new_df["timestamp"] = pd.to_datetime(new_df["timestamp"], utc=True, errors="coerce")
+    new_df = new_df.dropna(subset=["timestamp"])
+    new_df["timestamp"] = new_df["timestamp"].dt.tz_convert("UTC").dt.strftime("%Y-%m-%d %H:%M:%S")
+    combined = pd.concat([pd.read_csv(workdir / "interactions.csv", dtype=str), new_df], ignore_index=True)
+    combined = combined.drop_duplicates(subset=list(prepare.EVENT_COLUMNS), keep="last")
+    combined = combined.sort_values(by=prepare.SORT_COLUMNS)
+    combined.to_csv(workdir / "interactions.csv", index=False)
+    timings["merged"] = time.perf_counter()
+
+    train_df = combined.copy()
+    train_df["timestamp"] = pd.to_datetime(train_df["timestamp"], utc=True).astype("int64") // 10**3
+    return write_inter(prepare.build_training_frame(train_df), workdir)
+
+
+def refresh_columnar(batch: pd.DataFrame, workdir: Path, timings: Dict[str, float]) -> int:
+    files = write_day_partitions(workdir / "user_behavior", batch, "part-bench-00000")
+    new_df = read_files(workdir / "user_behavior", files)
+    new_df["event_type"] = prepare.normalize_event_types(new_df["event_type"])
+    new_df["timestamp"] -= new_df["timestamp"] % 10**6
+    prepare.merge_into_baseline(new_df, "bench")
+    timings["merged"] = time.perf_counter()
+    combined = prepare.sort_events(prepare.read_store(prepare.BASELINE_DIR))
+    return write_inter(prepare.build_training_frame(combined), workdir)
+
+
+def write_inter(train_df: pd.DataFrame, workdir: Path) -> int:
+    train_df[["user_id", "item_id", "timestamp", "label"]].to_csv(
+        workdir / "ecommerce.inter", index=False, sep="\t", header=prepare.INTER_HEADER
+    )
+    return len(train_df)
+
+
+def history_bytes(workdir: Path) -> int:
+    paths = [workdir / "interactions.csv", *(workdir / "interactions").rglob("*")]
+    return sum(path.stat().st_size for path in paths if path.is_file())
+
+
+def run_child(args: argparse.Namespace) -> int:
+    workdir = Path(args.workdir)
+    history = synthetic_events(args.history[0], 0, HISTORY_DAYS, seed=0)
+    batch = synthetic_events(args.batch, HISTORY_DAYS - 2, 2, seed=1)
+    if args.mode == "csv":
+        as_text(history).to_csv(workdir / "interactions.csv", index=False)
+        batch = batch.assign(timestamp=pd.to_datetime(batch["timestamp"], unit="us", utc=True).astype(str))
+        refresh = refresh_csv
+    else:
+        prepare.BASELINE_DIR = workdir / "interactions"
+        write_day_partitions(prepare.BASELINE_DIR, prepare.sort_events(history), "seg-seed", index_keys=True)
+        refresh = refresh_columnar
+    del history
+
+    before = proc_io()
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    rows = refresh(batch, workdir, timings)
+    seconds = time.perf_counter() - started
+    after = proc_io()
+    print(json.dumps({
+        "inter_rows": rows,
+        "seconds": round(seconds, 2),
+        "merge_seconds": round(timings["merged"] - started, 2),
+        "read_mib": round((after["rchar"] - before["rchar"]) / 2**20, 1),
+        "written_mib": round((after["wchar"] - before["wchar"]) / 2**20, 1),
+        "history_mib": round(history_bytes(workdir) / 2**20, 1),
+    }))
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Runtime and I/O of an incremental interaction refresh.")
+    parser.add_argument("--history", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--child", choices=MODES, dest="mode", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.mode:
+        return run_child(args)
+
+    results: Dict[str, List[Dict[str, object]]] = {mode: [] for mode in args.modes}
+    for history in args.history:
+        for mode in args.modes:
+            with tempfile.TemporaryDirectory(prefix="interaction-bench-") as tmp:
+                command = [
+                    sys.executable, __file__, "--child", mode,
+                    "--history", str(history), "--batch", str(args.batch), "--workdir", tmp,
+                ]
+                output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                results[mode].append({"history": history, **json.loads(output.strip().splitlines()[-1])})
+    print(json.dumps({"batch": args.batch, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark chatbot artifact loading (startup and /internal/reload).
+
+Compares three ways of building the serving artifacts for the same checkpoint:
+
+* ``recbole_dataset``       – legacy RecBole path (``create_dataset`` +
+  ``data_preparation``) plus ``torch.load`` of the pickled checkpoint;
+* ``bundle_pickled_weights`` – serving bundle without weights, so the
+  checkpoint is still unpickled;
+* ``bundle_mapped_weights``  – serving bundle with weights, memory-mapped and
+  used in place (no unpickling).
+
+Each mode runs in a fresh subprocess, so peak RSS (``VmHWM``) belongs to that
+mode alone. The ``model`` stage (bundle + BERT4Rec with weights) is timed
+separately from the full ``load_artifacts()``. Bundles are written to a
+temporary directory next to copies of the checkpoint. ``--synthetic-items N``
+serves a generated checkpoint with ``N`` items instead (bundle modes only);
+add ``--model-only`` for catalogs too large for the similar-items table.
+
+Usage:
+  python benchmarks/bench_model_load.py --repeats 5
+  python benchmarks/bench_model_load.py --synthetic-items 1000000 --model-only
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.api.serving_bundle import (  # noqa: E402
+    export_serving_bundle,
+    load_serving_bundle,
+    serving_bundle_path,
+    write_serving_bundle,
+)
+
+MODES = ("recbole_dataset", "bundle_pickled_weights", "bundle_mapped_weights")
+
+
+def proc_status() -> Dict[str, float]:
+    """Current/peak RSS and anonymous (heap) RSS of this process in MiB."""
+    fields = {}
+    with open("/proc/self/status") as fp:
+        for line in fp:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM", "RssAnon", "RssFile"):
+                fields[key] = round(int(value.split()[0]) / 1024, 1)
+    return fields
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "first_ms": round(samples[0] * 1000, 2),
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+def run_child(args: argparse.Namespace) -> int:
+    from services.api import app as service
+
+    checkpoint = service.resolve_checkpoint()
+    baseline = proc_status()
+    report: Dict[str, object] = {}
+    if service.USE_SERVING_BUNDLE:
+        samples = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            bundle = load_serving_bundle(serving_bundle_path(checkpoint))
+            service.load_model(bundle.config, bundle.dataset, checkpoint, bundle.weights)
+            samples.append(time.perf_counter() - started)
+            if not samples[1:]:
+                report["model_peak_rss_mib"] = round(proc_status()["VmHWM"] - baseline["VmRSS"], 1)
+        report["model"] = summarize(samples)
+    if not args.model_only:
+        samples = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            service.load_artifacts()
+            samples.append(time.perf_counter() - started)
+        report["load_artifacts"] = summarize(samples)
+    after = proc_status()
+    report.update({
+        "peak_rss_mib": round(after["VmHWM"] - baseline["VmRSS"], 1),
+        "rss_mib": round(after["VmRSS"] - baseline["VmRSS"], 1),
+        "anon_rss_mib": round(after["RssAnon"] - baseline["RssAnon"], 1),
+        "file_rss_mib": round(after["RssFile"] - baseline["RssFile"], 1),
+    })
+    print(json.dumps(report))
+    return 0
+
+
+def prepare_checkpoints(workdir: Path, args: argparse.Namespace) -> Dict[str, Path]:
+    """Checkpoint copy per mode, each with the bundle that mode should load."""
+    import torch
+
+    (workdir / "source").mkdir()
+    if args.synthetic_items:
+        from bench_chat_load import write_synthetic_checkpoint
+
+        source, _ = write_synthetic_checkpoint(workdir / "source", args.synthetic_users, args.synthetic_items)
+        bundle = load_serving_bundle(serving_bundle_path(source))
+        checkpoints = {}
+    else:
+        from recbole.data import create_dataset, data_preparation
+
+        from services.api import app as service
+
+        source = service.resolve_checkpoint()
+        config = service.build_config()
+        dataset = create_dataset(config)
+        data_preparation(config, dataset)
+        state = torch.load(source, map_location="cpu", weights_only=False)
+        state_dict = state["state_dict"] if isinstance(state, dict) and "state_dict" in state else state
+        path = export_serving_bundle(
+            workdir / "source" / serving_bundle_path(source).name,
+            config,
+            dataset,
+            {name: tensor.numpy() for name, tensor in state_dict.items()},
+        )
+        bundle = load_serving_bundle(path)
+        checkpoints = {"recbole_dataset": source}
+
+    for mode, with_weights in (("bundle_pickled_weights", False), ("bundle_mapped_weights", True)):
+        checkpoint = workdir / mode / source.name
+        checkpoint.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, checkpoint)
+        write_serving_bundle(
+            serving_bundle_path(checkpoint),
+            bundle.config,
+            bundle.dataset.field2id_token[bundle.dataset.uid_field],
+            bundle.dataset.field2id_token[bundle.dataset.iid_field],
+            bundle.history_index,
+            bundle.weights if with_weights else None,
+        )
+        checkpoints[mode] = checkpoint
+    return checkpoints
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark chatbot artifact loading.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--synthetic-items", type=int, default=0, help="Generate a checkpoint with this many items.")
+    parser.add_argument("--synthetic-users", type=int, default=20_000)
+    parser.add_argument("--model-only", action="store_true", help="Only time the bundle + model stage.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.child:
+        return run_child(args)
+
+    results: Dict[str, object] = {}
+    with tempfile.TemporaryDirectory(prefix="model-load-") as tmp:
+        checkpoints = prepare_checkpoints(Path(tmp), args)
+        for mode in MODES:
+            if mode not in checkpoints:
+                continue
+            env = {
+                **os.environ,
+                "CHATBOT_MODEL_PATH": str(checkpoints[mode]),
+                "CHATBOT_USE_SERVING_BUNDLE": "0" if mode == "recbole_dataset" else "1",
+            }
+            command = [sys.executable, __file__, "--child", "--repeats", str(args.repeats)]
+            if args.model_only:
+                command.append("--model-only")
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+        source = checkpoints["bundle_mapped_weights"]
+        results = {
+            "checkpoint": str(source.name),
+            "checkpoint_bytes": source.stat().st_size,
+            "bundle_bytes": serving_bundle_path(source).stat().st_size,
+            **results,
+        }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
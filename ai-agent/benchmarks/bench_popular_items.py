@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the popular-items fallback.
+
+Compares the former per-request ``value_counts`` over the whole item column
+with slicing the ranking precomputed at artifact load.
+
+Usage:
+  python benchmarks/bench_popular_items.py --sizes 20000 200000 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import torch
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.api.popularity import rank_from_counts  # noqa: E402
+
+
+def measure(fn: Callable[[], object], repeats: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 4),
+    }
+
+
+def run(size: int, items: int, topk: int, repeats: int, seed: int) -> Dict[str, object]:
+    rng = np.random.default_rng(seed)
+    # Zipf-like item column, internal ids start at 1 like RecBole (0 is padding).
+    item_column = torch.from_numpy(np.minimum(rng.zipf(1.3, size=size), items - 1))
+    id2token = ["[PAD]"] + [str(idx) for idx in range(1, items)]
+
+    def legacy() -> List[int]:
+        counts = pd.Series(item_column).astype(str).value_counts()
+        results: List[int] = []
+        for token in counts.index.astype(str):
+            results.append(int(id2token[int(token)]))
+            if len(results) >= topk:
+                break
+        return results
+
+    build_started = time.perf_counter()
+    ranking = rank_from_counts(item_column.numpy(), id2token)
+    build_ms = (time.perf_counter() - build_started) * 1000
+
+    return {
+        "interactions": size,
+        "ranking_build_ms": round(build_ms, 3),
+        "value_counts_per_call": measure(legacy, repeats),
+        "precomputed_slice": measure(lambda: ranking[:topk], repeats),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark popular-items fallback strategies.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000, 2_000_000])
+    parser.add_argument("--items", type=int, default=5_000)
+    parser.add_argument("--topk", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    results = [run(size, args.items, args.topk, args.repeats, args.seed) for size in args.sizes]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
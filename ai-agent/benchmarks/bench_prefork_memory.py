@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory of ``uvicorn --workers N`` against the pre-fork server.
+
+Each mode is started as a subprocess on a free port. Once every worker answers
+``/health`` with a loaded model, and again after a burst of ``/chat``
+recommendation requests, the RSS, PSS and USS of each worker are read from
+``/proc/<pid>/smaps_rollup``. RSS counts shared pages once per worker; the
+sum of PSS over the process tree is the memory the deployment really uses.
+In pre-fork mode a forced reload is triggered last, to check that it rolls
+every worker onto the new artifacts and that sharing survives it.
+
+With ``--synthetic`` (or when no checkpoint is found) a BERT4Rec checkpoint
+of ``--synthetic-items`` items is generated, so the model dominates memory.
+
+Usage:
+  python benchmarks/bench_prefork_memory.py --workers 4
+  python benchmarks/bench_prefork_memory.py --workers 4 --synthetic --synthetic-items 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import requests
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from bench_chat_load import free_port, write_synthetic_checkpoint  # noqa: E402
+from services.api.metrics import process_memory  # noqa: E402
+
+MODES = {
+    "uvicorn_workers": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "services.api.app:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ],
+    "prefork": lambda port, workers: [
+        sys.executable, "-m", "services.api.prefork",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ],
+}
+
+
+def wait_for_workers(url: str, process: subprocess.Popen, workers: int, timeout: float) -> List[int]:
+    """Poll ``/health`` on fresh connections until ``workers`` distinct pids report a loaded model."""
+    ready = set()
+    deadline = time.monotonic() + timeout
+    while len(ready) < workers:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server thoát với mã {process.returncode}.")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Chỉ {len(ready)}/{workers} worker sẵn sàng sau {timeout:.0f}s.")
+        try:
+            health = requests.get(f"{url}/health", timeout=5).json()
+        except requests.RequestException:
+            time.sleep(0.2)
+            continue
+        if health.get("modelReady"):
+            ready.add(int(health["process"]["pid"]))
+        else:
+            time.sleep(0.2)
+    return sorted(ready)
+
+
+def memory_report(supervisor: int, worker_pids: List[int]) -> Dict[str, object]:
+    mib = 2**20
+    workers = []
+    for pid in worker_pids:
+        memory = process_memory(pid)
+        workers.append({"pid": pid, **{key: round(value / mib, 1) for key, value in memory.items()}})
+    parent = {key: round(value / mib, 1) for key, value in process_memory(supervisor).items()}
+    return {
+        "supervisor": parent,
+        "workers": workers,
+        "worker_rss_mib_mean": round(sum(w["rss"] for w in workers) / max(1, len(workers)), 1),
+        "worker_pss_mib_mean": round(sum(w["pss"] for w in workers) / max(1, len(workers)), 1),
+        "total_rss_mib": round(parent.get("rss", 0) + sum(w["rss"] for w in workers), 1),
+        "total_pss_mib": round(parent.get("pss", 0) + sum(w["pss"] for w in workers), 1),
+    }
+
+
+def send_chat_burst(url: str, users: List[str], requests_count: int) -> None:
+    with requests.Session() as session:
+        for index in range(requests_count):
+            user = users[index % len(users)]
+            session.post(f"{url}/chat", json={"message": f"gợi ý sản phẩm cho user {user}"}, timeout=30)
+
+
+def force_reload(url: str, timeout: float) -> Dict[str, object]:
+    job = requests.post(f"{url}/internal/reload", json={"force": True, "token": os.environ.get("CHATBOT_RELOAD_TOKEN")}, timeout=10).json()
+    deadline = time.monotonic() + timeout
+    while job.get("status") in ("queued", "running"):
+        if time.monotonic() > deadline:
+            raise RuntimeError("Reload chưa xong sau thời gian chờ.")
+        time.sleep(0.5)
+        job = requests.get(f"{url}/internal/reload/{job['job_id']}", timeout=10).json()
+    return job
+
+
+@contextmanager
+def running_server(command: List[str], env: Dict[str, str]) -> Iterator[subprocess.Popen]:
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env)
+    try:
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def run_mode(mode: str, args: argparse.Namespace, env: Dict[str, str], users: List[str]) -> Dict[str, object]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    with running_server(MODES[mode](port, args.workers), env) as process:
+        started = time.perf_counter()
+        workers = wait_for_workers(url, process, args.workers, args.timeout)
+        report: Dict[str, object] = {"ready_seconds": round(time.perf_counter() - started, 2)}
+        report["after_start"] = memory_report(process.pid, workers)
+        send_chat_burst(url, users, args.requests)
+        report["after_requests"] = memory_report(process.pid, workers)
+        if mode == "prefork" and not args.skip_reload:
+            report["reload_job"] = force_reload(url, args.timeout)
+            time.sleep(1.0)  # let the retired generation drain and exit
+            reloaded = wait_for_workers(url, process, args.workers, args.timeout)
+            report["after_reload"] = memory_report(process.pid, reloaded)
+            report["workers_replaced"] = not set(workers) & set(reloaded)
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of uvicorn workers and the pre-fork server.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["uvicorn_workers", "prefork"])
+    parser.add_argument("--requests", type=int, default=200, help="Recommendation requests sent between snapshots.")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--skip-reload", action="store_true")
+    parser.add_argument("--synthetic", action="store_true", help="Serve a generated checkpoint instead of the newest one.")
+    parser.add_argument("--synthetic-users", type=int, default=20_000)
+    parser.add_argument("--synthetic-items", type=int, default=30_000)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    env = {**os.environ, "CHATBOT_TORCH_THREADS": "1"}
+    users = [str(uid) for uid in range(1, 201)]
+    with tempfile.TemporaryDirectory(prefix="prefork-bench-") as workdir:
+        checkpoint: Optional[Path] = None
+        if not args.synthetic:
+            from services.api import app as service
+
+            try:
+                checkpoint = service.resolve_checkpoint()
+            except FileNotFoundError:
+                print("Không có checkpoint, dùng checkpoint tổng hợp.", file=sys.stderr)
+        if checkpoint is None:
+            checkpoint, _ = write_synthetic_checkpoint(Path(workdir), args.synthetic_users, args.synthetic_items)
+        env["CHATBOT_MODEL_PATH"] = str(checkpoint)
+        results = {mode: run_mode(mode, args, env, users) for mode in args.modes}
+    print(json.dumps({"checkpoint": str(checkpoint), "workers": args.workers, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
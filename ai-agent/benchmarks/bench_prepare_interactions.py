@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Runtime and peak memory of building the RecBole ``.inter`` from the history.
+
+Both modes read the same columnar history and write ``ecommerce.inter``:
+
+* ``strings`` – the previous preparation: every id converted to Python
+  strings, ``sort_values``/``drop_duplicates`` on object columns and the label
+  from a per-row ``map``;
+* ``typed`` – ``sort_events``/``build_training_frame`` of
+  ``prepare_interactions_for_recbole.py``: ids stay categorical, timestamps
+  int64, ordering and deduplication run on integer codes.
+
+Every mode runs in a fresh subprocess; ``peak_rss_mib`` is its ``VmHWM`` above
+the RSS once imports are done and ``sha256`` is the digest of the ``.inter``
+(identical across modes).
+
+Usage:
+  python benchmarks/bench_prepare_interactions.py --events 1000000 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from data.preprocessing import prepare_interactions_for_recbole as prepare  # noqa: E402
+from data.storage.interaction_store import EVENT_COLUMNS, read_store, write_day_partitions  # noqa: E402
+
+MODES = ("strings", "typed")
+EVENT_TYPES = np.array(["view", "click", "add_to_cart", "purchase"])
+
+
+def proc_status() -> Dict[str, float]:
+    fields = {}
+    with open("/proc/self/status") as fp:
+        for line in fp:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+
+def write_history(store: Path, events: int, seed: int = 0) -> None:
+    """``events`` interactions over 90 days, written day by day like the merged history."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-01", tz="UTC").value // 1000
+    chunk = 1_000_000
+    for index, offset in enumerate(range(0, events, chunk)):
+        rows = min(chunk, events - offset)
+        history = pd.DataFrame({
+            "session_id": pd.Categorical(rng.integers(0, events // 8 + 1, rows).astype(str)),
+            "user_id": pd.Categorical(rng.integers(1, 200_000, rows).astype(str)),
+            "product_id": pd.Categorical(rng.integers(1, 50_000, rows).astype(str)),
+            "timestamp": start + rng.integers(0, 90 * 86_400, rows) * 10**6,
+            "event_type": pd.Categorical(EVENT_TYPES[rng.choice(4, rows, p=[0.6, 0.25, 0.1, 0.05])]),
+        })
+        write_day_partitions(store, history, f"seg-{index:05d}")
+
+
+def build_strings(store: Path) -> pd.DataFrame:
+    """The previous preparation, step for step."""
+    combined = read_store(store)
+    combined = combined.astype({column: str for column in EVENT_COLUMNS if column != "timestamp"})
+    combined = combined.sort_values(by=prepare.SORT_COLUMNS)
+    train_df = combined.copy()
+    train_df["item_id"] = train_df["product_id"]
+    train_df["label"] = train_df["event_type"].map(lambda x: 1 if x == "purchase" else 0).astype(int)
+    train_df["timestamp"] = train_df["timestamp"] // 10 ** 6
+    train_df = train_df.drop_duplicates(subset=["user_id", "item_id", "timestamp", "event_type"], keep="last")
+    return train_df.sort_values(by=["user_id", "timestamp"])
+
+
+def build_typed(store: Path) -> pd.DataFrame:
+    return prepare.build_training_frame(prepare.sort_events(read_store(store)))
+
+
+def run_child(args: argparse.Namespace) -> int:
+    store = Path(args.store)
+    output = Path(args.output)
+    baseline = proc_status()["VmRSS"]
+    started = time.perf_counter()
+    train_df = (build_strings if args.mode == "strings" else build_typed)(store)
+    built = time.perf_counter()
+    train_df[["user_id", "item_id", "timestamp", "label"]].to_csv(
+        output, index=False, sep="\t", header=prepare.INTER_HEADER
+    )
+    finished = time.perf_counter()
+    print(json.dumps({
+        "rows": len(train_df),
+        "build_seconds": round(built - started, 2),
+        "seconds": round(finished - started, 2),
+        "peak_rss_mib": round(proc_status()["VmHWM"] - baseline, 1),
+        "sha256": hashlib.sha256(output.read_bytes()).hexdigest(),
+    }))
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Runtime and peak RSS of the .inter preparation.")
+    parser.add_argument("--events", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--child", choices=MODES, dest="mode", help=argparse.SUPPRESS)
+    parser.add_argument("--store", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.mode:
+        return run_child(args)
+
+    results: Dict[str, List[Dict[str, object]]] = {mode: [] for mode in args.modes}
+    for events in args.events:
+        with tempfile.TemporaryDirectory(prefix="prepare-bench-") as tmp:
+            store = Path(tmp) / "interactions"
+            write_history(store, events)
+            for mode in args.modes:
+                command = [
+                    sys.executable, __file__, "--child", mode,
+                    "--store", str(store), "--output", str(Path(tmp) / f"{mode}.inter"),
+                ]
+                process = subprocess.run(command, capture_output=True, text=True)
+                if process.returncode != 0:  # e.g. killed by the OOM killer on large inputs
+                    results[mode].append({"events": events, "returncode": process.returncode})
+                    continue
+                results[mode].append({"events": events, **json.loads(process.stdout.strip().splitlines()[-1])})
+    print(json.dumps({"results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark the "similar products" neighbour table.
+
+For synthetic catalogs of growing size (random embeddings with the model's
+hidden size and a synthetic session log) it times the co-occurrence count,
+the table build and row lookups. It also times ``GET /items/{id}/similar``
+against the loaded checkpoint.
+
+Usage:
+  python benchmarks/bench_similar_items.py --catalog-sizes 1000 10000 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from services.api import app as service  # noqa: E402
+from services.api.similar_items import SimilarItemsTable, session_cooccurrence  # noqa: E402
+
+
+def synthetic_sessions(path: Path, n_items: int, sessions: int, rng: np.random.Generator) -> int:
+    lengths = rng.integers(2, 12, size=sessions)
+    session_ids = np.repeat(np.arange(sessions), lengths)
+    # Sessions browse around a "topic" item so co-occurrence is not uniform noise.
+    topics = np.repeat(rng.integers(1, n_items, size=sessions), lengths)
+    items = np.clip(topics + rng.integers(-20, 21, size=len(topics)), 1, n_items - 1)
+    pd.DataFrame({
+        "session_id": session_ids.astype(str),
+        "user_id": session_ids % 1000,
+        "product_id": items,
+        "timestamp": pd.Timestamp("2025-01-01") + pd.to_timedelta(np.arange(len(items)), unit="s"),
+        "event_type": "view",
+    }).to_csv(path, index=False)
+    return len(items)
+
+
+def lookup_latency(table: SimilarItemsTable, n_items: int, topk: int, rng: np.random.Generator) -> Dict[str, float]:
+    samples: List[float] = []
+    for item in rng.integers(1, n_items, size=5000):
+        started = time.perf_counter()
+        table.lookup(int(item), topk)
+        samples.append(time.perf_counter() - started)
+    return {
+        "lookup_p50_us": round(float(np.percentile(samples, 50)) * 1e6, 2),
+        "lookup_p99_us": round(float(np.percentile(samples, 99)) * 1e6, 2),
+    }
+
+
+def bench_catalog(size: int, dim: int, args: argparse.Namespace, workdir: Path) -> Dict[str, object]:
+    rng = np.random.default_rng(size)
+    embeddings = rng.normal(size=(size, dim)).astype(np.float32)
+    valid = np.ones(size, dtype=bool)
+    valid[0] = False  # padding
+    interactions = workdir / f"interactions-{size}.csv"
+    events = synthetic_sessions(interactions, size, args.sessions_per_item * size, rng)
+    token2id = {str(item): item for item in range(size)}
+
+    started = time.perf_counter()
+    cooccurrence = session_cooccurrence(interactions, token2id, size)
+    cooccurrence_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    table = SimilarItemsTable.build(embeddings, valid, cooccurrence, top_n=args.top_n)
+    build_ms = (time.perf_counter() - started) * 1000
+    return {
+        "items": size,
+        "events": events,
+        "pairs": int(cooccurrence.offsets[-1]),
+        "cooccurrence_ms": round(cooccurrence_ms, 1),
+        "build_ms": round(build_ms, 1),
+        "table_bytes": int(table.neighbors.nbytes + table.scores.nbytes),
+        **lookup_latency(table, size, args.topk, rng),
+    }
+
+
+def bench_endpoint(client: TestClient, topk: int) -> Dict[str, object]:
+    item_lookup = service.ARTIFACTS["item_lookup"]
+    items = item_lookup.external_ids[item_lookup.external_ids >= 0]
+    samples: List[float] = []
+    for item in np.resize(items, 1000):
+        started = time.perf_counter()
+        client.get(f"/items/{item}/similar", params={"top_k": topk}).raise_for_status()
+        samples.append(time.perf_counter() - started)
+    return {
+        "items": int(len(items)),
+        "endpoint_p50_ms": round(float(np.percentile(samples, 50)) * 1000, 3),
+        "endpoint_p99_ms": round(float(np.percentile(samples, 99)) * 1000, 3),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the similar-items neighbour table.")
+    parser.add_argument("--catalog-sizes", nargs="*", type=int, default=[1_000, 10_000, 50_000])
+    parser.add_argument("--sessions-per-item", type=int, default=2)
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--topk", type=int, default=10)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    with TestClient(service.app) as client:
+        checkpoint = bench_endpoint(client, args.topk)
+        dim = int(service.ARTIFACTS["model"].item_embedding.embedding_dim)
+    with tempfile.TemporaryDirectory() as workdir:
+        synthetic = [bench_catalog(size, dim, args, Path(workdir)) for size in args.catalog_sizes]
+    print(json.dumps({"checkpoint": checkpoint, "synthetic": synthetic}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
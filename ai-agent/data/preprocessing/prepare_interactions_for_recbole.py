@@ -3,14 +3,35 @@ from __future__ import annotations
 import json
 import os
 import shutil
+import sys
 import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from data.storage.interaction_store import (  # noqa: E402
+    EVENT_COLUMNS,
+    MICROS_PER_DAY,
+    PARTITION_SUFFIX,
+    contains_keys,
+    day_name,
+    event_keys,
+    iter_partitions,
+    read_files,
+    read_keys,
+    read_store,
+    to_epoch_micros,
+    write_day_partitions,
+    write_events,
+)
+
 RAW_DIR = BASE_DIR / "data" / "raw"
 OUTPUT_ROOT = BASE_DIR / "recommender" / "dataset"
 OUTPUT_ROOT.mkdir(parents=True, exist_ok=True)
@@ -20,8 +41,17 @@ VERSIONS_DIR = OUTPUT_ROOT / "versions"
 VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
 CURRENT_LINK = OUTPUT_ROOT / "current"
 
-SOURCE_FILE = RAW_DIR / "user_behavior_interactions.csv"
+# Append-only store written by user_behavior_advanced.py: one batch of files per extraction run.
+STORE_DIR = RAW_DIR / "user_behavior"
+STORE_MANIFEST = STORE_DIR / "manifest.json"
+# Full interaction history: per day, append-only sorted segments (one per merge) with
+# a row-key index; the legacy CSV only seeds it.
+BASELINE_DIR = RAW_DIR / "interactions"
 BASELINE_FILE = RAW_DIR / "interactions.csv"
+SORT_COLUMNS = ["session_id", "timestamp", "product_id", "event_type"]
+INTER_HEADER = ["user_id:token", "item_id:token", "timestamp:float", "label:float"]
+# A day holding more segments than this is compacted back into one.
+MAX_DAY_SEGMENTS = int(os.environ.get("AI_INTERACTION_MAX_SEGMENTS", "8"))
 TARGET_FILE = OUTPUT_ROOT / "ecommerce.inter"
 LEGACY_FILE = LEGACY_DIR / "ecommerce.inter"
 MANIFEST_NAME = "manifest.json"
@@ -71,53 +101,159 @@ def write_manifest(path: Path, payload: Dict[str, Any]) -> None:
             os.unlink(tmp_name)
 
 
+def read_json(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def pending_batches(store_manifest: Dict[str, Any], merged_through: Optional[str]) -> List[Dict[str, Any]]:
+    """Store batches extracted after ``merged_through`` (the last batch already in the baseline)."""
+    return [
+        batch
+        for batch in store_manifest.get("batches", [])
+        if batch["files"] and (merged_through is None or batch["batch"] > merged_through)
+    ]
+
+
+def sort_key(values: pd.Series) -> np.ndarray:
+    """Integer key ordering ``values`` as their strings would sort (ids stay dictionary-encoded); integers pass through."""
+    if values.dtype.kind in "iu":
+        return values.to_numpy()
+    categorical = values.astype("category")
+    if categorical.cat.categories.is_monotonic_increasing:  # as read from the store
+        return categorical.cat.codes.to_numpy()
+    ranks = np.empty(len(categorical.cat.categories), dtype=np.int64)
+    ranks[categorical.cat.categories.argsort()] = np.arange(len(ranks))
+    return ranks[categorical.cat.codes.to_numpy()]
+
+
+def sort_events(events: pd.DataFrame) -> pd.DataFrame:
+    """Stable sort by ``SORT_COLUMNS`` on the dictionary codes; same order as sorting the strings."""
+    return events.iloc[np.lexsort([sort_key(events[column]) for column in reversed(SORT_COLUMNS)])]
+
+
+def normalize_event_types(values: pd.Series) -> pd.Series:
+    """Lower-case and strip event types once per distinct value, not once per row."""
+    categorical = values.astype("category")
+    codes, uniques = pd.factorize(categorical.cat.categories.str.lower().str.strip())
+    return pd.Series(
+        pd.Categorical.from_codes(codes[categorical.cat.codes.to_numpy()], uniques),
+        index=values.index,
+    )
+
+
+def seed_baseline() -> None:
+    """Convert the legacy ``interactions.csv`` into the columnar baseline once."""
+    if BASELINE_DIR.exists() or not BASELINE_FILE.exists():
+        return
+    seed = pd.read_csv(BASELINE_FILE, usecols=list(EVENT_COLUMNS), dtype=str)
+    seed["timestamp"] = to_epoch_micros(seed["timestamp"])
+    seed = seed.dropna().astype({"timestamp": "int64"})
+    seed = sort_events(seed.drop_duplicates(subset=list(EVENT_COLUMNS), keep="last"))
+    write_day_partitions(BASELINE_DIR, seed, "seg-seed", index_keys=True)
+    print(f"🌱 Đã chuyển {BASELINE_FILE} ({len(seed)} bản ghi) sang {BASELINE_DIR}.")
+
+
+def merge_into_baseline(new_df: pd.DataFrame, segment: str) -> Dict[str, int]:
+    """
+    Append the events not yet in the history as one sorted segment per day.
+
+    Membership is checked against the key index of the day's existing segments,
+    so only the new rows are read, sorted and written; a day is rewritten as a
+    whole only when it exceeds ``MAX_DAY_SEGMENTS``. Re-merging a batch is a no-op.
+    """
+    new_df = new_df.drop_duplicates(subset=list(EVENT_COLUMNS), keep="last")
+    keys = event_keys(new_df)
+    days = new_df["timestamp"].to_numpy(dtype=np.int64) // MICROS_PER_DAY
+    stats = {"appended": 0, "days": 0, "compacted": 0}
+    for day in np.unique(days):
+        name = day_name(day * MICROS_PER_DAY)
+        in_day = days == day
+        existing = list(iter_partitions(BASELINE_DIR, [name]))
+        fresh = np.ones(int(in_day.sum()), dtype=bool)
+        for path in existing:
+            fresh &= ~contains_keys(read_keys(path), keys[in_day])
+        if not fresh.any():
+            continue
+        target = BASELINE_DIR / f"day={name}" / f"seg-{segment}{PARTITION_SUFFIX}"
+        write_events(target, sort_events(new_df[in_day][fresh]), index_keys=True)
+        stats["appended"] += int(fresh.sum())
+        stats["days"] += 1
+        if len(existing) + 1 > MAX_DAY_SEGMENTS:
+            compact_day(name, target)
+            stats["compacted"] += 1
+    return stats
+
+
+def compact_day(name: str, target: Path) -> None:
+    """Rewrite every segment of a day into ``target`` (one sorted segment) and drop the others."""
+    segments = list(iter_partitions(BASELINE_DIR, [name]))
+    merged = read_files(BASELINE_DIR, [str(path.relative_to(BASELINE_DIR)) for path in segments])
+    # The write is atomic; a crash before the old segments are gone only leaves duplicate
+    # rows, which the key check skips and the .inter deduplication drops.
+    write_events(target, sort_events(merged), index_keys=True)
+    for path in segments:
+        if path != target:
+            path.unlink()
+
+
+def build_training_frame(combined: pd.DataFrame) -> pd.DataFrame:
+    """
+    RecBole rows from the merged history: one per user/item/second/event (the
+    last one wins), labelled 1 for purchases and ordered by user then time.
+    Ids stay categorical and timestamps int64; deduplication and ordering run
+    on integer codes.
+    """
+    user_key = sort_key(combined["user_id"])
+    seconds = combined["timestamp"].to_numpy(dtype=np.int64) // 10 ** 6
+    event_type = combined["event_type"].astype("category")
+    duplicated = pd.DataFrame({
+        "user_id": user_key,
+        "item_id": sort_key(combined["product_id"]),
+        "timestamp": seconds,
+        "event_type": event_type.cat.codes.to_numpy(),
+    }).duplicated(keep="last").to_numpy()
+    rows = np.flatnonzero(~duplicated)
+    rows = rows[np.lexsort((seconds[rows], user_key[rows]))]
+    return pd.DataFrame({
+        "user_id": combined["user_id"].array.take(rows),
+        "item_id": combined["product_id"].array.take(rows),
+        "timestamp": seconds[rows],
+        "label": (event_type.array == "purchase")[rows].astype(np.int64),
+    })
+
+
 def main() -> None:
-    if not SOURCE_FILE.exists():
+    if not STORE_MANIFEST.exists():
         raise FileNotFoundError(
-            f"Không tìm thấy nguồn dữ liệu {SOURCE_FILE}. Vui lòng chạy user_behavior_advanced.py trước."
+            f"Không tìm thấy nguồn dữ liệu {STORE_MANIFEST}. Vui lòng chạy user_behavior_advanced.py trước."
         )
 
     # ===== Đọc dữ liệu mới =====
-    new_df = pd.read_csv(SOURCE_FILE)
-    required_columns = {"session_id", "user_id", "product_id", "timestamp", "event_type"}
-    missing = required_columns - set(new_df.columns)
-    if missing:
-        raise ValueError(f"Dữ liệu nguồn thiếu cột bắt buộc: {', '.join(sorted(missing))}")
-
-    new_df = new_df[list(required_columns)].copy()
-
-    # Làm sạch
-    new_df = new_df.astype(str)
-    new_df["event_type"] = new_df["event_type"].str.lower().str.strip()
-    new_df["timestamp"] = pd.to_datetime(new_df["timestamp"], utc=True, errors="coerce")
-    new_df = new_df.dropna(subset=["timestamp"])
-    new_df["timestamp"] = new_df["timestamp"].dt.tz_convert("UTC").dt.strftime("%Y-%m-%d %H:%M:%S")
-
-    # ===== Đọc dữ liệu cũ nếu có =====
-    if BASELINE_FILE.exists():
-        old_df = pd.read_csv(BASELINE_FILE)
-        combined = pd.concat([old_df, new_df], ignore_index=True)
-        combined = combined.drop_duplicates(
-            subset=["session_id", "user_id", "product_id", "timestamp", "event_type"],
-            keep="last",
-        )
-    else:
-        combined = new_df
+    store_manifest = read_json(STORE_MANIFEST)
+    merged_through = read_json(LATEST_MANIFEST).get("source_batch")
+    batches = pending_batches(store_manifest, merged_through)
+    new_df = read_files(STORE_DIR, [name for batch in batches for name in batch["files"]])
+    print(f"📥 {len(batches)} lô mới ({len(new_df)} event) kể từ {merged_through or 'đầu'}.")
+
+    # Làm sạch; như trước đây, lịch sử chỉ giữ thời gian đến từng giây.
+    new_df["event_type"] = normalize_event_types(new_df["event_type"])
+    new_df["timestamp"] -= new_df["timestamp"] % 10**6
 
-    combined = combined.sort_values(by=["session_id", "timestamp", "product_id", "event_type"])
-    combined.to_csv(BASELINE_FILE, index=False)
-    print(f"🗂  Đã cập nhật {BASELINE_FILE} (tổng {len(combined)} bản ghi).")
+    # ===== Gộp vào lịch sử =====
+    seed_baseline()
+    merged = merge_into_baseline(new_df, batches[-1]["batch"] if batches else "empty")
+    combined = sort_events(read_store(BASELINE_DIR))
+    print(
+        f"🗂  Đã thêm {merged['appended']} bản ghi mới vào {merged['days']} ngày trong {BASELINE_DIR} "
+        f"(gộp lại {merged['compacted']} ngày; tổng {len(combined)} bản ghi)."
+    )
 
     # ===== Chuẩn bị cho huấn luyện =====
-    train_df = combined.copy()
-    train_df["item_id"] = train_df["product_id"]
-    train_df["label"] = train_df["event_type"].map(lambda x: 1 if x == "purchase" else 0).astype(int)
-    train_df["timestamp"] = pd.to_datetime(train_df["timestamp"], utc=True)
-    train_df["timestamp"] = train_df["timestamp"].astype("int64") // 10 ** 9
-    train_df = train_df.drop_duplicates(subset=["user_id", "item_id", "timestamp", "event_type"], keep="last")
-    train_df = train_df.sort_values(by=["user_id", "timestamp"])
-
-    header = ["user_id:token", "item_id:token", "timestamp:float", "label:float"]
+    train_df = build_training_frame(combined)
+    header = INTER_HEADER
     df_to_write = train_df[["user_id", "item_id", "timestamp", "label"]]
 
     # ===== Snapshot version mới =====
@@ -140,7 +276,10 @@ def main() -> None:
         "items": int(train_df["item_id"].nunique()),
         "positive_labels": int(df_to_write["label"].sum()),
         "file": str(version_file),
-        "source": [str(SOURCE_FILE), str(BASELINE_FILE)],
+        "source": [str(STORE_DIR), str(BASELINE_DIR)],
+        # Extraction progress already folded into the baseline; the next run only reads later batches.
+        "source_batch": (store_manifest.get("batches") or [{"batch": merged_through}])[-1]["batch"],
+        "source_watermark": store_manifest.get("watermark"),
         "header": header,
     }
 
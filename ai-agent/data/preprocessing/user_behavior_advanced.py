@@ -1,35 +1,58 @@
-"""Extract user behaviour from Postgres into a CSV."""
+"""
+Extract user behaviour from Postgres into an append-only local store.
+
+Only events after the high-watermark (``occurredAt`` plus the event ``id`` as
+tie-breaker) recorded in the store manifest are fetched; each run appends
+them as a new batch of day-partitioned columnar files (see
+``data/storage/interaction_store.py``) under ``data/raw/user_behavior/``, so
+the cost of a run follows the number of new events rather than the size of
+the table.
+
+Rows are streamed in chunks of ``AI_PG_FETCH_ROWS`` (a named server-side
+cursor with psycopg, ``COPY`` output read incrementally with psql) and
+written straight to the store, so memory stays flat whatever the number of
+events.
+"""
 
 from __future__ import annotations
 
-import io
+import json
 import os
 import subprocess
+import sys
+import tempfile
 import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
 try:
     import psycopg
-    from psycopg.rows import dict_row
 except ImportError:  # pragma: no cover - optional dependency
     psycopg = None  # type: ignore[assignment]
-    dict_row = None  # type: ignore[assignment]
 
 BASE_DIR = Path(__file__).resolve().parents[2]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from data.storage.interaction_store import EVENT_COLUMNS, to_epoch_micros, write_day_partitions  # noqa: E402
+
 RAW_DIR = BASE_DIR / "data" / "raw"
 RAW_DIR.mkdir(parents=True, exist_ok=True)
 
-OUTPUT_FILE = RAW_DIR / "user_behavior_interactions.csv"
+STORE_DIR = RAW_DIR / "user_behavior"
+STORE_MANIFEST_NAME = "manifest.json"
 MAX_RETRIES = int(os.getenv("AI_PG_RETRIES", "6"))
 RETRY_DELAY_SECONDS = int(os.getenv("AI_PG_RETRY_DELAY", "10"))
 CONNECT_TIMEOUT_SECONDS = int(os.getenv("AI_PG_CONNECT_TIMEOUT", "5"))
 BOOT_TIMEOUT_SECONDS = int(os.getenv("AI_PG_BOOT_TIMEOUT", str(max(90, MAX_RETRIES * RETRY_DELAY_SECONDS))))
+FETCH_ROWS = int(os.getenv("AI_PG_FETCH_ROWS", "50000"))
 
 QUERY = """
 SELECT
+    id AS event_id,
     "sessionId" AS session_id,
     "userId" AS user_id,
     "productId" AS product_id,
@@ -37,9 +60,12 @@ SELECT
     "occurredAt" AS occurred_at
 FROM ai_interaction_events
 WHERE "userId" IS NOT NULL
-  AND "productId" IS NOT NULL
-ORDER BY "occurredAt" ASC
+  AND "productId" IS NOT NULL{watermark_filter}
+ORDER BY "occurredAt" ASC, id ASC
 """
+WATERMARK_FILTER = """
+  AND ("occurredAt", id) > ({occurred_at}, {event_id})"""
+QUERY_COLUMNS = ["event_id", "session_id", "user_id", "product_id", "event_type", "occurred_at"]
 
 
 def build_conn_info() -> Dict[str, str]:
@@ -52,34 +78,78 @@ def build_conn_info() -> Dict[str, str]:
     }
 
 
-def export_via_psql(conn: Dict[str, str]) -> pd.DataFrame:
+def sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def build_query(watermark: Optional[Dict[str, str]], inline: bool = False) -> Tuple[str, List[str]]:
+    """SQL (and ``%s`` parameters) for events after ``watermark``; ``inline`` quotes the values into the SQL (for ``COPY``)."""
+    if not watermark:
+        return QUERY.format(watermark_filter=""), []
+    values = [watermark["occurred_at"], watermark["event_id"]]
+    if inline:
+        occurred_at, event_id = (sql_literal(value) for value in values)
+        return QUERY.format(watermark_filter=WATERMARK_FILTER.format(occurred_at=occurred_at, event_id=event_id)), []
+    return QUERY.format(watermark_filter=WATERMARK_FILTER.format(occurred_at="%s", event_id="%s")), values
+
+
+def fetch_events(cursor: Any, watermark: Optional[Dict[str, str]], chunk_rows: int = FETCH_ROWS) -> Iterator[pd.DataFrame]:
+    """Run the incremental query on a DB-API cursor and yield it ``chunk_rows`` at a time, oldest event first."""
+    query, params = build_query(watermark)
+    cursor.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return
+        yield pd.DataFrame(rows, columns=columns)
+
+
+def export_via_psql(
+    conn: Dict[str, str],
+    watermark: Optional[Dict[str, str]] = None,
+    chunk_rows: int = FETCH_ROWS,
+) -> Iterator[pd.DataFrame]:
     psql_cmd = os.getenv("PSQL_COMMAND", "psql")
     conn_str = f"host={conn['host']} port={conn['port']} user={conn['user']} dbname={conn['dbname']}"
     env = os.environ.copy()
     env["PGPASSWORD"] = conn["password"]
 
-    copy_sql = f"COPY ({QUERY}) TO STDOUT WITH CSV HEADER"
+    query, _ = build_query(watermark, inline=True)
+    copy_sql = f"COPY ({query}) TO STDOUT WITH CSV HEADER"
     try:
-        process = subprocess.run(
+        process = subprocess.Popen(
             [psql_cmd, conn_str, "-c", copy_sql],
             env=env,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            check=True,
+            encoding="utf-8",
         )
     except FileNotFoundError as exc:
         raise RuntimeError("Không tìm thấy lệnh psql. Vui lòng cài đặt PostgreSQL client.") from exc
-    except subprocess.CalledProcessError as exc:
-        raise RuntimeError(f"Không thể thực thi truy vấn Postgres: {exc.stderr}") from exc
 
-    if not process.stdout.strip():
-        return pd.DataFrame(columns=["user_id", "product_id", "event_type", "occurred_at"])
-
-    return pd.read_csv(io.StringIO(process.stdout))
+    # Parse COPY output as it arrives instead of buffering it all.
+    try:
+        try:
+            yield from pd.read_csv(process.stdout, chunksize=chunk_rows, dtype={"event_id": str})
+        except pd.errors.EmptyDataError:
+            pass
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"Không thể thực thi truy vấn Postgres: {stderr}")
 
 
-def export_via_psycopg(conn: Dict[str, str]) -> pd.DataFrame:
-    if psycopg is None or dict_row is None:
+def export_via_psycopg(
+    conn: Dict[str, str],
+    watermark: Optional[Dict[str, str]] = None,
+    chunk_rows: int = FETCH_ROWS,
+) -> Iterator[pd.DataFrame]:
+    if psycopg is None:
         raise ImportError("psycopg chưa được cài đặt.")
 
     with psycopg.connect(
@@ -89,22 +159,109 @@ def export_via_psycopg(conn: Dict[str, str]) -> pd.DataFrame:
         user=conn["user"],
         password=conn["password"],
         connect_timeout=CONNECT_TIMEOUT_SECONDS,
-        row_factory=dict_row,
     ) as connection:
-        with connection.cursor() as cursor:
-            cursor.execute(QUERY)
-            rows = cursor.fetchall()
+        # A named cursor keeps the result set on the server; rows cross the wire chunk by chunk.
+        with connection.cursor(name="ai_interaction_events_export") as cursor:
+            cursor.itersize = chunk_rows
+            yield from fetch_events(cursor, watermark, chunk_rows)
 
-    if not rows:
-        return pd.DataFrame(columns=["session_id", "user_id", "product_id", "event_type", "occurred_at"])
 
-    return pd.DataFrame(rows)
+def write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".json")
+    try:
+        with os.fdopen(tmp_fd, "w", encoding="utf-8") as fp:
+            json.dump(payload, fp, ensure_ascii=False, indent=2)
+        os.replace(tmp_name, path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+
+def load_store_manifest(store_dir: Path = STORE_DIR) -> Dict[str, Any]:
+    path = store_dir / STORE_MANIFEST_NAME
+    if not path.exists():
+        return {"watermark": None, "batches": []}
+    with path.open("r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def normalize_events(raw: pd.DataFrame) -> pd.DataFrame:
+    """Clean one fetched chunk into the store schema; rows keep extraction (``occurredAt``) order."""
+    df = raw.dropna(subset=["session_id", "user_id", "product_id", "event_type", "occurred_at"])
+    df = df.assign(
+        session_id=df["session_id"].astype(str),
+        user_id=df["user_id"].astype(str),
+        product_id=df["product_id"].astype(str),
+        timestamp=to_epoch_micros(df["occurred_at"]),
+    )
+    return df.dropna(subset=["timestamp"]).astype({"timestamp": "int64"})[list(EVENT_COLUMNS)]
+
+
+def watermark_of(raw: pd.DataFrame) -> Dict[str, str]:
+    """Watermark of the last fetched row (the query orders by ``occurredAt``, ``id``)."""
+    last = raw.iloc[-1]
+    occurred_at = pd.Timestamp(last["occurred_at"])
+    if occurred_at.tzinfo is None:
+        occurred_at = occurred_at.tz_localize("UTC")
+    return {"occurred_at": occurred_at.isoformat(), "event_id": str(last["event_id"])}
+
+
+def write_batch(
+    chunks: Iterable[pd.DataFrame],
+    store_dir: Path = STORE_DIR,
+    extracted_at: Optional[datetime] = None,
+) -> Optional[Dict[str, Any]]:
+    """Stream fetched chunks into the store as one batch and advance the watermark; ``None`` when nothing was fetched."""
+    extracted_at = extracted_at or datetime.now(timezone.utc)
+    batch = f"{extracted_at:%Y%m%dT%H%M%S%fZ}"  # sorts by extraction time
+    watermark: Optional[Dict[str, str]] = None
+    files: List[str] = []
+    rows = 0
+    event_types: Dict[str, int] = {}
+
+    try:
+        for index, raw in enumerate(chunks):
+            if raw.empty:
+                continue
+            # Rows dropped during normalization still advance the watermark.
+            watermark = watermark_of(raw)
+            events = normalize_events(raw)
+            files.extend(write_day_partitions(store_dir, events, f"part-{batch}-{index:05d}"))
+            rows += len(events)
+            for event_type, count in events["event_type"].value_counts().items():
+                event_types[event_type] = event_types.get(event_type, 0) + int(count)
+    except BaseException:
+        for name in files:
+            (store_dir / name).unlink(missing_ok=True)
+        raise
+    if watermark is None:
+        return None
+
+    # Files only become visible to readers (and the watermark only moves) once the manifest lists them.
+    record: Dict[str, Any] = {
+        "batch": batch,
+        "files": files,
+        "rows": rows,
+        "event_types": event_types,
+        "extracted_at": extracted_at.isoformat(),
+        "watermark": watermark,
+    }
+    manifest = load_store_manifest(store_dir)
+    manifest["watermark"] = watermark
+    manifest["batches"] = [*manifest.get("batches", []), record]
+    manifest["updated_at"] = extracted_at.isoformat()
+    write_json_atomic(store_dir / STORE_MANIFEST_NAME, manifest)
+    return record
 
 
 def main() -> None:
     print("🔄 Đang trích xuất data từ Postgres...")
     conn = build_conn_info()
-    df: pd.DataFrame
+    watermark = load_store_manifest().get("watermark")
+    if watermark:
+        print(f"⏩ Chỉ lấy event sau mốc {watermark['occurred_at']} (id {watermark['event_id']}).")
+    batch: Optional[Dict[str, Any]]
     last_error: Exception | None = None
 
     if psycopg is not None:
@@ -141,14 +298,14 @@ def main() -> None:
 
     for attempt in range(1, MAX_RETRIES + 1):
         try:
-            df = export_via_psycopg(conn)
+            batch = write_batch(export_via_psycopg(conn, watermark))
             print("🐘 Đã trích xuất bằng psycopg.")
             break
         except Exception as psy_error:  # noqa: BLE001
             last_error = psy_error
             print(f"⚠️  psycopg lỗi ({attempt}/{MAX_RETRIES}): {psy_error}")
             try:
-                df = export_via_psql(conn)
+                batch = write_batch(export_via_psql(conn, watermark))
                 print("📤 Đã fallback sang psql CLI.")
                 break
             except Exception as psql_error:  # noqa: BLE001
@@ -167,29 +324,13 @@ def main() -> None:
             raise last_error
         raise RuntimeError("Không thể trích xuất dữ liệu từ Postgres sau nhiều lần thử.")
 
-    if df.empty:
-        print("⚠️  Không có dữ liệu khả dụng trong ai_interaction_events")
-        OUTPUT_FILE.write_text("", encoding="utf-8")
+    if batch is None:
+        print("⚠️  Không có event mới trong ai_interaction_events")
         return
 
-    df = df.dropna(subset=["session_id", "user_id", "product_id", "event_type", "occurred_at"])
-    df["session_id"] = df["session_id"].astype(str)
-    df["user_id"] = df["user_id"].astype(str)
-    df["product_id"] = df["product_id"].astype(str)
-    timestamps = pd.to_datetime(df["occurred_at"], utc=True, errors="coerce")
-    df = df.assign(timestamp=timestamps.dt.tz_convert(None).dt.tz_localize(None))
-    df = df.drop(columns=["occurred_at"]).sort_values(by=["session_id", "timestamp"])  # type: ignore[arg-type]
-
-    df = df[["session_id", "user_id", "product_id", "timestamp", "event_type"]]
-
-    df.to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
-
-    print(f"✅ Đã tạo file {OUTPUT_FILE}")
-    print("Tổng số event:", len(df))
-    print("Số user:", df['user_id'].nunique())
-    print("Số sản phẩm:", df['product_id'].nunique())
-    print("Các loại event:", df['event_type'].value_counts(normalize=True).round(3).to_dict())
-    print(df.head(10))
+    print(f"✅ Đã ghi lô {batch['batch']} vào {STORE_DIR} ({len(batch['files'])} file, mốc mới {batch['watermark']['occurred_at']})")
+    print("Số event mới:", batch["rows"])
+    print("Các loại event:", batch["event_types"])
 
 
 if __name__ == "__main__":
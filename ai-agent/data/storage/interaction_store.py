@@ -0,0 +1,170 @@
+"""
+Typed, day-partitioned columnar store of interaction events.
+
+Each partition is a tensor file (see ``tensor_file``) holding one UTC day of
+events: ``timestamp`` as int64 epoch microseconds, ``event_type`` as int8
+codes of a categorical and the string ids (``session_id``, ``user_id``,
+``product_id``) dictionary-encoded as int32 codes plus their distinct values.
+Files live under ``<store>/day=YYYY-MM-DD/``, so readers pick days by path and
+nothing is parsed from text. Writers that need atomic batches list their
+files in a manifest and read them back with ``read_files``. Files written
+with ``index_keys`` also carry the sorted 64-bit hashes of their rows
+(``keys``), so membership of new events is a binary search over the mapped
+array instead of a re-read of the history.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .tensor_file import decode_strings, encode_strings, load_tensor_file, write_tensor_file
+
+EVENT_COLUMNS = ("session_id", "user_id", "product_id", "timestamp", "event_type")
+STRING_COLUMNS = ("session_id", "user_id", "product_id")
+PARTITION_SUFFIX = ".safetensors"
+FORMAT_VERSION = 1
+MICROS_PER_DAY = 86_400 * 10**6
+_DAY_DIR = re.compile(r"^day=(\d{4}-\d{2}-\d{2})$")
+
+
+def to_epoch_micros(values: pd.Series) -> pd.Series:
+    """Parse timestamps (strings or datetimes, naive = UTC) to int64 epoch microseconds; unparsable values become NA."""
+    parsed = pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601")
+    micros = parsed.dt.tz_convert(None).astype("datetime64[us]").astype("int64")
+    return micros.where(parsed.notna()).astype("Int64")
+
+
+def day_name(micros: int) -> str:
+    return str(np.datetime64(int(micros) // MICROS_PER_DAY, "D"))
+
+
+def _encode_column(values: pd.Series, code_dtype: type) -> Tuple[np.ndarray, np.ndarray]:
+    """Dictionary-encode ``values``; missing values get code -1 and stay out of the dictionary."""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.map(str, na_action="ignore")
+    codes, uniques = pd.factorize(values)
+    return codes.astype(code_dtype), encode_strings(np.asarray(uniques, dtype=object))
+
+
+def event_keys(events: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of each row over ``EVENT_COLUMNS``; equal values hash equally whether ids are strings or categoricals."""
+    return pd.util.hash_pandas_object(events[list(EVENT_COLUMNS)], index=False).to_numpy()
+
+
+def write_events(path: Path, events: pd.DataFrame, index_keys: bool = False) -> Path:
+    """Write ``events`` (``EVENT_COLUMNS``; ``timestamp`` in epoch microseconds) as one columnar file."""
+    arrays: Dict[str, np.ndarray] = {"timestamp": events["timestamp"].to_numpy(dtype=np.int64)}
+    for column in STRING_COLUMNS:
+        arrays[f"{column}.codes"], arrays[f"{column}.values"] = _encode_column(events[column], np.int32)
+    arrays["event_type.codes"], arrays["event_type.values"] = _encode_column(events["event_type"], np.int8)
+    if index_keys:
+        arrays["keys"] = np.sort(event_keys(events))
+    return write_tensor_file(path, arrays, {"format_version": str(FORMAT_VERSION), "rows": str(len(events))})
+
+
+def read_events(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Read one file; string columns come back as categoricals with sorted categories."""
+    return _read_paths([path], columns)
+
+
+def read_keys(path: Path) -> np.ndarray:
+    """Sorted row hashes of a file, memory-mapped when it was written with ``index_keys``."""
+    arrays, _ = load_tensor_file(path)
+    if "keys" in arrays:
+        return arrays["keys"]
+    return np.sort(event_keys(read_events(path)))
+
+
+def contains_keys(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Boolean mask of ``keys`` present in ``sorted_keys``."""
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.searchsorted(sorted_keys, keys).clip(max=len(sorted_keys) - 1)
+    return sorted_keys[positions] == keys
+
+
+def write_day_partitions(store_dir: Path, events: pd.DataFrame, name: str, index_keys: bool = False) -> List[str]:
+    """Split ``events`` by UTC day into ``day=YYYY-MM-DD/<name>`` files; returns their store-relative paths."""
+    if events.empty:
+        return []
+    days = events["timestamp"].to_numpy(dtype=np.int64) // MICROS_PER_DAY
+    written = []
+    for day in np.unique(days):
+        relative = f"day={day_name(day * MICROS_PER_DAY)}/{name}{PARTITION_SUFFIX}"
+        write_events(store_dir / relative, events[days == day], index_keys)
+        written.append(relative)
+    return written
+
+
+def partition_days(store_dir: Path) -> List[str]:
+    if not store_dir.is_dir():
+        return []
+    return sorted(
+        match.group(1)
+        for match in (_DAY_DIR.match(child.name) for child in store_dir.iterdir() if child.is_dir())
+        if match
+    )
+
+
+def iter_partitions(store_dir: Path, days: Optional[Sequence[str]] = None) -> Iterator[Path]:
+    for day in days if days is not None else partition_days(store_dir):
+        yield from sorted((store_dir / f"day={day}").glob(f"*{PARTITION_SUFFIX}"))
+
+
+def _decode_column(codes: np.ndarray, values: np.ndarray) -> pd.Categorical:
+    return pd.Categorical.from_codes(codes, categories=decode_strings(values), validate=False)
+
+
+def _read_paths(paths: Sequence[Path], columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    columns = list(columns or EVENT_COLUMNS)
+    if not paths:
+        return pd.DataFrame({column: pd.Series(dtype="int64" if column == "timestamp" else "category") for column in columns})
+    loaded = [load_tensor_file(path)[0] for path in paths]
+    data = {}
+    for column in columns:
+        if column == "timestamp":
+            data[column] = np.concatenate([arrays["timestamp"] for arrays in loaded])
+        else:
+            data[column] = union_categoricals(
+                [_decode_column(arrays[f"{column}.codes"], arrays[f"{column}.values"]) for arrays in loaded],
+                sort_categories=True,
+            )
+    return pd.DataFrame(data)
+
+
+def read_files(store_dir: Path, files: Sequence[str], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Concatenate the given store-relative files in order."""
+    return _read_paths([store_dir / name for name in files], columns)
+
+
+def read_store(
+    store_dir: Path,
+    columns: Optional[Sequence[str]] = None,
+    days: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Concatenate every partition (or only ``days``), oldest day first; string columns are categoricals."""
+    return _read_paths(list(iter_partitions(store_dir, days)), columns)
+
+
+def load_interactions(path: Path, columns: Sequence[str]) -> pd.DataFrame:
+    """
+    Interactions from a columnar store directory or a legacy CSV, with string ids
+    as ``str`` and ``timestamp`` as int64 epoch microseconds (rows without one dropped).
+    """
+    if Path(path).is_dir():
+        df = read_store(path, columns)
+        for column in df.columns:
+            if column != "timestamp":
+                df[column] = df[column].astype(str).where(df[column].notna())
+        return df
+    df = pd.read_csv(path, usecols=list(columns), dtype=str)
+    if "timestamp" in df.columns:
+        df["timestamp"] = to_epoch_micros(df["timestamp"])
+        df = df.dropna(subset=["timestamp"]).astype({"timestamp": "int64"})
+    return df
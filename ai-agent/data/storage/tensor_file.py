@@ -0,0 +1,117 @@
+"""
+Flat file of named arrays in the safetensors layout, loaded with ``mmap``.
+
+Layout: an 8-byte little-endian header length, a JSON header mapping each name
+to ``{"dtype", "shape", "data_offsets"}`` (plus an optional ``__metadata__``
+map of strings), then the raw little-endian array bytes. The header is padded
+so the data starts on a 64-byte boundary, and arrays are stored by decreasing
+item size, so every array is aligned for its dtype.
+
+Loading parses only the JSON header; arrays are views of a copy-on-write
+memory map, so nothing is copied or unpickled and untouched pages are never
+read from disk.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+DTYPES = {
+    "F64": np.dtype("<f8"),
+    "F32": np.dtype("<f4"),
+    "F16": np.dtype("<f2"),
+    "I64": np.dtype("<i8"),
+    "I32": np.dtype("<i4"),
+    "I16": np.dtype("<i2"),
+    "I8": np.dtype("i1"),
+    "U64": np.dtype("<u8"),
+    "U8": np.dtype("u1"),
+    "BOOL": np.dtype("?"),
+}
+_CODES = {dtype: code for code, dtype in DTYPES.items()}
+_ALIGNMENT = 64
+
+
+def _little_endian(dtype: np.dtype) -> np.dtype:
+    return dtype.newbyteorder("<") if dtype.byteorder == ">" else dtype
+
+
+def write_tensor_file(
+    path: Path,
+    arrays: Mapping[str, np.ndarray],
+    metadata: Optional[Mapping[str, str]] = None,
+) -> Path:
+    """Write ``arrays`` (and string ``metadata``) atomically."""
+    contiguous = {name: np.ascontiguousarray(array, dtype=_little_endian(array.dtype)) for name, array in arrays.items()}
+    header: Dict[str, object] = {}
+    if metadata:
+        header["__metadata__"] = {str(key): str(value) for key, value in metadata.items()}
+    offset = 0
+    order = sorted(contiguous, key=lambda name: (-contiguous[name].dtype.itemsize, name))
+    for name in order:
+        array = contiguous[name]
+        code = _CODES.get(array.dtype)
+        if code is None:
+            raise ValueError(f"Kiểu dữ liệu {array.dtype} của '{name}' không được hỗ trợ.")
+        header[name] = {"dtype": code, "shape": list(array.shape), "data_offsets": [offset, offset + array.nbytes]}
+        offset += array.nbytes
+
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    encoded += b" " * (-(8 + len(encoded)) % _ALIGNMENT)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    # mkstemp creates the file 0600; the service may run as another user than the writer.
+    os.fchmod(tmp_fd, 0o644)
+    try:
+        with os.fdopen(tmp_fd, "wb") as fp:
+            fp.write(struct.pack("<Q", len(encoded)))
+            fp.write(encoded)
+            for name in order:
+                contiguous[name].tofile(fp)
+        os.replace(tmp_name, path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+    return path
+
+
+def encode_strings(values: Iterable[object]) -> np.ndarray:
+    """Newline-terminated UTF-8 bytes of ``values``, storable as a ``U8`` array."""
+    strings = [str(value) for value in values]
+    if any("\n" in value for value in strings):
+        raise ValueError("Chuỗi chứa ký tự xuống dòng, không thể ghi vào tensor file.")
+    return np.frombuffer("".join(value + "\n" for value in strings).encode("utf-8"), dtype=np.uint8)
+
+
+def decode_strings(encoded: np.ndarray) -> List[str]:
+    return encoded.tobytes().decode("utf-8").split("\n")[:-1]
+
+
+def load_tensor_file(path: Path) -> Tuple[Dict[str, np.ndarray], Dict[str, str]]:
+    """Return ``(arrays, metadata)``; arrays are zero-copy views of the mapped file."""
+    with open(path, "rb") as fp:
+        (header_size,) = struct.unpack("<Q", fp.read(8))
+        header = json.loads(fp.read(header_size))
+    metadata = header.pop("__metadata__", {})
+    data_start = 8 + header_size
+    data_size = max((info["data_offsets"][1] for info in header.values()), default=0)
+    if data_size == 0:
+        data = np.empty(0, dtype=np.uint8)
+    else:
+        # Copy-on-write: callers may hand the views to torch, which expects writable buffers.
+        data = np.memmap(path, dtype=np.uint8, mode="c", offset=data_start, shape=(data_size,))
+
+    arrays: Dict[str, np.ndarray] = {}
+    for name, info in header.items():
+        start, end = info["data_offsets"]
+        arrays[name] = data[start:end].view(DTYPES[info["dtype"]]).reshape(info["shape"])
+    return arrays, metadata
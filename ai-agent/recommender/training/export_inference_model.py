@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Export TorchScript inference artifacts (fp32 and dynamic int8) next to a
+trained BERT4Rec checkpoint. Requires the serving bundle from
+``export_serving_bundle.py`` for the model hyperparameters, vocabularies and
+(when present) weights.
+
+Usage:
+  python export_inference_model.py                      # newest checkpoint in ./saved
+  python export_inference_model.py --checkpoint path/to/BERT4Rec-xxx.pth
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import torch
+from recbole.model.sequential_recommender import BERT4Rec
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from services.api.inference_backends import export_backend_artifacts  # noqa: E402
+from services.api.serving_bundle import load_serving_bundle, serving_bundle_path  # noqa: E402
+
+TRAINING_SAVED = PROJECT_ROOT / "recommender" / "training" / "saved"
+
+
+def latest_checkpoint(directory: Path) -> Path:
+    candidates = sorted(directory.glob("BERT4Rec-*.pth"), key=lambda p: p.stat().st_mtime, reverse=True)
+    if not candidates:
+        raise FileNotFoundError(f"No checkpoints found in {directory}")
+    return candidates[0]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export TorchScript inference artifacts for a checkpoint.")
+    parser.add_argument("--checkpoint", type=Path, help="Checkpoint to export for (default: newest in training/saved).")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    checkpoint = args.checkpoint or latest_checkpoint(TRAINING_SAVED)
+    bundle_path = serving_bundle_path(checkpoint)
+    if not bundle_path.exists():
+        raise FileNotFoundError(f"Serving bundle {bundle_path} not found; run export_serving_bundle.py first")
+
+    bundle = load_serving_bundle(bundle_path)
+    model = BERT4Rec(bundle.config, bundle.dataset)
+    if bundle.weights is not None:
+        model.load_state_dict({name: torch.from_numpy(array) for name, array in bundle.weights.items()})
+    else:
+        state = torch.load(checkpoint, map_location="cpu", weights_only=False)
+        model.load_state_dict(state["state_dict"] if isinstance(state, dict) and "state_dict" in state else state)
+    model.eval()
+
+    written = export_backend_artifacts(model, checkpoint, int(bundle.config["MAX_ITEM_LIST_LENGTH"]))
+    for backend, path in written.items():
+        print(f"📦 Đã xuất model {backend}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
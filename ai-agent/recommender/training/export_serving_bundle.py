@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Export the chatbot serving bundle (vocabularies, per-user sequences, model
+hyperparameters and weights) next to a trained BERT4Rec checkpoint. The
+chatbot memory-maps the weights from the bundle instead of unpickling the
+checkpoint.
+
+Usage:
+  python export_serving_bundle.py                      # newest checkpoint in ./saved
+  python export_serving_bundle.py --checkpoint path/to/BERT4Rec-xxx.pth
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import torch
+from recbole.config import Config
+from recbole.data import create_dataset, data_preparation
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from services.api.serving_bundle import export_serving_bundle, serving_bundle_path  # noqa: E402
+
+RECOMMENDER_DIR = PROJECT_ROOT / "recommender"
+TRAINING_SAVED = RECOMMENDER_DIR / "training" / "saved"
+CONFIG_FILE = RECOMMENDER_DIR / "configs" / "bert4rec.yaml"
+DATASET_DIR = RECOMMENDER_DIR / "dataset"
+
+
+def latest_checkpoint(directory: Path) -> Path:
+    candidates = sorted(directory.glob("BERT4Rec-*.pth"), key=lambda p: p.stat().st_mtime, reverse=True)
+    if not candidates:
+        raise FileNotFoundError(f"No checkpoints found in {directory}")
+    return candidates[0]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export the chatbot serving bundle for a checkpoint.")
+    parser.add_argument("--checkpoint", type=Path, help="Checkpoint to export for (default: newest in training/saved).")
+    parser.add_argument("--output", type=Path, help="Bundle path (default: next to the checkpoint).")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    checkpoint = args.checkpoint or latest_checkpoint(TRAINING_SAVED)
+    config = Config(
+        model="BERT4Rec",
+        dataset="ecommerce",
+        config_file_list=[str(CONFIG_FILE)],
+        config_dict={"data_path": str(DATASET_DIR), "device": "cpu", "use_gpu": False},
+    )
+    dataset = create_dataset(config)
+    # Mirror the service's legacy loading path so sequences keep the same ordering.
+    data_preparation(config, dataset)
+
+    state = torch.load(checkpoint, map_location="cpu", weights_only=False)
+    state_dict = state["state_dict"] if isinstance(state, dict) and "state_dict" in state else state
+    weights = {name: tensor.detach().cpu().numpy() for name, tensor in state_dict.items()}
+
+    output = export_serving_bundle(args.output or serving_bundle_path(checkpoint), config, dataset, weights)
+    print(f"📦 Đã xuất serving bundle {output} (users={dataset.user_num}, items={dataset.item_num})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
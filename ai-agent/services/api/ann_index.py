@@ -0,0 +1,121 @@
+"""
+Inverted-file (IVF) index for maximum inner product search over item embeddings.
+
+BERT4Rec scores an item as ``user · item_embedding + output_bias``. The bias is
+folded into the index by appending it to every item vector and a constant 1 to
+every query, so ranking by inner product matches the model's ranking. Items
+are clustered with k-means; a query probes the ``nprobe`` lists whose centroids
+score highest and only scores the items stored in them.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+# Like FAISS, train k-means on a sample: centroids barely move past ~64 points per list.
+KMEANS_POINTS_PER_LIST = 64
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    if len(vectors) > KMEANS_POINTS_PER_LIST * n_lists:
+        vectors = vectors[rng.choice(len(vectors), size=KMEANS_POINTS_PER_LIST * n_lists, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest_centroid(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=n_lists)
+        empty = counts == 0
+        # Re-seed empty lists from random items so every list stays in use.
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        counts[empty] = 1
+        centroids = sums / counts[:, None]
+    return centroids
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    distances = (centroids ** 2).sum(axis=1)[None, :] - 2.0 * vectors @ centroids.T
+    return distances.argmin(axis=1)
+
+
+@dataclass(frozen=True)
+class IVFIndex:
+    centroids: np.ndarray  # [n_lists, dim + 1]
+    offsets: np.ndarray  # [n_lists + 1]; list c holds rows offsets[c]:offsets[c + 1]
+    item_ids: np.ndarray  # [n] internal item ids grouped by list
+    vectors: np.ndarray  # [n, dim + 1] augmented item vectors grouped by list
+    row_lists: np.ndarray  # [n] list id of each stored row
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        bias: np.ndarray,
+        item_ids: np.ndarray,
+        *,
+        n_lists: Optional[int] = None,
+        iterations: int = 10,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Index ``embeddings[i]`` (+ ``bias[i]``) under internal id ``item_ids[i]``."""
+        vectors = np.hstack([np.asarray(embeddings, dtype=np.float32), np.asarray(bias, dtype=np.float32)[:, None]])
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        if len(vectors) == 0:
+            raise ValueError("Không có item nào để dựng chỉ mục ANN.")
+        n_lists = int(n_lists or max(1, round(np.sqrt(len(vectors)))))
+        n_lists = min(n_lists, len(vectors))
+
+        centroids = _kmeans(vectors, n_lists, iterations, seed)
+        assignment = _nearest_centroid(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=n_lists), out=offsets[1:])
+        return cls(
+            centroids=centroids.astype(np.float32),
+            offsets=offsets,
+            item_ids=item_ids[order],
+            vectors=np.ascontiguousarray(vectors[order]),
+            row_lists=assignment[order],
+        )
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.offsets) - 1
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int) -> np.ndarray:
+        """
+        Return ``[len(queries), k]`` candidate item ids (``-1`` padded) ranked by
+        approximate score, for raw user vectors of the embedding dimension.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        queries = np.hstack([queries, np.ones((len(queries), 1), dtype=np.float32)])
+        nprobe = max(1, min(nprobe, self.n_lists))
+        centroid_scores = queries @ self.centroids.T
+        if nprobe < self.n_lists:
+            probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(self.n_lists), centroid_scores.shape)
+
+        # Score the union of probed lists once for the whole batch, then hide lists a query did not probe.
+        probed = np.zeros((len(queries), self.n_lists), dtype=bool)
+        np.put_along_axis(probed, np.asarray(probes), True, axis=1)
+        rows = np.flatnonzero(probed.any(axis=0)[self.row_lists])
+        results = np.full((len(queries), k), -1, dtype=np.int64)
+        if rows.size == 0:
+            return results
+        scores = queries @ self.vectors[rows].T
+        allowed = probed[:, self.row_lists[rows]]
+        scores[~allowed] = -np.inf
+
+        count = min(k, rows.size)
+        best = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        ranked = np.take_along_axis(best, np.argsort(-best_scores, axis=1, kind="stable"), axis=1)
+        ranked_scores = np.take_along_axis(scores, ranked, axis=1)
+        results[:, :count] = np.where(np.isfinite(ranked_scores), self.item_ids[rows[ranked]], -1)
+        return results
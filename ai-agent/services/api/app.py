@@ -1,17 +1,44 @@
+import asyncio
+import hashlib
+import json
 import logging
 import os
-import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 import torch
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from torch.overrides import TorchFunctionMode
 from recbole.config import Config
 from recbole.data import create_dataset, data_preparation
 from recbole.model.sequential_recommender import BERT4Rec
 
+from .history_index import UserHistoryIndex
+from .inference_backends import AnnBackend, load_inference_backend
+from .inference_batcher import InferenceBatcher, score_sequences
+from .intent_router import Intent, IntentRouter
+from .item_lookup import ItemLookup
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry, process_memory, resident_memory_bytes
+from .popularity import build_popularity_ranking
+from .result_cache import RecommendationCache
+from .session_events import SessionEventBuffer
+from .similar_items import SIMILAR_TOP_N, SimilarItemsTable, build_similar_items
+from .serving_bundle import find_serving_bundle, load_serving_bundle, serving_bundle_path
+from .topk_table import TopKTable, load_topk_table, topk_table_path
+
+if TYPE_CHECKING:
+    from .prefork import ReloadChannel
+
 BASE_DIR = Path(__file__).resolve().parents[2]
 RECOMMENDER_DIR = BASE_DIR / "recommender"
 DEFAULT_MODEL_DIR = RECOMMENDER_DIR / "saved"
@@ -21,10 +48,39 @@ FALLBACK_MODEL_DIRS = [
 CONFIG_FILE = RECOMMENDER_DIR / "configs" / "bert4rec.yaml"
 DATA_DIR = RECOMMENDER_DIR / "dataset"
 RAW_DATA_DIR = BASE_DIR / "data" / "raw"
+INTENTS_FILE = Path(os.environ.get("CHATBOT_INTENTS_FILE") or Path(__file__).with_name("intents.json"))
 
 DEFAULT_MODEL_PATTERN = "BERT4Rec-*.pth"
+# Layout written by tasks/retrain.py inside a model directory.
+PUBLISHED_MANIFEST = "latest_model.json"
+PUBLISHED_LINK = "current.pth"
+PUBLISHED_VERSIONS_DIR = "versions"
+DATASET_MANIFEST = "latest_manifest.json"
 DEFAULT_TOPK = int(os.environ.get("CHATBOT_TOPK", "5"))
 RELOAD_TOKEN = os.environ.get("CHATBOT_RELOAD_TOKEN")
+INFERENCE_BACKEND = os.environ.get("CHATBOT_INFERENCE_BACKEND", "eager").lower()
+# "full" scores every item; "ann" retrieves candidates from an IVF index over item embeddings first.
+RETRIEVAL_MODE = os.environ.get("CHATBOT_RETRIEVAL", "full").lower()
+ANN_CANDIDATES = int(os.environ.get("CHATBOT_ANN_CANDIDATES", "200"))
+ANN_NPROBE = int(os.environ.get("CHATBOT_ANN_NPROBE", "8"))
+ANN_LISTS = int(os.environ.get("CHATBOT_ANN_LISTS", "0"))
+USE_SERVING_BUNDLE = os.environ.get("CHATBOT_USE_SERVING_BUNDLE", "1").lower() not in {"0", "false", "no"}
+USE_TOPK_TABLE = os.environ.get("CHATBOT_USE_TOPK_TABLE", "1").lower() not in {"0", "false", "no"}
+# Precomputed tables are always scored with exact full-sort; tables from any other backend are refused.
+TOPK_TABLE_BACKEND = "eager"
+BATCH_MAX_SIZE = int(os.environ.get("CHATBOT_BATCH_MAX_SIZE", "16"))
+BATCH_WINDOW_MS = float(os.environ.get("CHATBOT_BATCH_WINDOW_MS", "3"))
+INFERENCE_WORKERS = int(os.environ.get("CHATBOT_INFERENCE_WORKERS", str(BATCH_MAX_SIZE)))
+INFERENCE_MAX_INFLIGHT = int(os.environ.get("CHATBOT_INFERENCE_MAX_INFLIGHT", str(INFERENCE_WORKERS * 4)))
+CACHE_MAX_ENTRIES = int(os.environ.get("CHATBOT_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.environ.get("CHATBOT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.environ.get("CHATBOT_CACHE_TTL_SECONDS", "300"))
+BULK_BATCH_SIZE = int(os.environ.get("CHATBOT_BULK_BATCH_SIZE", "64"))
+BULK_MAX_USERS = int(os.environ.get("CHATBOT_BULK_MAX_USERS", "10000"))
+EVENTS_MAX_BATCH = int(os.environ.get("CHATBOT_EVENTS_MAX_BATCH", "1000"))
+SESSION_MAX_EVENTS = int(os.environ.get("CHATBOT_SESSION_MAX_EVENTS", "50"))
+SESSION_MAX_USERS = int(os.environ.get("CHATBOT_SESSION_MAX_USERS", "100000"))
+SESSION_TTL_SECONDS = float(os.environ.get("CHATBOT_SESSION_TTL_SECONDS", "1800"))
 
 
 class RecommendationItem(BaseModel):
@@ -45,6 +101,28 @@ class ChatResponse(BaseModel):
     model_ready: bool = True
 
 
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[str]
+    top_k: Optional[int] = None
+    # Users scored per forward pass; defaults to CHATBOT_BULK_BATCH_SIZE.
+    batch_size: Optional[int] = None
+
+
+class SimilarItemsResponse(BaseModel):
+    item_id: int
+    similar: List[RecommendationItem]
+
+
+class InteractionEvent(BaseModel):
+    user_id: str
+    item_id: str
+
+
+class InteractionEventBatch(BaseModel):
+    token: Optional[str] = None
+    events: List[InteractionEvent]
+
+
 app = FastAPI(title="Second-hand Chatbot Service")
 logger = logging.getLogger("ai_agent.service")
 
@@ -52,13 +130,150 @@ if not logging.getLogger().handlers:
     logging.basicConfig(level=logging.INFO)
 
 ARTIFACTS: Dict[str, object] = {}
+INTENT_ROUTER = IntentRouter.load(INTENTS_FILE)
+METRICS = MetricsRegistry()
+CHAT_REQUESTS = METRICS.counter("chatbot_requests_total", "Chat requests by detected intent.", ["intent"])
+CHAT_LATENCY = METRICS.histogram("chatbot_request_duration_seconds", "End-to-end /chat latency by intent.", ["intent"])
+RECOMMENDATION_SOURCES = METRICS.counter(
+    "chatbot_recommendations_total",
+    "Recommendation answers by source (model, cache, precomputed, popular, busy).",
+    ["source"],
+)
+STAGE_LATENCY = METRICS.histogram(
+    "chatbot_stage_duration_seconds",
+    "Recommendation latency by stage (history_lookup, tensor_build, forward, topk, postprocess).",
+    ["stage"],
+)
+LOCK_WAIT = METRICS.histogram("chatbot_inference_lock_wait_seconds", "Wait for TORCH_INFERENCE_LOCK before a forward pass.")
+MODEL_RELOADS = METRICS.counter("chatbot_model_reloads_total", "Reload jobs by outcome.", ["result"])
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    if stage == "lock_wait":
+        LOCK_WAIT.observe(seconds)
+    else:
+        STAGE_LATENCY.observe(seconds, stage)
+
+
+def new_inference_batcher(lock) -> InferenceBatcher:
+    return InferenceBatcher(
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_WINDOW_MS,
+        lock=lock,
+        observer=observe_stage,
+    )
+
+
 TORCH_INFERENCE_LOCK = torch.multiprocessing.Lock()
+INFERENCE_BATCHER = new_inference_batcher(TORCH_INFERENCE_LOCK)
+INFERENCE_EXECUTOR = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="chatbot-inference")
+INFERENCE_SLOTS = threading.BoundedSemaphore(INFERENCE_MAX_INFLIGHT)
+INFERENCE_ADMISSION = {"inflight": 0, "rejected": 0}
+RECOMMENDATION_CACHE = RecommendationCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    size_of=lambda items: sum(128 + len(item.item_name.encode("utf-8")) for item in items),
+)
+PRECOMPUTED_STATS = {"hits": 0, "fallbacks": 0}
+SESSION_EVENTS = SessionEventBuffer(
+    max_events_per_user=SESSION_MAX_EVENTS,
+    max_users=SESSION_MAX_USERS,
+    ttl_seconds=SESSION_TTL_SECONDS,
+)
+RELOAD_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chatbot-reload")
+RELOAD_JOBS: "OrderedDict[str, ReloadJob]" = OrderedDict()
+RELOAD_JOBS_LOCK = threading.Lock()
+RELOAD_JOBS_KEEP = 20
+# Set in pre-fork workers (services/api/prefork.py): reloads then run in the supervisor process.
+RELOAD_DELEGATE: Optional["ReloadChannel"] = None
 MODEL_READY = False
 MODEL_STATUS = "initializing"
 
 
+def model_ready_samples():
+    yield (), float(MODEL_READY)
+
+
+def model_info_samples():
+    loaded = ARTIFACTS
+    if loaded:
+        yield (str(loaded.get("model_version")), str(loaded.get("inference_backend"))), 1.0
+
+
+def model_load_samples():
+    loaded = ARTIFACTS
+    if loaded and "load_seconds" in loaded:
+        yield (), float(loaded["load_seconds"])  # type: ignore[arg-type]
+
+
+METRICS.gauge("chatbot_model_ready", "1 when a model is loaded and serving.", callback=model_ready_samples)
+METRICS.gauge("chatbot_model_info", "Version and backend of the serving model.", ["version", "backend"], callback=model_info_samples)
+METRICS.gauge("chatbot_model_load_duration_seconds", "Artifact load time of the serving model.", callback=model_load_samples)
+METRICS.gauge(
+    "process_resident_memory_bytes",
+    "Resident memory of the service process.",
+    callback=lambda: [((), resident_memory_bytes())],
+)
+METRICS.gauge(
+    "process_proportional_memory_bytes",
+    "PSS of the service process: shared pages split between the processes mapping them.",
+    callback=lambda: [((), float(process_memory().get("pss", 0)))],
+)
+
+
 class ReloadRequest(BaseModel):
     token: Optional[str] = None
+    # Skip the reload when this checkpoint version is already being served; fail it when the
+    # published checkpoint is a different version.
+    expected_version: Optional[str] = None
+    force: bool = False
+
+
+@dataclass
+class ReloadJob:
+    job_id: str
+    status: str = "queued"
+    expected_version: Optional[str] = None
+    force: bool = False
+    requested_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    checkpoint: Optional[str] = None
+    version: Optional[str] = None
+    users: Optional[int] = None
+    items: Optional[int] = None
+    error: Optional[str] = None
+
+
+def read_manifest(path: Path) -> Dict[str, object]:
+    """A JSON manifest written by the retrain pipeline; empty when missing or unreadable."""
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        logger.warning("Không đọc được %s, bỏ qua.", path)
+        return {}
+
+
+def published_checkpoint(directory: Path) -> Optional[Path]:
+    """The checkpoint ``tasks/retrain.py`` published in ``directory``: ``latest_model.json`` first, then ``current.pth``."""
+    manifest = read_manifest(directory / PUBLISHED_MANIFEST)
+    if manifest:
+        # "file" is absolute on the publishing host; the version names the file inside this directory.
+        candidates = []
+        if manifest.get("version"):
+            candidates.append(directory / PUBLISHED_VERSIONS_DIR / f"BERT4Rec-{manifest['version']}.pth")
+        if manifest.get("file"):
+            candidates.append(Path(manifest["file"]))
+        for candidate in candidates:
+            if candidate.exists():
+                return candidate
+    link = directory / PUBLISHED_LINK
+    if link.exists():
+        return link.resolve()
+    return None
 
 
 def resolve_checkpoint() -> Path:
@@ -76,6 +291,11 @@ def resolve_checkpoint() -> Path:
     search_dirs.append(DEFAULT_MODEL_DIR)
     search_dirs.extend(FALLBACK_MODEL_DIRS)
 
+    for directory in search_dirs:
+        published = published_checkpoint(directory)
+        if published is not None:
+            return published
+
     candidates: List[Path] = []
     for directory in search_dirs:
         if not directory.exists():
@@ -94,6 +314,19 @@ def resolve_checkpoint() -> Path:
     return candidates[0]
 
 
+def checkpoint_version(checkpoint_path: Path) -> str:
+    # Same format as the "version" field of recommender/saved/latest_model.json.
+    return Path(checkpoint_path).resolve().stem.replace("BERT4Rec-", "", 1)
+
+
+def checkpoint_sha256(checkpoint_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(checkpoint_path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def load_product_map() -> Dict[str, str]:
     possible_files = [
         DATA_DIR / "test" / "products.csv",
@@ -131,15 +364,84 @@ def build_config() -> Config:
     return config
 
 
-def load_artifacts():
-    checkpoint_path = resolve_checkpoint()
-    product_map = load_product_map()
-    config = build_config()
+def build_history_index(dataset) -> UserHistoryIndex:
+    inter_feat = dataset.inter_feat
+    time_field = dataset.time_field
+    timestamps = None
+    if time_field and time_field in inter_feat:
+        timestamps = inter_feat[time_field].numpy()
+    return UserHistoryIndex.build(
+        inter_feat[dataset.uid_field].numpy(),
+        inter_feat[dataset.iid_field].numpy(),
+        timestamps=timestamps,
+        user_num=dataset.user_num,
+    )
+
+
+def interactions_source() -> Path:
+    """Columnar interaction history when prepared, else the legacy CSV it is seeded from."""
+    store_dir = RAW_DATA_DIR / "interactions"
+    return store_dir if store_dir.is_dir() else RAW_DATA_DIR / "interactions.csv"
+
+
+def build_popular_items(
+    dataset,
+    history_index: UserHistoryIndex,
+    product_map: Dict[str, str],
+) -> List[RecommendationItem]:
+    ranking = build_popularity_ranking(
+        interactions_source(),
+        history_index.items,
+        dataset.field2id_token[dataset.iid_field],
+    )
+    return [
+        RecommendationItem(item_id=item_id, item_name=product_map.get(str(item_id), f"Sản phẩm {item_id}"))
+        for item_id, _ in ranking
+    ]
+
+
+def load_topk_table_for(checkpoint_path: Path, digest: str) -> Optional[TopKTable]:
+    path = topk_table_path(checkpoint_path)
+    if not USE_TOPK_TABLE or not path.exists():
+        return None
+    table = load_topk_table(path)
+    if table.meta.get("checkpoint_sha256") != digest:
+        logger.warning("Bảng top-K %s không khớp checkpoint, bỏ qua.", path)
+        return None
+    if table.meta.get("inference_backend") != TOPK_TABLE_BACKEND:
+        # Tables scored by an approximate backend (int8, ANN) would be served as if exact.
+        logger.warning(
+            "Bảng top-K %s được tính bằng backend %s, không phải %s, bỏ qua.",
+            path,
+            table.meta.get("inference_backend"),
+            TOPK_TABLE_BACKEND,
+        )
+        return None
+    return table
+
+
+class _SkipInit(TorchFunctionMode):
+    """Turn weight initialisers into no-ops; on the meta device they would otherwise import torch._dynamo (~2 s)."""
 
-    dataset = create_dataset(config)
-    train_data, _, _ = data_preparation(config, dataset)
+    _TENSOR_INITS = {torch.Tensor.normal_, torch.Tensor.uniform_, torch.Tensor.zero_, torch.Tensor.fill_}
 
-    model = BERT4Rec(config, train_data.dataset).to(config["device"])
+    def __torch_function__(self, func, types, args=(), kwargs=None):
+        kwargs = kwargs or {}
+        if func in self._TENSOR_INITS or getattr(func, "__module__", None) == "torch.nn.init":
+            return args[0] if args else kwargs["tensor"]
+        return func(*args, **kwargs)
+
+
+def load_model(config, dataset, checkpoint_path: Path, weights: Optional[Dict[str, np.ndarray]] = None) -> BERT4Rec:
+    """BERT4Rec with the checkpoint weights; bundle ``weights`` are used in place instead of unpickling the checkpoint."""
+    if weights is not None:
+        # Parameters start on the meta device (no allocation or init) and become views of the mapped bundle.
+        with torch.device("meta"), _SkipInit():
+            model = BERT4Rec(config, dataset)
+        model.load_state_dict({name: torch.from_numpy(array) for name, array in weights.items()}, assign=True)
+        return model.eval()
+
+    model = BERT4Rec(config, dataset).to(config["device"])
     try:
         checkpoint = torch.load(
             checkpoint_path,
@@ -154,33 +456,275 @@ def load_artifacts():
         )
     state_dict = checkpoint["state_dict"] if isinstance(checkpoint, dict) and "state_dict" in checkpoint else checkpoint
     model.load_state_dict(state_dict)
-    model.eval()
+    return model.eval()
+
+
+def load_artifacts(
+    checkpoint_path: Optional[Path] = None,
+    backend: Optional[str] = None,
+    retrieval: Optional[str] = None,
+    serving: bool = True,
+):
+    """
+    Model, vocabularies and lookup structures for ``checkpoint_path``.
+
+    ``backend``/``retrieval`` override ``CHATBOT_INFERENCE_BACKEND``/``CHATBOT_RETRIEVAL``;
+    ``serving=False`` skips the popularity, similar-items, ANN and top-K table
+    structures that only the HTTP endpoints use.
+    """
+    backend = backend or INFERENCE_BACKEND
+    retrieval = retrieval or RETRIEVAL_MODE
+    started = time.perf_counter()
+    checkpoint_path = Path(checkpoint_path) if checkpoint_path else resolve_checkpoint()
+    product_map = load_product_map()
+    bundle_path = find_serving_bundle(checkpoint_path) if USE_SERVING_BUNDLE else None
+    use_bundle = bundle_path is not None
+
+    if use_bundle:
+        # Fast path: vocabularies and sequences come from the exported bundle, no RecBole dataset build.
+        bundle = load_serving_bundle(bundle_path)
+        config = bundle.config
+        dataset = bundle.dataset
+        history_index = bundle.history_index
+        model = load_model(config, dataset, checkpoint_path, bundle.weights)
+    else:
+        logger.info("Serving bundle %s not found, building RecBole dataset", serving_bundle_path(checkpoint_path))
+        config = build_config()
+        dataset = create_dataset(config)
+        train_data, _, _ = data_preparation(config, dataset)
+        history_index = build_history_index(dataset)
+        model = load_model(config, train_data.dataset, checkpoint_path)
+
+    scorer = load_inference_backend(
+        backend,
+        model,
+        checkpoint_path,
+        max_len=int(config["MAX_ITEM_LIST_LENGTH"]),
+    )
 
     uid_field = dataset.uid_field
     iid_field = dataset.iid_field
+    digest = checkpoint_sha256(checkpoint_path)
+    item_lookup = ItemLookup.build(dataset.field2id_token[iid_field], product_map)
+    popular: List[RecommendationItem] = []
+    similar_items = None
+    topk_table = None
+    if serving:
+        popular = build_popular_items(dataset, history_index, product_map)
+        similar_items = build_similar_items(
+            model.item_embedding.weight[: model.n_items].detach().numpy(),
+            ~item_lookup.invalid_mask.numpy(),
+            interactions_source(),
+            dataset.field2token_id[iid_field],
+        )
+        if retrieval == "ann":
+            if backend != "eager":
+                # ANN retrieval encodes users with the eager model; the configured backend is not used.
+                logger.warning(
+                    "CHATBOT_RETRIEVAL=ann thay thế backend suy luận %s bằng encoder eager + ANN.",
+                    backend,
+                )
+            scorer = AnnBackend.build(
+                model,
+                np.flatnonzero(~item_lookup.invalid_mask.numpy()),
+                n_candidates=ANN_CANDIDATES,
+                nprobe=ANN_NPROBE,
+                n_lists=ANN_LISTS or None,
+            )
+        topk_table = load_topk_table_for(checkpoint_path, digest)
 
     return {
         "model": model,
+        "scorer": scorer,
+        "inference_backend": scorer.name if serving and retrieval == "ann" else backend,
+        "model_version": checkpoint_version(checkpoint_path),
+        "checkpoint_sha256": digest,
         "config": config,
         "dataset": dataset,
         "uid_field": uid_field,
         "iid_field": iid_field,
+        "history_index": history_index,
+        "popular_items": popular,
+        "item_lookup": item_lookup,
+        "similar_items": similar_items,
         "product_map": product_map,
         "checkpoint_path": checkpoint_path,
+        "serving_bundle": bundle_path,
+        "topk_table": topk_table,
+        "load_seconds": round(time.perf_counter() - started, 3),
     }
 
 
-def refresh_artifacts() -> Dict[str, object]:
+def warm_up_artifacts(artifacts: Dict[str, object]) -> None:
+    """Run one dummy forward pass so the first real request does not pay lazy-init costs."""
+    scorer = artifacts["scorer"]
+    history_index: UserHistoryIndex = artifacts["history_index"]  # type: ignore[assignment]
+    max_len = int(artifacts["config"]["MAX_ITEM_LIST_LENGTH"])  # type: ignore[index]
+    non_empty = (history_index.offsets[1:] - history_index.offsets[:-1]).nonzero()[0]
+    seq = history_index.recent(int(non_empty[0]), max_len).tolist() if non_empty.size else [1]
+    with torch.no_grad():
+        scorer.full_sort_predict(
+            {
+                "item_id_list": torch.tensor([seq], device=scorer.device),
+                "item_length": torch.tensor([len(seq)], device=scorer.device),
+            },
+        )
+
+
+def activate_artifacts(artifacts: Dict[str, object]) -> None:
+    """Swap in a fully built artifact set; in-flight requests keep their own snapshot."""
     global ARTIFACTS, MODEL_READY, MODEL_STATUS
-    with TORCH_INFERENCE_LOCK:
-        artifacts = load_artifacts()
-        ARTIFACTS = artifacts
-        MODEL_READY = True
-        MODEL_STATUS = f"model_loaded:{artifacts.get('checkpoint_path')}"
-    logger.info("Reloaded chatbot model from %s", ARTIFACTS.get("checkpoint_path"))
+    ARTIFACTS = artifacts
+    MODEL_READY = True
+    MODEL_STATUS = f"model_loaded:{artifacts.get('checkpoint_path')}"
+    RECOMMENDATION_CACHE.clear()
+    discard_absorbed_events(artifacts)
+
+
+def snapshot_watermark(checkpoint_path: Path) -> Optional[float]:
+    """
+    Epoch seconds of the last event extracted into the dataset ``checkpoint_path`` was trained on.
+
+    Read from the ``source_watermark`` that ``tasks/retrain.py`` records in
+    ``latest_model.json``; for checkpoints published without it, from the
+    current dataset manifest when that dataset predates the checkpoint.
+    """
+    checkpoint_path = Path(checkpoint_path).resolve()
+    version = checkpoint_version(checkpoint_path)
+    watermark = None
+    for directory in (checkpoint_path.parent.parent, checkpoint_path.parent):
+        manifest = read_manifest(directory / PUBLISHED_MANIFEST)
+        if manifest.get("version") == version and manifest.get("source_watermark"):
+            watermark = manifest["source_watermark"]
+            break
+    else:
+        dataset = read_manifest(DATA_DIR / DATASET_MANIFEST)
+        generated_at = dataset.get("generated_at")
+        if generated_at and pd.Timestamp(generated_at).timestamp() <= checkpoint_path.stat().st_mtime:
+            watermark = dataset.get("source_watermark")
+    if not isinstance(watermark, dict) or not watermark.get("occurred_at"):
+        return None
+    return pd.Timestamp(watermark["occurred_at"]).timestamp()
+
+
+def discard_absorbed_events(artifacts: Dict[str, object]) -> None:
+    """
+    Drop live events the new snapshot already contains.
+
+    Events that arrived before the snapshot's extraction watermark would be
+    appended twice and bypass the fresh top-K table. Later ones, received while
+    the model trained, stay until a snapshot includes them. Without a known
+    watermark the buffer is left as is.
+    """
+    checkpoint_path = artifacts.get("checkpoint_path")
+    try:
+        cutoff = snapshot_watermark(checkpoint_path)  # type: ignore[arg-type]
+    except (TypeError, OSError, ValueError):
+        cutoff = None
+    if cutoff is None:
+        return
+    discarded = SESSION_EVENTS.discard_before(cutoff)
+    if discarded:
+        logger.info("Dropped %s session events already in the snapshot of %s", discarded, checkpoint_path)
+
+
+def refresh_artifacts(checkpoint_path: Optional[Path] = None) -> Dict[str, object]:
+    # Build and warm up the new set without holding TORCH_INFERENCE_LOCK so serving never stalls.
+    artifacts = load_artifacts(checkpoint_path)
+    warm_up_artifacts(artifacts)
+    activate_artifacts(artifacts)
+    logger.info("Reloaded chatbot model from %s", artifacts.get("checkpoint_path"))
     return artifacts
 
 
+def run_reload_job(job: ReloadJob, refresh: Callable[[Path], Dict[str, object]] = refresh_artifacts) -> None:
+    job.status = "running"
+    job.started_at = time.time()
+    try:
+        checkpoint_path = resolve_checkpoint()
+        version = checkpoint_version(checkpoint_path)
+        if job.expected_version and version != job.expected_version:
+            # A newer (or different) checkpoint was published meanwhile; its own reload request loads it.
+            job.status = "failed"
+            job.checkpoint = str(checkpoint_path)
+            job.version = version
+            job.error = f"Checkpoint hiện tại là {version}, không phải {job.expected_version} như yêu cầu."
+            logger.warning("Bỏ reload: %s", job.error)
+            return
+        if not job.force:
+            # Hashing the checkpoint is far cheaper than rebuilding artifacts for an unchanged file.
+            loaded = ARTIFACTS
+            if loaded and loaded.get("checkpoint_sha256") == checkpoint_sha256(checkpoint_path):
+                job.status = "skipped"
+                job.checkpoint = str(checkpoint_path)
+                job.version = str(loaded.get("model_version"))
+                logger.info("Checkpoint %s không đổi, bỏ qua reload.", checkpoint_path)
+                return
+        # Load exactly the checkpoint that was checked, even if a newer one appears meanwhile.
+        artifacts = refresh(checkpoint_path)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Reload chatbot thất bại")
+        job.status = "failed"
+        job.error = str(exc)
+    else:
+        dataset = artifacts.get("dataset")
+        job.status = "succeeded"
+        job.checkpoint = str(artifacts.get("checkpoint_path"))
+        job.version = str(artifacts.get("model_version"))
+        job.users = getattr(dataset, "user_num", None)
+        job.items = getattr(dataset, "item_num", None)
+    finally:
+        job.finished_at = time.time()
+        MODEL_RELOADS.inc(job.status)
+
+
+def schedule_reload(expected_version: Optional[str] = None, force: bool = False) -> ReloadJob:
+    """
+    Queue a background reload, coalescing with an identical one that has not started yet.
+
+    Under ``RELOAD_DELEGATE`` every request is handed to the supervisor, which
+    coalesces queued jobs itself; only it knows when a job has left the queue.
+    """
+    job = ReloadJob(
+        job_id=uuid.uuid4().hex,
+        requested_at=time.time(),
+        expected_version=expected_version,
+        force=force,
+    )
+    if RELOAD_DELEGATE is not None:
+        RELOAD_DELEGATE.submit(job)
+        return job
+    with RELOAD_JOBS_LOCK:
+        pending = next(
+            (
+                queued
+                for queued in RELOAD_JOBS.values()
+                if queued.status == "queued" and queued.force == force and queued.expected_version == expected_version
+            ),
+            None,
+        )
+        if pending is not None:
+            return pending
+        remember_reload_job(job)
+    RELOAD_EXECUTOR.submit(run_reload_job, job)
+    return job
+
+
+def remember_reload_job(job: ReloadJob) -> None:
+    # Caller holds RELOAD_JOBS_LOCK.
+    RELOAD_JOBS[job.job_id] = job
+    while len(RELOAD_JOBS) > RELOAD_JOBS_KEEP:
+        RELOAD_JOBS.popitem(last=False)
+
+
+def reset_after_fork() -> None:
+    """Give a forked worker its own inference lock and batcher; the inherited lock is shared across processes."""
+    global TORCH_INFERENCE_LOCK, INFERENCE_BATCHER
+    # Only this worker's threads contend for it, so a thread lock is enough (and leaves no semaphore behind).
+    TORCH_INFERENCE_LOCK = threading.Lock()
+    INFERENCE_BATCHER = new_inference_batcher(TORCH_INFERENCE_LOCK)
+
+
 @app.on_event("startup")
 def startup_event():
     global ARTIFACTS, MODEL_READY, MODEL_STATUS
@@ -188,10 +732,9 @@ def startup_event():
         return
 
     torch.set_num_threads(int(os.environ.get("CHATBOT_TORCH_THREADS", "1")))
+    INFERENCE_BATCHER.start()
     try:
-        ARTIFACTS = load_artifacts()
-        MODEL_READY = True
-        MODEL_STATUS = f"model_loaded:{ARTIFACTS.get('checkpoint_path')}"
+        activate_artifacts(load_artifacts())
         logger.info("Loaded chatbot model from %s", ARTIFACTS.get("checkpoint_path"))
     except FileNotFoundError as exc:
         MODEL_READY = False
@@ -205,167 +748,316 @@ def startup_event():
         logger.exception("Failed to load chatbot model")
 
 
-@app.post("/internal/reload")
+@app.post("/internal/reload", status_code=202)
 def reload_endpoint(request: ReloadRequest):
     if RELOAD_TOKEN and request.token != RELOAD_TOKEN:
         raise HTTPException(status_code=403, detail="Token không hợp lệ.")
-    try:
-        artifacts = refresh_artifacts()
-    except FileNotFoundError as exc:
-        raise HTTPException(status_code=503, detail=str(exc)) from exc
-    except Exception as exc:  # noqa: BLE001
-        logger.exception("Reload chatbot thất bại")
-        raise HTTPException(status_code=500, detail=f"Không thể reload: {exc}") from exc
-
-    checkpoint = artifacts.get("checkpoint_path")
-    dataset = artifacts.get("dataset")
-    users = getattr(dataset, "user_num", None)
-    items = getattr(dataset, "item_num", None)
-    return {
-        "status": "ok",
-        "checkpoint": str(checkpoint) if checkpoint else None,
-        "users": users,
-        "items": items,
-    }
-
-
-def simple_reply(message: str) -> str:
-    normalized = message.lower()
-    presets = {
-        "giao": "Đơn hàng của bạn thường được giao trong 1-3 ngày làm việc tùy khu vực.",
-        "ship": "Phí vận chuyển miễn phí với đơn từ 2 triệu. Đơn nhỏ hơn có phí 50.000đ.",
-        "bảo": "Mọi sản phẩm đều được bảo hành tối thiểu 3 tháng. Chi tiết vui lòng cung cấp mã đơn.",
-        "order": "Bạn có thể theo dõi đơn tại trang Tài khoản > Đơn hàng hoặc cung cấp mã đơn để được hỗ trợ nhanh.",
-        "thanh": "Hệ thống hiện hỗ trợ thanh toán tiền mặt, chuyển khoản và COD. Chọn phương thức tại bước đặt hàng nhé!",
-    }
-
-    for keyword, reply in presets.items():
-        if keyword in normalized:
-            return reply
-    return "Cảm ơn bạn! Nhân viên sẽ liên hệ trong ít phút. Bạn có thể để lại số điện thoại hoặc mô tả chi tiết hơn nhé."
-
-
-def looks_like_recommendation_request(message: str) -> bool:
-    normalized = message.lower()
-    keywords = ["gợi ý", "goi y", "recommend", "gợi ý sản phẩm", "suggest"]
-    return any(keyword in normalized for keyword in keywords)
-
-
-def extract_user_id_from_message(message: str) -> Optional[str]:
-    match = re.search(r"user\s*(\w+)", message.lower())
-    if match:
-        return match.group(1)
-    digits = re.findall(r"\d+", message)
-    if digits:
-        return digits[0]
-    return None
-
-
-def recommend_for_user(user_token: str, topk: int) -> List[RecommendationItem]:
-    if not MODEL_READY or not ARTIFACTS:
+    loaded = ARTIFACTS
+    if (
+        not request.force
+        and request.expected_version
+        and loaded
+        and loaded.get("model_version") == request.expected_version
+    ):
+        now = time.time()
+        job = ReloadJob(
+            job_id=uuid.uuid4().hex,
+            status="skipped",
+            expected_version=request.expected_version,
+            requested_at=now,
+            finished_at=now,
+            checkpoint=str(loaded.get("checkpoint_path")),
+            version=request.expected_version,
+        )
+        with RELOAD_JOBS_LOCK:
+            remember_reload_job(job)
+        MODEL_RELOADS.inc(job.status)
+        return asdict(job)
+    job = schedule_reload(expected_version=request.expected_version, force=request.force)
+    return asdict(job)
+
+
+@app.get("/internal/reload/{job_id}")
+def reload_status(job_id: str):
+    # A delegated job is updated by the supervisor, not in this worker's RELOAD_JOBS.
+    job = RELOAD_DELEGATE.lookup(job_id) if RELOAD_DELEGATE is not None else None
+    job = job or RELOAD_JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy reload job.")
+    return asdict(job)
+
+
+def recommendation_cache_key(artifacts: Dict[str, object], user_token: str, topk: int) -> tuple:
+    # The session revision changes with every live event, so new clicks never hit a stale entry.
+    session_revision, _ = SESSION_EVENTS.snapshot(str(user_token))
+    return (artifacts.get("checkpoint_sha256"), str(user_token), topk, session_revision)
+
+
+def current_artifacts() -> Dict[str, object]:
+    # Read the global once: a reload swaps the whole dict, so a request keeps one consistent set.
+    artifacts = ARTIFACTS
+    if not MODEL_READY or not artifacts:
         raise RuntimeError("Hệ thống gợi ý chưa sẵn sàng.")
+    return artifacts
 
-    model: BERT4Rec = ARTIFACTS["model"]  # type: ignore[assignment]
-    config: Config = ARTIFACTS["config"]  # type: ignore[assignment]
-    dataset = ARTIFACTS["dataset"]  # type: ignore[assignment]
-    uid_field = ARTIFACTS["uid_field"]  # type: ignore[assignment]
-    iid_field = ARTIFACTS["iid_field"]  # type: ignore[assignment]
-    product_map: Dict[str, str] = ARTIFACTS["product_map"]  # type: ignore[assignment]
 
+def recommend_for_user(user_token: str, topk: int) -> List[RecommendationItem]:
+    artifacts = current_artifacts()
+    precomputed = precomputed_recommendations(artifacts, user_token, topk)
+    if precomputed is not None:
+        return precomputed
+    cached = RECOMMENDATION_CACHE.get(recommendation_cache_key(artifacts, user_token, topk))
+    if cached is not None:
+        return cached
+    return compute_and_cache_recommendations(artifacts, user_token, topk)
+
+
+def resolve_user(artifacts: Dict[str, object], user_token: str) -> int:
+    dataset = artifacts["dataset"]  # type: ignore[assignment]
+    uid_field = artifacts["uid_field"]  # type: ignore[assignment]
     try:
-        uid_internal = dataset.token2id(uid_field, [str(user_token)])[0]
-    except KeyError as exc:
+        return int(dataset.token2id(uid_field, [str(user_token)])[0])
+    except (KeyError, ValueError) as exc:
         raise ValueError(f"Không tìm thấy dữ liệu cho người dùng {user_token}.") from exc
 
-    user_mask = dataset.inter_feat[uid_field] == uid_internal
-    interacted_items = dataset.inter_feat[user_mask][iid_field].tolist()
-    if not interacted_items:
-        raise ValueError("Chưa có lịch sử để gợi ý sản phẩm.")
+
+def precomputed_recommendations(
+    artifacts: Dict[str, object],
+    user_token: str,
+    topk: int,
+) -> Optional[List[RecommendationItem]]:
+    """
+    Serve from the offline top-K table when it covers ``topk`` and the user's
+    history is unchanged since the table was built; None means run the model.
+    """
+    table: Optional[TopKTable] = artifacts.get("topk_table")  # type: ignore[assignment]
+    if table is None:
+        return None
+    if SESSION_EVENTS.snapshot(str(user_token))[0]:
+        # Live events arrived after the snapshot the table was built from.
+        PRECOMPUTED_STATS["fallbacks"] += 1
+        return None
+    history_index: UserHistoryIndex = artifacts["history_index"]  # type: ignore[assignment]
+    item_lookup: ItemLookup = artifacts["item_lookup"]  # type: ignore[assignment]
+    try:
+        uid_internal = resolve_user(artifacts, user_token)
+    except ValueError:
+        return None
+    row = table.lookup(uid_internal, topk, len(history_index.history(uid_internal)))
+    if row is None or row[0].size == 0:
+        PRECOMPUTED_STATS["fallbacks"] += 1
+        return None
+    PRECOMPUTED_STATS["hits"] += 1
+    item_ids, scores = row
+    return to_recommendation_items(item_lookup.external_ids[item_ids], item_lookup.names[item_ids], scores)
+
+
+def session_items(artifacts: Dict[str, object], user_token: str) -> np.ndarray:
+    """Internal ids of the user's live session events; items unknown to the model are dropped."""
+    _, tokens = SESSION_EVENTS.snapshot(str(user_token))
+    if not tokens:
+        return np.empty(0, dtype=np.int64)
+    dataset = artifacts["dataset"]  # type: ignore[assignment]
+    token2id = dataset.field2token_id[artifacts["iid_field"]]
+    return np.array([token2id[token] for token in tokens if token in token2id], dtype=np.int64)
+
+
+def user_sequence(artifacts: Dict[str, object], user_token: str) -> Tuple[np.ndarray, List[int]]:
+    """
+    Return (all interacted item ids, most recent model input sequence) for a user
+    token, with live session events appended after the snapshot history.
+    """
+    config: Config = artifacts["config"]  # type: ignore[assignment]
+    history_index: UserHistoryIndex = artifacts["history_index"]  # type: ignore[assignment]
 
     try:
         max_len = int(config["MAX_ITEM_LIST_LENGTH"])
     except KeyError:
         max_len = int(config["seq_len"])
-    seq = interacted_items[-max_len:]
-    seq_tensor = torch.tensor([seq], device=model.device)
-    seq_len_tensor = torch.tensor([len(seq)], device=model.device)
-    uid_tensor = torch.tensor([uid_internal], device=model.device)
-
-    with TORCH_INFERENCE_LOCK:
-        with torch.no_grad():
-            scores = model.full_sort_predict(
-                {
-                    "uid": uid_tensor,
-                    "item_id_list": seq_tensor,
-                    "item_length": seq_len_tensor,
-                },
-            )
 
-    scores = scores.squeeze(0)
-    top_values, top_indices = torch.topk(scores, k=min(topk * 3, scores.numel()))
+    live_items = session_items(artifacts, user_token)
+    try:
+        uid_internal = resolve_user(artifacts, user_token)
+    except ValueError:
+        # Users created after the snapshot can still be served from their session alone.
+        if live_items.size == 0:
+            raise
+        history = recent = live_items[:0]
+    else:
+        history = history_index.history(uid_internal)
+        recent = history_index.recent(uid_internal, max_len)
+
+    if live_items.size == 0:
+        if history.size == 0:
+            raise ValueError("Chưa có lịch sử để gợi ý sản phẩm.")
+        return history, recent.tolist()
+    interacted_items = np.concatenate([history, live_items])
+    return interacted_items, np.concatenate([recent, live_items])[-max_len:].tolist()
+
+
+def to_recommendation_items(item_ids, item_names, item_scores) -> List[RecommendationItem]:
+    return [
+        RecommendationItem(item_id=int(item_id), item_name=str(item_name), score=round(float(score), 4))
+        for item_id, item_name, score in zip(item_ids, item_names, item_scores)
+    ]
 
-    seen_items = set(interacted_items)
-    recommendations: List[RecommendationItem] = []
 
-    for score, item_internal in zip(top_values.tolist(), top_indices.tolist()):
-        if item_internal in seen_items:
-            continue
-        item_token = dataset.id2token(iid_field, [item_internal])[0]
-        item_token_str = str(item_token)
-        item_name = product_map.get(item_token_str, f"Sản phẩm {item_token_str}")
-        try:
-            item_id = int(item_token_str)
-        except ValueError:
-            logger.warning("Item token %s không phải số nguyên, bỏ qua gợi ý này.", item_token_str)
-            continue
-        recommendations.append(
-            RecommendationItem(
-                item_id=item_id,
-                item_name=item_name,
-                score=round(float(score), 4),
-            ),
-        )
-        if len(recommendations) >= topk:
-            break
+def compute_and_cache_recommendations(
+    artifacts: Dict[str, object],
+    user_token: str,
+    topk: int,
+) -> List[RecommendationItem]:
+    scorer = artifacts["scorer"]
+    item_lookup: ItemLookup = artifacts["item_lookup"]  # type: ignore[assignment]
+
+    started = time.perf_counter()
+    interacted_items, seq = user_sequence(artifacts, user_token)
+    observe_stage("history_lookup", time.perf_counter() - started)
+    scores = INFERENCE_BATCHER.submit(scorer, seq)
+    started = time.perf_counter()
+    top = item_lookup.top_items(scores, interacted_items, topk)
+    ranked = time.perf_counter()
+    observe_stage("topk", ranked - started)
+    recommendations = to_recommendation_items(*top)
 
     if not recommendations:
         raise ValueError("Không tìm thấy sản phẩm phù hợp để gợi ý.")
 
+    RECOMMENDATION_CACHE.put(recommendation_cache_key(artifacts, user_token, topk), recommendations)
+    observe_stage("postprocess", time.perf_counter() - ranked)
     return recommendations
 
 
+def iter_batch_recommendations(
+    artifacts: Dict[str, object],
+    user_tokens: Sequence[str],
+    topk: int,
+    batch_size: int,
+) -> Iterator[str]:
+    """
+    Yield NDJSON lines, one chunk of ``batch_size`` users per forward pass.
+    Users without usable history get the popular ranking (``"source": "popular"``).
+    Results bypass the per-user cache so a campaign run does not evict interactive entries.
+    """
+    scorer = artifacts["scorer"]
+    item_lookup: ItemLookup = artifacts["item_lookup"]  # type: ignore[assignment]
+    popular = [
+        {"item_id": item.item_id, "item_name": item.item_name, "score": item.score}
+        for item in artifacts["popular_items"][:topk]  # type: ignore[index]
+    ]
+
+    for start in range(0, len(user_tokens), batch_size):
+        chunk = user_tokens[start : start + batch_size]
+        lines: Dict[int, Dict[str, object]] = {}
+        rows: List[int] = []
+        seen: List[np.ndarray] = []
+        sequences: List[List[int]] = []
+        started = time.perf_counter()
+        for position, user_token in enumerate(chunk):
+            precomputed = precomputed_recommendations(artifacts, user_token, topk)
+            if precomputed is not None:
+                lines[position] = {
+                    "user_id": user_token,
+                    "source": "precomputed",
+                    "recommendations": [
+                        {"item_id": item.item_id, "item_name": item.item_name, "score": item.score}
+                        for item in precomputed
+                    ],
+                }
+                continue
+            try:
+                interacted_items, seq = user_sequence(artifacts, user_token)
+            except ValueError as exc:
+                lines[position] = {
+                    "user_id": user_token,
+                    "source": "popular",
+                    "recommendations": popular,
+                    "error": str(exc),
+                }
+                continue
+            rows.append(position)
+            seen.append(interacted_items)
+            sequences.append(seq)
+        observe_stage("history_lookup", time.perf_counter() - started)
+
+        if sequences:
+            scores = score_sequences(scorer, sequences, TORCH_INFERENCE_LOCK, observe_stage)
+            started = time.perf_counter()
+            top = item_lookup.top_items_batch(scores, seen, topk)
+            ranked = time.perf_counter()
+            observe_stage("topk", ranked - started)
+            for position, (item_ids, item_names, item_scores) in zip(rows, top):
+                lines[position] = {
+                    "user_id": chunk[position],
+                    "source": "model",
+                    "recommendations": [
+                        {"item_id": int(item_id), "item_name": str(item_name), "score": round(float(score), 4)}
+                        for item_id, item_name, score in zip(item_ids, item_names, item_scores)
+                    ],
+                }
+            observe_stage("postprocess", time.perf_counter() - ranked)
+        yield "".join(json.dumps(lines[position], ensure_ascii=False) + "\n" for position in range(len(chunk)))
+
+
 def popular_items(topk: int) -> List[RecommendationItem]:
     """
-    Return top-k popular items based on frequency in the interaction dataset.
+    Return top-k popular items from the ranking precomputed at artifact load.
     This is a safe fallback when a user is unknown or has no history.
     """
     if not MODEL_READY or not ARTIFACTS:
         # If model/dataset isn't ready, return empty list so caller can handle it
         return []
 
-    dataset = ARTIFACTS.get("dataset")
-    iid_field = ARTIFACTS.get("iid_field")
-    product_map: Dict[str, str] = ARTIFACTS.get("product_map", {})
+    ranking: List[RecommendationItem] = ARTIFACTS.get("popular_items", [])  # type: ignore[assignment]
+    return ranking[:topk]
 
-    try:
-        # Use pandas value_counts on the item id column to find most frequent
-        counts = pd.Series(dataset.inter_feat[iid_field]).astype(str).value_counts()
-    except Exception:
-        return []
 
-    results: List[RecommendationItem] = []
-    for token in counts.index.astype(str):
-        try:
-            item_id = int(token)
-        except Exception:
-            # skip non-integer tokens
-            continue
-        item_name = product_map.get(token, f"Sản phẩm {token}")
-        results.append(RecommendationItem(item_id=item_id, item_name=item_name, score=None))
-        if len(results) >= topk:
-            break
-
-    return results
+async def recommend_for_user_async(user_token: str, topk: int) -> Optional[List[RecommendationItem]]:
+    """
+    Answer from the result cache, or run the model on the bounded inference executor.
+    Returns None without queuing when every inference slot is taken.
+    """
+    artifacts = current_artifacts()
+    precomputed = precomputed_recommendations(artifacts, user_token, topk)
+    if precomputed is not None:
+        RECOMMENDATION_SOURCES.inc("precomputed")
+        return precomputed
+
+    # Serve repeated requests straight from the result cache without touching the executor.
+    cached = RECOMMENDATION_CACHE.get(recommendation_cache_key(artifacts, user_token, topk))
+    if cached is not None:
+        RECOMMENDATION_SOURCES.inc("cache")
+        return cached
+    if not INFERENCE_SLOTS.acquire(blocking=False):
+        INFERENCE_ADMISSION["rejected"] += 1
+        RECOMMENDATION_SOURCES.inc("busy")
+        return None
+    INFERENCE_ADMISSION["inflight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        recommendations = await loop.run_in_executor(
+            INFERENCE_EXECUTOR,
+            compute_and_cache_recommendations,
+            artifacts,
+            user_token,
+            topk,
+        )
+        RECOMMENDATION_SOURCES.inc("model")
+        return recommendations
+    finally:
+        INFERENCE_ADMISSION["inflight"] -= 1
+        INFERENCE_SLOTS.release()
+
+
+def format_recommendation_reply(title: str, suggestions: List[RecommendationItem]) -> str:
+    lines = [
+        title,
+        *[
+            f"{idx + 1}. {item.item_name} (ID: {item.item_id})"
+            for idx, item in enumerate(suggestions)
+        ],
+    ]
+    return "\n".join(lines)
 
 
 @app.get("/health")
@@ -374,17 +1066,101 @@ def health_check():
         "status": "ok" if MODEL_READY else "degraded",
         "modelReady": MODEL_READY,
         "details": MODEL_STATUS,
+        "process": {"pid": os.getpid(), **process_memory()},
+        "inference": {
+            "backend": ARTIFACTS.get("inference_backend", INFERENCE_BACKEND),
+            **INFERENCE_BATCHER.stats(),
+            "executor": {
+                "workers": INFERENCE_WORKERS,
+                "max_inflight": INFERENCE_MAX_INFLIGHT,
+                **INFERENCE_ADMISSION,
+            },
+        },
+        "cache": RECOMMENDATION_CACHE.stats(),
+        "sessions": SESSION_EVENTS.stats(),
+        "precomputed": {
+            "table": str(topk_table_path(ARTIFACTS["checkpoint_path"])) if ARTIFACTS.get("topk_table") else None,
+            **PRECOMPUTED_STATS,
+        },
     }
 
 
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(content=METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/items/{item_id}/similar", response_model=SimilarItemsResponse)
+def similar_items_endpoint(item_id: str, top_k: Optional[int] = Query(None, ge=1, le=SIMILAR_TOP_N)):
+    try:
+        artifacts = current_artifacts()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    dataset = artifacts["dataset"]  # type: ignore[assignment]
+    table: SimilarItemsTable = artifacts["similar_items"]  # type: ignore[assignment]
+    item_lookup: ItemLookup = artifacts["item_lookup"]  # type: ignore[assignment]
+
+    internal_id = dataset.field2token_id[artifacts["iid_field"]].get(str(item_id))
+    if internal_id is None or item_lookup.invalid_mask[internal_id]:
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy sản phẩm {item_id}.")
+    neighbors, scores = table.lookup(int(internal_id), top_k or DEFAULT_TOPK)
+    return SimilarItemsResponse(
+        item_id=int(item_lookup.external_ids[internal_id]),
+        similar=to_recommendation_items(item_lookup.external_ids[neighbors], item_lookup.names[neighbors], scores),
+    )
+
+
+@app.post("/events", status_code=202)
+def ingest_events(request: InteractionEventBatch):
+    if RELOAD_TOKEN and request.token != RELOAD_TOKEN:
+        raise HTTPException(status_code=403, detail="Token không hợp lệ.")
+    if len(request.events) > EVENTS_MAX_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tối đa {EVENTS_MAX_BATCH} sự kiện cho mỗi request.",
+        )
+    for event in request.events:
+        SESSION_EVENTS.append(str(event.user_id), str(event.item_id))
+    return {"accepted": len(request.events)}
+
+
+@app.post("/recommendations/batch")
+def batch_recommendations(request: BatchRecommendationRequest):
+    if len(request.user_ids) > BULK_MAX_USERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tối đa {BULK_MAX_USERS} người dùng cho mỗi request.",
+        )
+    try:
+        artifacts = current_artifacts()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    topk = request.top_k or DEFAULT_TOPK
+    batch_size = max(1, request.batch_size or BULK_BATCH_SIZE)
+    return StreamingResponse(
+        iter_batch_recommendations(artifacts, request.user_ids, topk, batch_size),
+        media_type="application/x-ndjson",
+    )
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     message = request.message.strip()
     if not message:
         raise HTTPException(status_code=400, detail="Tin nhắn không được để trống.")
 
-    wants_recommendation = looks_like_recommendation_request(message)
-    user_token = request.user_id or extract_user_id_from_message(message)
+    intent = INTENT_ROUTER.route(message)
+    CHAT_REQUESTS.inc(intent.name)
+    started = time.perf_counter()
+    try:
+        return await answer_chat(request, intent)
+    finally:
+        CHAT_LATENCY.observe(time.perf_counter() - started, intent.name)
+
+
+async def answer_chat(request: ChatRequest, intent: Intent) -> ChatResponse:
+    wants_recommendation = intent.name == "recommendation"
+    user_token = request.user_id or intent.entities.get("user_id")
 
     if wants_recommendation and not MODEL_READY:
         return ChatResponse(
@@ -401,7 +1177,7 @@ def chat(request: ChatRequest):
     if wants_recommendation and user_token:
         topk = request.top_k or DEFAULT_TOPK
         try:
-            recommendations = recommend_for_user(user_token, topk)
+            recommendations = await recommend_for_user_async(user_token, topk)
         except RuntimeError:
             return ChatResponse(
                 reply="Hệ thống gợi ý đang bảo trì. Bạn vui lòng thử lại sau nhé!",
@@ -410,33 +1186,31 @@ def chat(request: ChatRequest):
         except ValueError as exc:
             # If user not found or has no history, fallback to popular items so FE still shows suggestions
             logger.info("recommend_for_user failed: %s; falling back to popular items", exc)
+            RECOMMENDATION_SOURCES.inc("popular")
             suggestions = popular_items(topk)
             if suggestions:
-                lines = [
-                    f"Gợi ý dành cho bạn (phổ biến):",
-                    *[
-                        f"{idx + 1}. {item.item_name} (ID: {item.item_id})"
-                        for idx, item in enumerate(suggestions)
-                    ],
-                ]
-                reply = "\n".join(lines)
+                reply = format_recommendation_reply("Gợi ý dành cho bạn (phổ biến):", suggestions)
                 return ChatResponse(reply=reply, recommendations=suggestions, model_ready=MODEL_READY)
             return ChatResponse(reply=str(exc), model_ready=MODEL_READY)
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"Không thể gợi ý lúc này: {exc}") from exc
 
-        lines = [
-            f"Gợi ý dành cho bạn (User {user_token}):",
-            *[
-                f"{idx + 1}. {item.item_name} (ID: {item.item_id})"
-                for idx, item in enumerate(recommendations)
-            ],
-        ]
-        reply = "\n".join(lines)
+        if recommendations is None:
+            # Inference executor is saturated: answer immediately with popular items instead of queuing.
+            logger.info("Inference executor saturated; serving popular items to user %s", user_token)
+            suggestions = popular_items(topk)
+            if suggestions:
+                reply = format_recommendation_reply("Hệ thống đang bận, bạn tham khảo các sản phẩm phổ biến nhé:", suggestions)
+                return ChatResponse(reply=reply, recommendations=suggestions, model_ready=MODEL_READY)
+            return ChatResponse(
+                reply="Hệ thống gợi ý đang quá tải. Bạn vui lòng thử lại sau ít phút nhé!",
+                model_ready=MODEL_READY,
+            )
+
+        reply = format_recommendation_reply(f"Gợi ý dành cho bạn (User {user_token}):", recommendations)
         return ChatResponse(reply=reply, recommendations=recommendations, model_ready=True)
 
-    reply = simple_reply(message)
-    return ChatResponse(reply=reply, model_ready=MODEL_READY)
+    return ChatResponse(reply=intent.reply or INTENT_ROUTER.fallback_reply, model_ready=MODEL_READY)
 
 
 if __name__ == "__main__":
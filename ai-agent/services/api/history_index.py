@@ -0,0 +1,64 @@
+"""Compact per-user interaction history used by the chatbot service."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class UserHistoryIndex:
+    """
+    CSR-style index over the interaction table.
+
+    ``items[offsets[u]:offsets[u + 1]]`` holds the internal item ids of user ``u``
+    ordered by interaction time, so a lookup costs O(history length) instead of a
+    scan over every interaction.
+    """
+
+    offsets: np.ndarray
+    items: np.ndarray
+
+    @classmethod
+    def build(
+        cls,
+        user_ids: np.ndarray,
+        item_ids: np.ndarray,
+        timestamps: Optional[np.ndarray] = None,
+        user_num: Optional[int] = None,
+    ) -> "UserHistoryIndex":
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        if user_ids.shape != item_ids.shape:
+            raise ValueError("user_ids và item_ids phải có cùng độ dài.")
+
+        if timestamps is None:
+            order = np.argsort(user_ids, kind="stable")
+        else:
+            # lexsort uses the last key as primary: group by user, then by time.
+            order = np.lexsort((np.asarray(timestamps), user_ids))
+
+        size = int(user_num) if user_num is not None else int(user_ids.max(initial=-1)) + 1
+        counts = np.bincount(user_ids, minlength=size)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(offsets=offsets, items=item_ids[order])
+
+    @property
+    def user_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def history(self, uid: int) -> np.ndarray:
+        if uid < 0 or uid >= self.user_count:
+            return self.items[:0]
+        return self.items[self.offsets[uid]:self.offsets[uid + 1]]
+
+    def recent(self, uid: int, max_len: int) -> np.ndarray:
+        """Return the last ``max_len`` items of ``uid``, oldest first."""
+        if uid < 0 or uid >= self.user_count or max_len <= 0:
+            return self.items[:0]
+        end = self.offsets[uid + 1]
+        start = max(self.offsets[uid], end - max_len)
+        return self.items[start:end]
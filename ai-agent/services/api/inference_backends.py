@@ -0,0 +1,196 @@
+"""
+Pluggable CPU inference backends for the chatbot recommender.
+
+Every backend exposes the slice of the RecBole model interface the inference
+batcher relies on (``device`` and ``full_sort_predict``):
+
+* ``eager``     – the RecBole ``BERT4Rec`` module as trained.
+* ``scripted``  – a TorchScript trace of the encoder plus full-sort scoring.
+* ``quantized`` – the same trace with dynamic int8 ``nn.Linear`` layers.
+
+``AnnBackend`` wraps the eager encoder with approximate candidate retrieval
+(``CHATBOT_RETRIEVAL=ann``) for catalogs too large to score in full.
+
+Scripted artifacts are exported next to the checkpoint by
+``recommender/training/export_inference_model.py``; when one is missing the
+service traces the loaded model in-process instead.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+import torch
+from torch import nn
+
+from .ann_index import IVFIndex
+
+logger = logging.getLogger("ai_agent.service.backends")
+
+BACKEND_SUFFIXES = {
+    "scripted": ".scripted.pt",
+    "quantized": ".int8.pt",
+}
+INFERENCE_BACKENDS = ("eager", *BACKEND_SUFFIXES)
+
+
+class FullSortScorer(nn.Module):
+    """
+    Trace-friendly equivalent of ``BERT4Rec.full_sort_predict``.
+
+    RecBole appends the mask token with a Python loop over the batch, which a
+    trace would unroll for one batch size; this version uses ``scatter``.
+    """
+
+    def __init__(self, model: nn.Module) -> None:
+        super().__init__()
+        self.model = model
+        self.mask_token = int(model.mask_token)
+        self.n_items = int(model.n_items)
+
+    def encode(self, item_seq: torch.Tensor, item_seq_len: torch.Tensor) -> torch.Tensor:
+        """User vectors ``[B, hidden]``: the encoder output at the appended mask position."""
+        padding = torch.zeros_like(item_seq[:, :1])
+        item_seq = torch.cat((item_seq, padding), dim=1)
+        mask = torch.full_like(padding, self.mask_token)
+        item_seq = item_seq.scatter(1, item_seq_len.unsqueeze(1), mask)[:, 1:]
+        return self.model.gather_indexes(self.model(item_seq), item_seq_len - 1)
+
+    def forward(self, item_seq: torch.Tensor, item_seq_len: torch.Tensor) -> torch.Tensor:
+        seq_output = self.encode(item_seq, item_seq_len)
+        test_items_emb = self.model.item_embedding.weight[: self.n_items]
+        return torch.matmul(seq_output, test_items_emb.transpose(0, 1)) + self.model.output_bias
+
+
+class ScriptedBackend:
+    """Adapts a traced ``FullSortScorer`` to the ``full_sort_predict`` interface."""
+
+    def __init__(self, module: torch.jit.ScriptModule, name: str) -> None:
+        self.module = module
+        self.name = name
+        self.device = torch.device("cpu")
+
+    def full_sort_predict(self, interaction: Mapping[str, torch.Tensor]) -> torch.Tensor:
+        return self.module(interaction["item_id_list"], interaction["item_length"])
+
+
+class AnnBackend:
+    """
+    Two-stage retrieval: encode users, fetch ``n_candidates`` items from an IVF
+    index, then score only those candidates exactly. Returns dense score rows
+    with ``-inf`` outside the candidate set so post-processing is unchanged.
+    """
+
+    name = "ann"
+
+    def __init__(self, model: nn.Module, index: IVFIndex, n_candidates: int, nprobe: int) -> None:
+        self.encoder = FullSortScorer(model).eval()
+        self.index = index
+        self.n_candidates = max(1, int(n_candidates))
+        self.nprobe = max(1, int(nprobe))
+        self.device = torch.device("cpu")
+        self.item_embeddings = model.item_embedding.weight[: self.encoder.n_items].detach()
+        self.output_bias = model.output_bias.detach()
+
+    @classmethod
+    def build(
+        cls,
+        model: nn.Module,
+        item_ids: np.ndarray,
+        *,
+        n_candidates: int = 200,
+        nprobe: int = 8,
+        n_lists: Optional[int] = None,
+    ) -> "AnnBackend":
+        """Index the embeddings of ``item_ids`` (internal ids that may be recommended)."""
+        n_items = int(model.n_items)
+        embeddings = model.item_embedding.weight[:n_items].detach().numpy()
+        bias = model.output_bias.detach().numpy()
+        index = IVFIndex.build(embeddings[item_ids], bias[item_ids], item_ids, n_lists=n_lists)
+        return cls(model, index, n_candidates, nprobe)
+
+    def full_sort_predict(self, interaction: Mapping[str, torch.Tensor]) -> torch.Tensor:
+        users = self.encoder.encode(interaction["item_id_list"], interaction["item_length"])
+        candidates = torch.from_numpy(self.index.search(users.numpy(), self.n_candidates, self.nprobe))
+        valid = candidates >= 0
+        # Padding slots point at item 0 (the PAD token), which is never recommended.
+        candidates = candidates.clamp(min=0)
+        exact = torch.einsum("bh,bch->bc", users, self.item_embeddings[candidates]) + self.output_bias[candidates]
+        exact = exact.masked_fill(~valid, float("-inf"))
+        scores = torch.full((users.shape[0], self.encoder.n_items), float("-inf"), dtype=exact.dtype)
+        return scores.scatter_(1, candidates, exact)
+
+
+def backend_artifact_path(checkpoint_path: Path, backend: str) -> Path:
+    resolved = Path(checkpoint_path).resolve()
+    return resolved.with_name(resolved.stem + BACKEND_SUFFIXES[backend])
+
+
+def _example_inputs(model: nn.Module, max_len: int):
+    # Two rows of different lengths so the trace does not specialise on a single shape.
+    item_seq = torch.ones((2, max_len), dtype=torch.long)
+    item_seq[1, 1:] = 0
+    return item_seq, torch.tensor([max_len, 1], dtype=torch.long)
+
+
+def trace_scorer(model: nn.Module, max_len: int, quantize: bool = False) -> torch.jit.ScriptModule:
+    """Trace ``model`` (a loaded, eval-mode BERT4Rec) into a standalone scoring module."""
+    scorer: nn.Module = FullSortScorer(model).eval()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if quantize:
+            scorer = torch.ao.quantization.quantize_dynamic(scorer, {nn.Linear}, dtype=torch.qint8)
+        with torch.no_grad():
+            return torch.jit.trace(scorer, _example_inputs(model, max_len), check_trace=False)
+
+
+def export_backend_artifacts(model: nn.Module, checkpoint_path: Path, max_len: int) -> Dict[str, Path]:
+    """Write the scripted and quantized artifacts next to ``checkpoint_path`` atomically."""
+    written: Dict[str, Path] = {}
+    for backend in BACKEND_SUFFIXES:
+        path = backend_artifact_path(checkpoint_path, backend)
+        module = trace_scorer(model, max_len, quantize=backend == "quantized")
+        tmp_fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".pt")
+        # mkstemp creates the file 0600; the service may run as another user than the exporter.
+        os.fchmod(tmp_fd, 0o644)
+        os.close(tmp_fd)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                torch.jit.save(module, tmp_name)
+            os.replace(tmp_name, path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+        written[backend] = path
+    return written
+
+
+def load_inference_backend(
+    backend: str,
+    model: nn.Module,
+    checkpoint_path: Optional[Path],
+    max_len: int,
+) -> Any:
+    """Return the object the inference batcher should call for ``backend``."""
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Backend suy luận không hợp lệ: {backend} (hỗ trợ: {', '.join(INFERENCE_BACKENDS)})")
+    if backend == "eager":
+        return model
+
+    path = backend_artifact_path(checkpoint_path, backend) if checkpoint_path is not None else None
+    if path is not None and path.exists():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            module = torch.jit.load(str(path), map_location="cpu")
+    else:
+        logger.info("Artifact %s not found, tracing %s backend in-process", path, backend)
+        module = trace_scorer(model, max_len, quantize=backend == "quantized")
+    module.eval()
+    return ScriptedBackend(module, backend)
@@ -0,0 +1,191 @@
+"""Micro-batching scheduler for BERT4Rec ``full_sort_predict`` calls."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Deque, Dict, List, Optional, Sequence
+
+import torch
+
+logger = logging.getLogger("ai_agent.service.batcher")
+
+WAIT_BUCKETS_MS = (0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0)
+
+# Called with (stage, seconds) for "tensor_build", "lock_wait" and "forward".
+StageObserver = Callable[[str, float], None]
+
+
+def score_sequences(
+    model: Any,
+    sequences: List[Sequence[int]],
+    lock: Optional[ContextManager] = None,
+    observer: Optional[StageObserver] = None,
+) -> torch.Tensor:
+    """Right-pad ``sequences`` into one tensor and return ``full_sort_predict`` scores."""
+    started = time.perf_counter()
+    lengths = [len(sequence) for sequence in sequences]
+    item_seq = torch.zeros((len(sequences), max(lengths)), dtype=torch.long)
+    for row, sequence in enumerate(sequences):
+        item_seq[row, : len(sequence)] = torch.as_tensor(sequence, dtype=torch.long)
+    interaction = {
+        "item_id_list": item_seq.to(model.device),
+        "item_length": torch.tensor(lengths, dtype=torch.long, device=model.device),
+    }
+    built = time.perf_counter()
+    if lock is None:
+        acquired = built
+        with torch.no_grad():
+            scores = model.full_sort_predict(interaction)
+    else:
+        with lock:
+            acquired = time.perf_counter()
+            with torch.no_grad():
+                scores = model.full_sort_predict(interaction)
+    if observer is not None:
+        observer("tensor_build", built - started)
+        observer("lock_wait", acquired - built)
+        observer("forward", time.perf_counter() - acquired)
+    return scores
+
+
+@dataclass
+class _PendingRequest:
+    model: Any
+    sequence: Sequence[int]
+    enqueued_at: float
+    future: Future = field(default_factory=Future)
+
+
+class InferenceBatcher:
+    """
+    Collect concurrent recommendation requests for a short window, pad their
+    sequences into one tensor and run a single forward pass.
+
+    Requests are only batched with others targeting the same model object, so a
+    reload never mixes item ids from two different artifact sets.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 3.0,
+        lock: Optional[ContextManager] = None,
+        observer: Optional[StageObserver] = None,
+    ) -> None:
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._lock = lock
+        self._observer = observer
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._carry: Deque[_PendingRequest] = deque()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Dict[int, int] = {}
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_sum = 0.0
+        self._wait_max = 0.0
+        self._requests = 0
+        self._batches = 0
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="bert4rec-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, model: Any, sequence: Sequence[int], timeout: Optional[float] = None) -> torch.Tensor:
+        """Queue one item sequence and block until its score row is available."""
+        if not sequence:
+            raise ValueError("Chuỗi tương tác rỗng.")
+        self.start()
+        request = _PendingRequest(model=model, sequence=sequence, enqueued_at=time.perf_counter())
+        self._queue.put(request)
+        return request.future.result(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            wait_histogram = {f"le_{bound:g}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self._wait_buckets)}
+            wait_histogram["le_inf"] = self._wait_buckets[-1]
+            return {
+                "queue_depth": self._queue.qsize() + len(self._carry),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "requests": self._requests,
+                "batches": self._batches,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "wait_ms": {
+                    "mean": round(self._wait_sum / self._requests * 1000.0, 4) if self._requests else 0.0,
+                    "max": round(self._wait_max * 1000.0, 4),
+                    "histogram": wait_histogram,
+                },
+            }
+
+    def _next_request(self, timeout: Optional[float]) -> Optional[_PendingRequest]:
+        if self._carry:
+            return self._carry.popleft()
+        try:
+            if timeout is None:
+                return self._queue.get()
+            return self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _collect_batch(self) -> List[_PendingRequest]:
+        first = self._next_request(timeout=None)
+        assert first is not None
+        batch = [first]
+        skipped: List[_PendingRequest] = []
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            pending = self._next_request(timeout=deadline - time.perf_counter())
+            if pending is None:
+                break
+            if pending.model is first.model:
+                batch.append(pending)
+            else:
+                skipped.append(pending)
+        self._carry.extend(skipped)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            self._record(batch, started)
+            try:
+                scores = self._forward(batch[0].model, [request.sequence for request in batch])
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Batched inference failed")
+                for request in batch:
+                    request.future.set_exception(exc)
+                continue
+            for row, request in enumerate(batch):
+                request.future.set_result(scores[row])
+
+    def _forward(self, model: Any, sequences: List[Sequence[int]]) -> torch.Tensor:
+        return score_sequences(model, sequences, self._lock, self._observer)
+
+    def _record(self, batch: List[_PendingRequest], started: float) -> None:
+        with self._stats_lock:
+            self._batches += 1
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            for request in batch:
+                waited = started - request.enqueued_at
+                self._requests += 1
+                self._wait_sum += waited
+                self._wait_max = max(self._wait_max, waited)
+                waited_ms = waited * 1000.0
+                bucket = next(
+                    (idx for idx, bound in enumerate(WAIT_BUCKETS_MS) if waited_ms <= bound),
+                    len(WAIT_BUCKETS_MS),
+                )
+                self._wait_buckets[bucket] += 1
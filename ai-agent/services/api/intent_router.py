@@ -0,0 +1,191 @@
+"""
+Keyword intent router for chatbot messages.
+
+A message is lowercased and stripped of Vietnamese diacritics once ("Gợi ý" and
+"goi y" become the same text). All keyword tables are compiled into a single
+regex whose keyword branch is a character trie, so one ``finditer`` pass finds
+every keyword hit together with an explicit ``user <id>`` entity.
+
+Keyword tables live in a JSON file (``intents.json`` next to this module, or
+``CHATBOT_INTENTS_FILE``)::
+
+    {
+      "recommendation": {"keywords": ["gợi ý", "recommend"]},
+      "faq": [{"topic": "delivery", "keywords": ["giao"], "reply": "..."}],
+      "fallback_reply": "..."
+    }
+
+A keyword only counts where it starts a word, so "ship" does not fire inside
+"relationship". A leading ``*`` lets a keyword match inside words as well:
+``"*order"`` also catches "reorder" and "preorder".
+
+FAQ rules are tried in file order: when several topics match, the first one wins.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+RECOMMENDATION = "recommendation"
+FAQ = "faq"
+FALLBACK = "fallback"
+
+
+_NUMBER = re.compile(r"\d+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercase and strip Vietnamese diacritics (``đ`` becomes ``d``). Characters
+    without an ASCII base letter are dropped, so the result is always ASCII.
+    """
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFD", text.replace("đ", "d"))
+    return decomposed.encode("ascii", "ignore").decode("ascii")
+
+
+def _keyword_key(keyword: str) -> str:
+    return " ".join(normalize_text(keyword).split())
+
+
+def _trie_branches(words: Sequence[str]) -> List[str]:
+    """
+    Top-level regex alternatives matching any of ``words``, factored into a
+    trie so the engine follows shared prefixes once; longer keywords win over
+    their prefixes. A space in a keyword matches any run of whitespace.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def branches(node: Dict[str, Any]) -> List[str]:
+        return [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+
+    def build(node: Dict[str, Any]) -> str:
+        alternatives = branches(node)
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        if "" in node:
+            return ("(?:" + body + ")?") if len(alternatives) == 1 else body + "?"
+        return body
+
+    return branches(trie)
+
+
+@dataclass(frozen=True)
+class FaqRule:
+    topic: str
+    keywords: Tuple[str, ...]
+    reply: str
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str  # "recommendation", "faq" or "fallback"
+    reply: Optional[str] = None  # preset answer for "faq"/"fallback"
+    topic: Optional[str] = None  # matching FAQ topic
+    keywords: Tuple[str, ...] = ()  # normalised keyword hits, in message order
+    entities: Dict[str, str] = field(default_factory=dict)
+
+
+class IntentRouter:
+    def __init__(
+        self,
+        recommendation_keywords: Sequence[str],
+        faq_rules: Sequence[FaqRule],
+        fallback_reply: str,
+    ) -> None:
+        self.faq_rules = tuple(faq_rules)
+        self.fallback_reply = fallback_reply
+        # normalised keyword -> FAQ rule index, or -1 for a recommendation keyword
+        self._targets: Dict[str, int] = {}
+        # normalised keywords declared with a leading "*", matched inside words too
+        self._infix: Set[str] = set()
+        for keyword in recommendation_keywords:
+            self._add_keyword(keyword, -1)
+        for index, rule in enumerate(self.faq_rules):
+            for keyword in rule.keywords:
+                self._add_keyword(keyword, index)
+        if not self._targets:
+            raise ValueError("Bảng từ khóa intent đang rỗng.")
+        # Keep the alternatives flat, without a lookbehind or an enclosing group, so ``re``
+        # can skip ahead to positions starting with one of their first characters.
+        self._pattern = re.compile("|".join([*_trie_branches(sorted(self._targets)), r"user\s*(\w+)"]))
+
+    def _add_keyword(self, keyword: str, target: int) -> None:
+        infix = keyword.startswith("*")
+        key = _keyword_key(keyword[1:] if infix else keyword)
+        if not key:
+            return
+        if self._targets.get(key, target) != target:
+            raise ValueError(f"Từ khóa '{keyword}' thuộc nhiều intent khác nhau.")
+        self._targets[key] = target
+        if infix:
+            self._infix.add(key)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "IntentRouter":
+        return cls(
+            recommendation_keywords=config.get("recommendation", {}).get("keywords", []),
+            faq_rules=[
+                FaqRule(topic=str(rule["topic"]), keywords=tuple(rule["keywords"]), reply=str(rule["reply"]))
+                for rule in config.get("faq", [])
+            ],
+            fallback_reply=str(config["fallback_reply"]),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "IntentRouter":
+        with open(path, encoding="utf-8") as fp:
+            return cls.from_config(json.load(fp))
+
+    def route(self, message: str) -> Intent:
+        text = normalize_text(message)
+        user_id: Optional[str] = None
+        hits: List[str] = []
+        wants_recommendation = False
+        faq_index: Optional[int] = None
+        for match in self._pattern.finditer(text):
+            if match.lastindex:
+                if user_id is None:
+                    user_id = match.group(1)
+                continue
+            key = " ".join(match.group().split())
+            start = match.start()
+            if start and text[start - 1].isalnum() and key not in self._infix:
+                continue
+            hits.append(key)
+            target = self._targets[key]
+            if target < 0:
+                wants_recommendation = True
+            elif faq_index is None or target < faq_index:
+                faq_index = target
+
+        entities: Dict[str, str] = {}
+        if user_id is None:
+            # Without an explicit "user <id>", the first number in the message is taken as the user id.
+            number = _NUMBER.search(text)
+            user_id = number.group() if number else None
+        if user_id:
+            entities["user_id"] = user_id
+        if wants_recommendation:
+            return Intent(RECOMMENDATION, keywords=tuple(hits), entities=entities)
+        if faq_index is not None:
+            rule = self.faq_rules[faq_index]
+            return Intent(FAQ, reply=rule.reply, topic=rule.topic, keywords=tuple(hits), entities=entities)
+        return Intent(FALLBACK, reply=self.fallback_reply, keywords=tuple(hits), entities=entities)
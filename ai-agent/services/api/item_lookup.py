@@ -0,0 +1,110 @@
+"""Internal item id → (external id, display name) table for post-processing scores."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import torch
+
+logger = logging.getLogger("ai_agent.service.items")
+
+
+@dataclass(frozen=True)
+class ItemLookup:
+    """
+    Dense arrays indexed by RecBole internal item id.
+
+    ``invalid_mask`` flags ids that can never be recommended (padding and tokens
+    that are not integer product ids) so they are masked before top-k.
+    """
+
+    external_ids: np.ndarray
+    names: np.ndarray
+    invalid_mask: torch.Tensor
+
+    @classmethod
+    def build(cls, id2token: Iterable[object], product_map: Dict[str, str]) -> "ItemLookup":
+        tokens = [str(token) for token in id2token]
+        external_ids = np.full(len(tokens), -1, dtype=np.int64)
+        names = np.empty(len(tokens), dtype=object)
+        skipped = 0
+        for internal_id, token in enumerate(tokens):
+            names[internal_id] = product_map.get(token, f"Sản phẩm {token}")
+            try:
+                external_ids[internal_id] = int(token)
+            except ValueError:
+                skipped += 1
+        if skipped > 1:  # index 0 is always the padding token
+            logger.warning("%s item token không phải số nguyên sẽ bị bỏ qua khi gợi ý.", skipped - 1)
+        return cls(
+            external_ids=external_ids,
+            names=names,
+            invalid_mask=torch.from_numpy(external_ids < 0),
+        )
+
+    def top_items(
+        self,
+        scores: torch.Tensor,
+        seen_items: np.ndarray,
+        topk: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (external ids, names, scores) of the best ``topk`` unseen items."""
+        mask = self.invalid_mask.clone()
+        if seen_items.size:
+            # Copy: histories may be read-only shared arrays, which torch.from_numpy warns about.
+            mask[torch.tensor(np.asarray(seen_items, dtype=np.int64))] = True
+        available = int(mask.numel() - mask.sum())
+        if available <= 0 or topk <= 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, self.names[empty], np.empty(0, dtype=np.float32)
+
+        masked = scores.masked_fill(mask, float("-inf"))
+        top_values, top_indices = torch.topk(masked, k=min(topk, available))
+        # Candidate-retrieval scorers leave unscored items at -inf; never return those.
+        finite = int(torch.isfinite(top_values).sum())
+        indices = top_indices[:finite].numpy()
+        return self.external_ids[indices], self.names[indices], top_values[:finite].numpy()
+
+    def top_indices_batch(
+        self,
+        scores: torch.Tensor,
+        seen_items: Sequence[np.ndarray],
+        topk: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Masked top-k over a ``[B, n_items]`` score matrix with one ``topk`` call.
+
+        Returns internal item ids and scores of shape ``[B, k]`` plus the number
+        of valid (unmasked) entries in each row; the remaining entries are padding.
+        """
+        rows = scores.shape[0]
+        mask = self.invalid_mask.unsqueeze(0).repeat(rows, 1)
+        seen_counts = [len(items) for items in seen_items]
+        if sum(seen_counts):
+            row_index = torch.from_numpy(np.repeat(np.arange(rows, dtype=np.int64), seen_counts))
+            col_index = torch.from_numpy(np.concatenate([np.asarray(items, dtype=np.int64) for items in seen_items]))
+            mask[row_index, col_index] = True
+        k = min(max(topk, 0), mask.shape[1])
+        counts = np.minimum((~mask).sum(dim=1).numpy(), k)
+        if k == 0:
+            return np.empty((rows, 0), dtype=np.int64), np.empty((rows, 0), dtype=np.float32), counts
+        top_values, top_indices = torch.topk(scores.masked_fill(mask, float("-inf")), k=k, dim=1)
+        counts = np.minimum(counts, torch.isfinite(top_values).sum(dim=1).numpy())
+        return top_indices.numpy(), top_values.numpy(), counts
+
+    def top_items_batch(
+        self,
+        scores: torch.Tensor,
+        seen_items: Sequence[np.ndarray],
+        topk: int,
+    ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Row-wise ``top_items`` for a ``[B, n_items]`` score matrix."""
+        indices, values, counts = self.top_indices_batch(scores, seen_items, topk)
+        results = []
+        for row, count in enumerate(counts.tolist()):
+            row_indices = indices[row, :count]
+            results.append((self.external_ids[row_indices], self.names[row_indices], values[row, :count]))
+        return results
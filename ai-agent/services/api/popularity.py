@@ -0,0 +1,80 @@
+"""Popularity ranking used as the cold-start fallback of the chatbot service."""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.storage.interaction_store import load_interactions
+
+logger = logging.getLogger("ai_agent.service.popularity")
+
+EVENT_WEIGHTS = {
+    "view": 1.0,
+    "click": 2.0,
+    "add_to_cart": 3.0,
+    "purchase": 5.0,
+    "out": 0.0,
+    "reject": 0.0,
+}
+POPULARITY_HALF_LIFE_DAYS = float(os.environ.get("CHATBOT_POPULARITY_HALF_LIFE_DAYS", "30"))
+
+
+def rank_from_interactions(
+    interactions_file: Path,
+    half_life_days: float = POPULARITY_HALF_LIFE_DAYS,
+) -> List[Tuple[int, float]]:
+    """
+    Score items from the raw interaction log: each event counts with its
+    event-type weight, decayed exponentially by age relative to the newest event.
+    """
+    df = load_interactions(interactions_file, ["product_id", "timestamp", "event_type"])
+    df["product_id"] = pd.to_numeric(df["product_id"], errors="coerce")
+    df = df.dropna(subset=["product_id"])
+    if df.empty:
+        return []
+
+    weights = df["event_type"].astype(str).str.lower().str.strip().map(EVENT_WEIGHTS).fillna(0.0).to_numpy()
+    seconds = df["timestamp"].to_numpy() // 10**6
+    if half_life_days > 0:
+        age_days = (seconds.max() - seconds) / 86400.0
+        weights = weights * np.exp2(-age_days / half_life_days)
+
+    scores = pd.Series(weights).groupby(df["product_id"].astype("int64").to_numpy()).sum()
+    scores = scores[scores > 0].sort_values(ascending=False, kind="stable")
+    return [(int(item_id), float(score)) for item_id, score in scores.items()]
+
+
+def rank_from_counts(item_column: np.ndarray, id2token: Iterable[object]) -> List[Tuple[int, float]]:
+    """Rank internal item ids by raw frequency, skipping non-integer tokens."""
+    tokens = list(id2token)
+    counts = np.bincount(np.asarray(item_column, dtype=np.int64), minlength=len(tokens))
+    ranking: List[Tuple[int, float]] = []
+    for internal_id in np.argsort(-counts, kind="stable"):
+        if counts[internal_id] <= 0:
+            break
+        try:
+            ranking.append((int(str(tokens[internal_id])), float(counts[internal_id])))
+        except ValueError:
+            continue
+    return ranking
+
+
+def build_popularity_ranking(
+    interactions_file: Optional[Path],
+    item_column: np.ndarray,
+    id2token: Iterable[object],
+) -> List[Tuple[int, float]]:
+    if interactions_file is not None and interactions_file.exists():
+        try:
+            ranking = rank_from_interactions(interactions_file)
+            if ranking:
+                return ranking
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Không thể tính độ phổ biến từ %s: %s", interactions_file, exc)
+    return rank_from_counts(item_column, id2token)
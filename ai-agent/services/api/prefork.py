@@ -0,0 +1,383 @@
+"""
+Pre-fork multi-worker serving with shared read-only model memory.
+
+With ``uvicorn --workers N`` every worker runs ``load_artifacts()`` and keeps
+its own copy of the weights and index arrays. Here a supervisor process loads
+the artifacts once, moves model tensors to shared memory and index arrays to
+read-only shared mappings, then forks workers that serve one listening socket
+and only map those pages.
+
+A reload requested from any worker is handed to the supervisor through a job
+directory: it loads the new checkpoint once, starts a new generation of
+workers and retires the old one once the new workers accept connections.
+``/internal/reload/{job_id}`` answers from that directory on every worker.
+
+Usage (from ``ai-agent/``):
+  python -m services.api.prefork --workers 4 --port 8008
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import gc
+import json
+import logging
+import mmap
+import os
+import select
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import uvicorn
+
+from . import app as service
+from .inference_backends import AnnBackend, ScriptedBackend
+from .metrics import process_memory
+
+logger = logging.getLogger("ai_agent.service.prefork")
+
+RELOAD_SIGNAL = signal.SIGHUP
+CONTROL_SIGNALS = {signal.SIGHUP, signal.SIGCHLD, signal.SIGINT, signal.SIGTERM}
+READY_TIMEOUT_SECONDS = float(os.environ.get("CHATBOT_PREFORK_READY_TIMEOUT", "120"))
+GRACEFUL_TIMEOUT_SECONDS = float(os.environ.get("CHATBOT_PREFORK_GRACEFUL_TIMEOUT", "30"))
+
+
+def shared_array(array: np.ndarray) -> np.ndarray:
+    """Read-only copy of ``array`` in an anonymous ``MAP_SHARED`` mapping inherited by forked workers."""
+    if array.dtype.hasobject or array.nbytes == 0 or isinstance(array, np.memmap):
+        # Object arrays hold pointers to per-process objects; memmaps are already shared page cache.
+        return array
+    buffer = mmap.mmap(-1, array.nbytes)
+    shared = np.frombuffer(buffer, dtype=array.dtype).reshape(array.shape)
+    shared[...] = array
+    shared.flags.writeable = False
+    return shared
+
+
+def share_fields(value: Any) -> Any:
+    """Copy of a frozen dataclass whose arrays are shared; its tensors are moved to shared memory in place."""
+    if not dataclasses.is_dataclass(value) or isinstance(value, type):
+        return value
+    changes = {}
+    for field in dataclasses.fields(value):
+        item = getattr(value, field.name)
+        if isinstance(item, np.ndarray):
+            changes[field.name] = shared_array(item)
+        elif isinstance(item, torch.Tensor):
+            item.share_memory_()
+    return dataclasses.replace(value, **changes) if changes else value
+
+
+def share_artifacts(artifacts: Dict[str, object]) -> Dict[str, object]:
+    """Artifact set whose weights and index arrays live in memory that forked workers share."""
+    shared = dict(artifacts)
+    for key in ("history_index", "item_lookup", "similar_items", "topk_table"):
+        shared[key] = share_fields(shared.get(key))
+    # Parameter storages are swapped in place, so tensors viewing them (AnnBackend) follow.
+    artifacts["model"].share_memory()  # type: ignore[union-attr]
+    scorer = shared["scorer"]
+    if isinstance(scorer, torch.nn.Module):
+        scorer.share_memory()
+    elif isinstance(scorer, ScriptedBackend):
+        scorer.module.share_memory()
+    elif isinstance(scorer, AnnBackend):
+        scorer.index = share_fields(scorer.index)
+    return shared
+
+
+class ReloadChannel:
+    """Reload jobs stored as JSON files in a directory shared by the supervisor and its workers."""
+
+    def __init__(self, directory: Path, supervisor_pid: int) -> None:
+        self.directory = Path(directory)
+        self.supervisor_pid = supervisor_pid
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def write(self, job: service.ReloadJob) -> None:
+        tmp = self.directory / f".{job.job_id}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(asdict(job)), encoding="utf-8")
+        os.replace(tmp, self._path(job.job_id))
+
+    def submit(self, job: service.ReloadJob) -> None:
+        self.write(job)
+        os.kill(self.supervisor_pid, RELOAD_SIGNAL)
+
+    def lookup(self, job_id: str) -> Optional[service.ReloadJob]:
+        if not job_id.isalnum():
+            return None
+        try:
+            return service.ReloadJob(**json.loads(self._path(job_id).read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            return None
+
+    def jobs(self) -> List[service.ReloadJob]:
+        """Every stored job, oldest request first."""
+        found = (self.lookup(path.stem) for path in self.directory.glob("*.json"))
+        return sorted((job for job in found if job is not None), key=lambda job: job.requested_at)
+
+    def prune(self, keep: int) -> None:
+        finished = [job for job in self.jobs() if job.finished_at is not None]
+        for job in finished[: max(0, len(finished) - keep)]:
+            self._path(job.job_id).unlink(missing_ok=True)
+
+
+class Supervisor:
+    def __init__(
+        self,
+        sock: socket.socket,
+        workers: int,
+        channel: ReloadChannel,
+        torch_threads: int = 1,
+        log_level: str = "info",
+    ) -> None:
+        self.sock = sock
+        self.worker_count = max(1, int(workers))
+        self.channel = channel
+        self.torch_threads = torch_threads
+        self.log_level = log_level
+        self.workers: List[int] = []
+        self.retiring: Dict[int, float] = {}  # pid -> SIGKILL deadline
+
+    # -- worker side -------------------------------------------------------
+
+    def _run_worker(self, ready_fd: int) -> None:
+        signal.pthread_sigmask(signal.SIG_SETMASK, set())
+        service.reset_after_fork()
+        service.RELOAD_DELEGATE = self.channel
+        torch.set_num_threads(self.torch_threads)
+        config = uvicorn.Config(
+            service.app,
+            log_level=self.log_level,
+            timeout_graceful_shutdown=int(GRACEFUL_TIMEOUT_SECONDS),
+        )
+        asyncio.run(_serve(uvicorn.Server(config), self.sock, ready_fd))
+
+    def _spawn(self) -> Tuple[int, int]:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            code = 1
+            try:
+                self._run_worker(write_fd)
+                code = 0
+            except BaseException:  # noqa: BLE001
+                logger.exception("Worker %s dừng vì lỗi", os.getpid())
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        return pid, read_fd
+
+    def spawn_generation(self, count: int) -> List[int]:
+        """Fork ``count`` workers from the current artifacts and wait until they all accept connections."""
+        # Frozen objects skip GC traversal, so workers do not dirty (and copy) pages of inherited objects.
+        gc.freeze()
+        pids: List[int] = []
+        pending: Dict[int, int] = {}  # readiness pipe -> pid
+        try:
+            for _ in range(count):
+                pid, ready_fd = self._spawn()
+                pids.append(pid)
+                pending[ready_fd] = pid
+            deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"Worker chưa sẵn sàng sau {READY_TIMEOUT_SECONDS:.0f}s.")
+                readable, _, _ = select.select(list(pending), [], [], remaining)
+                for ready_fd in readable:
+                    pid = pending.pop(ready_fd)
+                    ready = os.read(ready_fd, 1) == b"1"
+                    os.close(ready_fd)
+                    if not ready:
+                        raise RuntimeError(f"Worker {pid} dừng trước khi sẵn sàng.")
+        except BaseException:
+            for ready_fd in pending:
+                os.close(ready_fd)
+            for pid in pids:
+                _kill(pid, signal.SIGKILL)
+            raise
+        finally:
+            gc.unfreeze()
+        return pids
+
+    # -- supervisor side ---------------------------------------------------
+
+    def prepare(self, checkpoint_path: Optional[Path] = None) -> Dict[str, object]:
+        artifacts = share_artifacts(service.load_artifacts(checkpoint_path))
+        service.warm_up_artifacts(artifacts)
+        return artifacts
+
+    def refresh(self, checkpoint_path: Optional[Path] = None) -> Dict[str, object]:
+        """Load the checkpoint once and replace every worker with one serving it."""
+        previous = service.ARTIFACTS
+        artifacts = self.prepare(checkpoint_path)
+        service.activate_artifacts(artifacts)
+        try:
+            new_workers = self.spawn_generation(self.worker_count)
+        except Exception:
+            service.activate_artifacts(previous)
+            raise
+        self.retire(self.workers)
+        self.workers = new_workers
+        self.report_memory("reload")
+        logger.info("Reloaded chatbot model from %s", artifacts.get("checkpoint_path"))
+        return artifacts
+
+    def retire(self, pids: List[int]) -> None:
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT_SECONDS + 5
+        for pid in pids:
+            self.retiring[pid] = deadline
+            _kill(pid, signal.SIGTERM)
+
+    def reload(self) -> None:
+        """Serve queued jobs with the same expected version and force flag with one reload; they share its outcome."""
+        jobs = [job for job in self.channel.jobs() if job.status == "queued"]
+        if not jobs:
+            return
+        groups: Dict[Tuple[Optional[str], bool], List[service.ReloadJob]] = {}
+        for job in jobs:
+            groups.setdefault((job.expected_version, job.force), []).append(job)
+        for job in jobs:
+            job.status = "running"
+            job.started_at = time.time()
+            self.channel.write(job)
+        for (expected_version, force), group in groups.items():
+            batch = service.ReloadJob(
+                job_id=uuid.uuid4().hex,
+                expected_version=expected_version,
+                force=force,
+                requested_at=time.time(),
+            )
+            service.run_reload_job(batch, refresh=self.refresh)
+            for job in group:
+                for field in ("status", "finished_at", "checkpoint", "version", "users", "items", "error"):
+                    setattr(job, field, getattr(batch, field))
+                self.channel.write(job)
+        self.channel.prune(service.RELOAD_JOBS_KEEP)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if self.retiring.pop(pid, None) is None and pid in self.workers:
+                self.workers.remove(pid)
+                logger.warning("Worker %s thoát bất thường (status=%s), khởi động lại.", pid, status)
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now > deadline:
+                _kill(pid, signal.SIGKILL)
+
+    def report_memory(self, event: str) -> None:
+        for role, pid in [("supervisor", os.getpid()), *(("worker", pid) for pid in self.workers)]:
+            memory = process_memory(pid)
+            logger.info(
+                "[%s] %s %s: rss=%.1f MiB pss=%.1f MiB uss=%.1f MiB",
+                event,
+                role,
+                pid,
+                memory.get("rss", 0) / 2**20,
+                memory.get("pss", 0) / 2**20,
+                memory.get("uss", 0) / 2**20,
+            )
+
+    def run(self) -> int:
+        signal.pthread_sigmask(signal.SIG_BLOCK, CONTROL_SIGNALS)
+        torch.set_num_threads(self.torch_threads)
+        self.report_memory("start")
+        service.activate_artifacts(self.prepare())
+        logger.info("Loaded chatbot model from %s", service.ARTIFACTS.get("checkpoint_path"))
+        self.workers = self.spawn_generation(self.worker_count)
+        self.report_memory("ready")
+        try:
+            while True:
+                received = signal.sigtimedwait(CONTROL_SIGNALS, 1.0)
+                self.reap()
+                if received is not None and received.si_signo in (signal.SIGINT, signal.SIGTERM):
+                    break
+                if received is not None and received.si_signo == RELOAD_SIGNAL:
+                    self.reload()
+                missing = self.worker_count - len(self.workers)
+                if missing > 0:
+                    try:
+                        self.workers.extend(self.spawn_generation(missing))
+                    except RuntimeError:
+                        logger.exception("Không khởi động lại được worker")
+        finally:
+            self.stop()
+        return 0
+
+    def stop(self) -> None:
+        self.retire(self.workers)
+        self.workers = []
+        while self.retiring:
+            self.reap()
+            time.sleep(0.05)
+        self.sock.close()
+
+
+async def _serve(server: uvicorn.Server, sock: socket.socket, ready_fd: int) -> None:
+    task = asyncio.ensure_future(server.serve(sockets=[sock]))
+    while not server.started and not task.done():
+        await asyncio.sleep(0.01)
+    if server.started:
+        os.write(ready_fd, b"1")
+    os.close(ready_fd)
+    await task
+
+
+def _kill(pid: int, sig: int) -> None:
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the chatbot from pre-forked workers sharing one model copy.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("CHATBOT_PREFORK_WORKERS", "2")))
+    parser.add_argument("--torch-threads", type=int, default=int(os.environ.get("CHATBOT_TORCH_THREADS", "1")))
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    sock = socket.create_server((args.host, args.port), backlog=2048)
+    job_dir = Path(tempfile.mkdtemp(prefix="chatbot-reload-"))
+    try:
+        supervisor = Supervisor(
+            sock,
+            args.workers,
+            ReloadChannel(job_dir, os.getpid()),
+            torch_threads=args.torch_threads,
+            log_level=args.log_level,
+        )
+        return supervisor.run()
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
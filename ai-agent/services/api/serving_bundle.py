@@ -0,0 +1,203 @@
+"""
+Lightweight serving bundle exported next to each BERT4Rec checkpoint.
+
+The bundle holds model hyperparameters, user/item vocabularies, per-user item
+sequences and (optionally) the model weights. Loading it replaces RecBole's
+``create_dataset`` + ``data_preparation`` at startup and, with weights, the
+``torch.load`` of the pickled checkpoint.
+
+Bundles are ``tensor_file`` files (safetensors layout, memory-mapped): the
+config sits in the header metadata, vocabularies are newline-terminated UTF-8
+byte arrays and weights are stored under ``weights.<state_dict key>``.
+Format 1 bundles (``.serving.npz``, no weights) are still loaded.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from data.storage.tensor_file import decode_strings, encode_strings, load_tensor_file, write_tensor_file
+
+from .history_index import UserHistoryIndex
+
+BUNDLE_SUFFIX = ".serving.safetensors"
+BUNDLE_FORMAT_VERSION = 2
+LEGACY_BUNDLE_SUFFIX = ".serving.npz"
+LEGACY_BUNDLE_FORMAT_VERSION = 1
+WEIGHTS_PREFIX = "weights."
+
+# Config entries read by RecBole's SequentialRecommender/BERT4Rec constructors.
+MODEL_CONFIG_KEYS = (
+    "USER_ID_FIELD",
+    "ITEM_ID_FIELD",
+    "TIME_FIELD",
+    "LIST_SUFFIX",
+    "ITEM_LIST_LENGTH_FIELD",
+    "NEG_PREFIX",
+    "MAX_ITEM_LIST_LENGTH",
+    "n_layers",
+    "n_heads",
+    "hidden_size",
+    "inner_size",
+    "hidden_dropout_prob",
+    "attn_dropout_prob",
+    "hidden_act",
+    "layer_norm_eps",
+    "mask_ratio",
+    "MASK_ITEM_SEQ",
+    "POS_ITEMS",
+    "NEG_ITEMS",
+    "MASK_INDEX",
+    "loss_type",
+    "initializer_range",
+)
+
+
+def serving_bundle_path(checkpoint_path: Path) -> Path:
+    resolved = Path(checkpoint_path).resolve()
+    return resolved.with_name(resolved.stem + BUNDLE_SUFFIX)
+
+
+def find_serving_bundle(checkpoint_path: Path) -> Optional[Path]:
+    """The bundle exported for ``checkpoint_path``, preferring the current format."""
+    path = serving_bundle_path(checkpoint_path)
+    legacy = path.with_name(path.name[: -len(BUNDLE_SUFFIX)] + LEGACY_BUNDLE_SUFFIX)
+    return next((candidate for candidate in (path, legacy) if candidate.exists()), None)
+
+
+class ServingDataset:
+    """Subset of the RecBole ``Dataset`` interface used at inference time."""
+
+    def __init__(self, config: Mapping[str, Any], user_tokens: np.ndarray, item_tokens: np.ndarray) -> None:
+        self.uid_field = config["USER_ID_FIELD"]
+        self.iid_field = config["ITEM_ID_FIELD"]
+        self.time_field = config.get("TIME_FIELD")
+        self.field2id_token = {self.uid_field: user_tokens, self.iid_field: item_tokens}
+        self.field2token_id = {
+            field: dict(zip(map(str, np.asarray(tokens).tolist()), range(len(tokens))))
+            for field, tokens in self.field2id_token.items()
+        }
+
+    @property
+    def user_num(self) -> int:
+        return len(self.field2id_token[self.uid_field])
+
+    @property
+    def item_num(self) -> int:
+        return len(self.field2id_token[self.iid_field])
+
+    def num(self, field: str) -> int:
+        return len(self.field2id_token[field])
+
+    def token2id(self, field: str, tokens: Iterable[str]) -> np.ndarray:
+        mapping = self.field2token_id[field]
+        ids: List[int] = []
+        for token in tokens:
+            if str(token) not in mapping:
+                raise ValueError(f"token [{token}] is not existed in {field}")
+            ids.append(mapping[str(token)])
+        return np.array(ids, dtype=np.int64)
+
+    def id2token(self, field: str, ids: Iterable[int]) -> np.ndarray:
+        return self.field2id_token[field][np.asarray(list(ids), dtype=np.int64)]
+
+
+@dataclass(frozen=True)
+class ServingBundle:
+    config: Dict[str, Any]
+    dataset: ServingDataset
+    history_index: UserHistoryIndex
+    # state_dict arrays mapped from the bundle; None when the weights must come from the checkpoint.
+    weights: Optional[Dict[str, np.ndarray]] = None
+
+
+def export_serving_bundle(
+    path: Path,
+    config: Mapping[str, Any],
+    dataset: Any,
+    weights: Optional[Mapping[str, np.ndarray]] = None,
+) -> Path:
+    """Write the bundle for a RecBole ``config``/``dataset`` pair atomically."""
+    inter_feat = dataset.inter_feat
+    time_field = dataset.time_field
+    history_index = UserHistoryIndex.build(
+        inter_feat[dataset.uid_field].numpy(),
+        inter_feat[dataset.iid_field].numpy(),
+        timestamps=inter_feat[time_field].numpy() if time_field and time_field in inter_feat else None,
+        user_num=dataset.user_num,
+    )
+    return write_serving_bundle(
+        path,
+        config,
+        np.asarray(dataset.field2id_token[dataset.uid_field]),
+        np.asarray(dataset.field2id_token[dataset.iid_field]),
+        history_index,
+        weights,
+    )
+
+
+def write_serving_bundle(
+    path: Path,
+    config: Mapping[str, Any],
+    user_tokens: np.ndarray,
+    item_tokens: np.ndarray,
+    history_index: UserHistoryIndex,
+    weights: Optional[Mapping[str, np.ndarray]] = None,
+) -> Path:
+    """
+    Write a bundle from vocabularies (index = internal id), a history index and
+    optionally the model ``state_dict`` as numpy arrays, atomically.
+    """
+    model_config = {key: config[key] for key in MODEL_CONFIG_KEYS}
+    arrays = {
+        "user_tokens": encode_strings(user_tokens),
+        "item_tokens": encode_strings(item_tokens),
+        "history.offsets": history_index.offsets,
+        "history.items": history_index.items,
+    }
+    for name, array in (weights or {}).items():
+        arrays[WEIGHTS_PREFIX + name] = np.asarray(array)
+    metadata = {"format_version": str(BUNDLE_FORMAT_VERSION), "config": json.dumps(model_config)}
+    return write_tensor_file(path, arrays, metadata)
+
+
+def load_serving_bundle(path: Path) -> ServingBundle:
+    with open(path, "rb") as fp:
+        legacy = fp.read(2) == b"PK"  # zip magic of a format 1 .npz bundle
+    if legacy:
+        return _load_legacy_serving_bundle(path)
+
+    arrays, metadata = load_tensor_file(path)
+    if metadata.get("format_version") != str(BUNDLE_FORMAT_VERSION):
+        raise ValueError(f"Serving bundle {path} có định dạng không hỗ trợ: {metadata.get('format_version')}")
+    config = json.loads(metadata["config"])
+    config["device"] = "cpu"
+    weights = {
+        name[len(WEIGHTS_PREFIX):]: array for name, array in arrays.items() if name.startswith(WEIGHTS_PREFIX)
+    }
+    return ServingBundle(
+        config=config,
+        dataset=ServingDataset(config, np.array(decode_strings(arrays["user_tokens"])), np.array(decode_strings(arrays["item_tokens"]))),
+        history_index=UserHistoryIndex(offsets=arrays["history.offsets"], items=arrays["history.items"]),
+        weights=weights or None,
+    )
+
+
+def _load_legacy_serving_bundle(path: Path) -> ServingBundle:
+    with np.load(path, allow_pickle=False) as payload:
+        header = json.loads(payload["header"].tobytes().decode("utf-8"))
+        if header.get("format_version") != LEGACY_BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Serving bundle {path} có định dạng không hỗ trợ: {header.get('format_version')}")
+        config = dict(header["config"])
+        config["device"] = "cpu"
+        dataset = ServingDataset(config, payload["user_tokens"], payload["item_tokens"])
+        history_index = UserHistoryIndex(
+            offsets=payload["history_offsets"],
+            items=payload["history_items"],
+        )
+    return ServingBundle(config=config, dataset=dataset, history_index=history_index)
@@ -0,0 +1,110 @@
+"""Bounded in-memory buffer of interaction events received since the last dataset snapshot."""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Tuple
+
+
+class SessionEventBuffer:
+    """
+    Per-user ring buffers of recent item tokens.
+
+    Memory is bounded three ways: at most ``max_events_per_user`` items per
+    user, at most ``max_users`` users (least recently active evicted first) and
+    users idle for ``ttl_seconds`` are dropped. Each append gets a process-wide
+    sequence number so callers can key caches on a user's buffer state.
+    Events carry their wall-clock arrival time so the ones already absorbed by
+    a newer snapshot can be dropped with ``discard_before``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_events_per_user: int = 50,
+        max_users: int = 100_000,
+        ttl_seconds: float = 1800.0,
+    ) -> None:
+        self.max_events_per_user = max(1, int(max_events_per_user))
+        self.max_users = max(0, int(max_users))
+        self.ttl_seconds = float(ttl_seconds)
+        # user token -> (last append time, revision, (arrival wall time, item token) oldest first)
+        self._users: "OrderedDict[str, Tuple[float, int, Deque[Tuple[float, str]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self._appended = 0
+        self._evicted = 0
+        self._expired = 0
+        self._discarded = 0
+
+    def append(self, user_token: str, item_token: str) -> None:
+        if self.max_users == 0:
+            return
+        now = time.monotonic()
+        arrived = time.time()
+        with self._lock:
+            entry = self._users.pop(user_token, None)
+            items = entry[2] if entry is not None else deque(maxlen=self.max_events_per_user)
+            items.append((arrived, item_token))
+            self._users[user_token] = (now, next(self._sequence), items)
+            self._appended += 1
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self._evicted += 1
+
+    def snapshot(self, user_token: str) -> Tuple[int, List[str]]:
+        """Return (revision, item tokens oldest first); revision 0 means no live events."""
+        with self._lock:
+            entry = self._users.get(user_token)
+            if entry is None:
+                return 0, []
+            last_seen, revision, items = entry
+            if self.ttl_seconds > 0 and last_seen + self.ttl_seconds < time.monotonic():
+                del self._users[user_token]
+                self._expired += 1
+                return 0, []
+            return revision, [item for _, item in items]
+
+    def discard_before(self, cutoff: float) -> int:
+        """
+        Drop events that arrived before the wall-clock time ``cutoff`` and return how many.
+
+        Users who keep events get a new revision; users left without any are removed.
+        """
+        discarded = 0
+        with self._lock:
+            for user_token in list(self._users):
+                last_seen, revision, items = self._users[user_token]
+                before = len(items)
+                while items and items[0][0] < cutoff:
+                    items.popleft()
+                if len(items) == before:
+                    continue
+                discarded += before - len(items)
+                if items:
+                    self._users[user_token] = (last_seen, next(self._sequence), items)
+                else:
+                    del self._users[user_token]
+            self._discarded += discarded
+        return discarded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "events": sum(len(items) for _, _, items in self._users.values()),
+                "max_users": self.max_users,
+                "max_events_per_user": self.max_events_per_user,
+                "ttl_seconds": self.ttl_seconds,
+                "appended": self._appended,
+                "evicted_users": self._evicted,
+                "expired_users": self._expired,
+                "discarded_events": self._discarded,
+            }
@@ -0,0 +1,159 @@
+"""
+Item-to-item neighbour table for "similar products".
+
+Similarity blends the cosine of BERT4Rec item embeddings with how often two
+items appear in the same browsing session of ``data/raw/interactions/``
+(normalised per item to [0, 1]). The table keeps the best ``top_n``
+neighbours of every item as dense arrays, so a lookup is a row slice.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.storage.interaction_store import load_interactions
+
+logger = logging.getLogger("ai_agent.service.similar")
+
+SIMILAR_TOP_N = int(os.environ.get("CHATBOT_SIMILAR_TOP_N", "20"))
+SIMILAR_COOCCURRENCE_WEIGHT = float(os.environ.get("CHATBOT_SIMILAR_COOCCURRENCE_WEIGHT", "0.5"))
+# Long sessions add quadratically many pairs; only their most recent items are paired.
+MAX_SESSION_ITEMS = 50
+
+
+@dataclass(frozen=True)
+class Cooccurrence:
+    """Symmetric session co-occurrence counts in CSR form over internal item ids."""
+
+    offsets: np.ndarray  # [n_items + 1]
+    columns: np.ndarray  # neighbour ids, grouped by row
+    weights: np.ndarray  # counts normalised by the row maximum
+
+
+def session_cooccurrence(
+    interactions_file: Path,
+    token2id: Mapping[str, int],
+    n_items: int,
+    max_session_items: int = MAX_SESSION_ITEMS,
+) -> Cooccurrence:
+    """Count, for every item pair, the sessions in which both items were seen."""
+    columns = ["session_id", "product_id", "timestamp"]
+    if Path(interactions_file).is_dir():
+        df = load_interactions(interactions_file, columns)
+    else:
+        # Timestamps only order a session here, so legacy CSV values are compared as text, unparsed.
+        df = pd.read_csv(interactions_file, usecols=columns, dtype=str)
+    df["item"] = df["product_id"].map(token2id)
+    df = df.dropna(subset=["session_id", "item"]).sort_values(["session_id", "timestamp"], kind="stable")
+    df = df.drop_duplicates(subset=["session_id", "item"], keep="last")
+    df = df.groupby("session_id", sort=False).tail(max_session_items)
+
+    sessions = df["session_id"].astype("category").cat.codes.to_numpy()
+    items = df["item"].to_numpy(dtype=np.int64)
+    pairs = pd.DataFrame({"session": sessions, "item": items})
+    joined = pairs.merge(pairs, on="session", suffixes=("", "_other"))
+    joined = joined[joined["item"] != joined["item_other"]]
+
+    keys = joined["item"].to_numpy() * n_items + joined["item_other"].to_numpy()
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    rows = unique_keys // n_items
+    columns = unique_keys % n_items
+    row_max = np.zeros(n_items, dtype=np.float64)
+    np.maximum.at(row_max, rows, counts)
+
+    offsets = np.zeros(n_items + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_items), out=offsets[1:])
+    return Cooccurrence(
+        offsets=offsets,
+        columns=columns.astype(np.int64),
+        weights=(counts / row_max[rows]).astype(np.float32),
+    )
+
+
+@dataclass(frozen=True)
+class SimilarItemsTable:
+    neighbors: np.ndarray  # [n_items, top_n] internal ids, -1 padded
+    scores: np.ndarray  # [n_items, top_n]
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        valid_mask: np.ndarray,
+        cooccurrence: Optional[Cooccurrence] = None,
+        *,
+        top_n: int = SIMILAR_TOP_N,
+        cooccurrence_weight: float = SIMILAR_COOCCURRENCE_WEIGHT,
+        block_size: int = 1024,
+    ) -> "SimilarItemsTable":
+        """
+        ``valid_mask[i]`` marks items that may be returned as neighbours;
+        rows are computed in blocks so memory stays ``O(block_size * n_items)``.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        n_items = len(embeddings)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        unit = embeddings / np.maximum(norms, 1e-12)
+        invalid_columns = ~np.asarray(valid_mask, dtype=bool)
+        top_n = max(0, min(top_n, int((~invalid_columns).sum()) - 1))
+
+        neighbors = np.full((n_items, top_n), -1, dtype=np.int32)
+        scores = np.zeros((n_items, top_n), dtype=np.float32)
+        if top_n == 0:
+            return cls(neighbors=neighbors, scores=scores)
+
+        for start in range(0, n_items, block_size):
+            stop = min(start + block_size, n_items)
+            block = unit[start:stop] @ unit.T
+            if cooccurrence is not None and cooccurrence_weight:
+                lo, hi = cooccurrence.offsets[start], cooccurrence.offsets[stop]
+                local_rows = np.repeat(np.arange(stop - start), np.diff(cooccurrence.offsets[start : stop + 1]))
+                block[local_rows, cooccurrence.columns[lo:hi]] += cooccurrence_weight * cooccurrence.weights[lo:hi]
+            block[:, invalid_columns] = -np.inf
+            block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+            best = np.argpartition(-block, top_n - 1, axis=1)[:, :top_n]
+            best_scores = np.take_along_axis(block, best, axis=1)
+            order = np.argsort(-best_scores, axis=1, kind="stable")
+            best = np.take_along_axis(best, order, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            finite = np.isfinite(best_scores)
+            neighbors[start:stop] = np.where(finite, best, -1)
+            scores[start:stop] = np.where(finite, best_scores, 0.0)
+
+        neighbors[invalid_columns] = -1
+        scores[invalid_columns] = 0.0
+        return cls(neighbors=neighbors, scores=scores)
+
+    @property
+    def top_n(self) -> int:
+        return int(self.neighbors.shape[1])
+
+    def lookup(self, internal_id: int, topk: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not 0 <= internal_id < len(self.neighbors):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        row = self.neighbors[internal_id, :topk]
+        valid = row >= 0
+        return row[valid], self.scores[internal_id, :topk][valid]
+
+
+def build_similar_items(
+    embeddings: np.ndarray,
+    valid_mask: np.ndarray,
+    interactions_file: Optional[Path],
+    token2id: Mapping[str, int],
+) -> SimilarItemsTable:
+    cooccurrence = None
+    if interactions_file is not None and interactions_file.exists():
+        try:
+            cooccurrence = session_cooccurrence(interactions_file, token2id, len(embeddings))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Không thể đếm đồng xuất hiện từ %s: %s", interactions_file, exc)
+    return SimilarItemsTable.build(embeddings, valid_mask, cooccurrence)
@@ -0,0 +1,112 @@
+"""
+Precomputed per-user top-K recommendations for one checkpoint.
+
+The table is a directory next to the checkpoint (``<checkpoint>.topk``) holding
+``.npy`` arrays indexed by internal user id, opened with ``mmap_mode="r"`` so
+serving a row costs a page read rather than a forward pass:
+
+* ``item_ids.npy``        – ``[users, k]`` internal item ids, ``-1`` padded.
+* ``scores.npy``          – ``[users, k]`` model scores.
+* ``history_lengths.npy`` – ``[users]`` history length the row was computed from.
+* ``meta.json``           – format version, checkpoint hash and ``k``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+TOPK_TABLE_SUFFIX = ".topk"
+TOPK_TABLE_FORMAT_VERSION = 1
+
+
+def topk_table_path(checkpoint_path: Path) -> Path:
+    resolved = Path(checkpoint_path).resolve()
+    return resolved.with_name(resolved.stem + TOPK_TABLE_SUFFIX)
+
+
+@dataclass(frozen=True)
+class TopKTable:
+    item_ids: np.ndarray
+    scores: np.ndarray
+    history_lengths: np.ndarray
+    meta: Dict[str, Any]
+
+    @property
+    def k(self) -> int:
+        return int(self.item_ids.shape[1])
+
+    @property
+    def user_count(self) -> int:
+        return int(self.item_ids.shape[0])
+
+    def lookup(self, uid: int, topk: int, history_length: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Return (internal item ids, scores) for ``uid``, or None when the row
+        cannot answer: ``topk`` exceeds the table, or the user's history no
+        longer has the length the row was computed from.
+        """
+        if topk > self.k or not 0 <= uid < self.user_count or history_length == 0:
+            return None
+        if int(self.history_lengths[uid]) != history_length:
+            return None
+        row = np.asarray(self.item_ids[uid, :topk])
+        valid = row >= 0
+        return row[valid], np.asarray(self.scores[uid, :topk])[valid]
+
+
+def write_topk_table(
+    path: Path,
+    item_ids: np.ndarray,
+    scores: np.ndarray,
+    history_lengths: np.ndarray,
+    meta: Dict[str, Any],
+) -> Path:
+    """Write the table directory atomically (build in a temp dir, then rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}."))
+    os.chmod(tmp_dir, 0o755)
+    try:
+        np.save(tmp_dir / "item_ids.npy", np.ascontiguousarray(item_ids, dtype=np.int32))
+        np.save(tmp_dir / "scores.npy", np.ascontiguousarray(scores, dtype=np.float32))
+        np.save(tmp_dir / "history_lengths.npy", np.ascontiguousarray(history_lengths, dtype=np.int64))
+        header = {**meta, "format_version": TOPK_TABLE_FORMAT_VERSION, "k": int(item_ids.shape[1])}
+        with open(tmp_dir / "meta.json", "w", encoding="utf-8") as fp:
+            json.dump(header, fp, ensure_ascii=False, indent=2)
+
+        # Directories cannot be replaced in one rename; move the old table aside first.
+        stale_dir = None
+        if path.exists():
+            stale_dir = path.with_name(f".{path.name}.old")
+            if stale_dir.exists():
+                shutil.rmtree(stale_dir)
+            os.replace(path, stale_dir)
+        os.replace(tmp_dir, path)
+        if stale_dir is not None:
+            shutil.rmtree(stale_dir, ignore_errors=True)
+    finally:
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return path
+
+
+def load_topk_table(path: Path) -> TopKTable:
+    path = Path(path)
+    with open(path / "meta.json", encoding="utf-8") as fp:
+        meta = json.load(fp)
+    if meta.get("format_version") != TOPK_TABLE_FORMAT_VERSION:
+        raise ValueError(f"Bảng top-K {path} có định dạng không hỗ trợ: {meta.get('format_version')}")
+    return TopKTable(
+        item_ids=np.load(path / "item_ids.npy", mmap_mode="r"),
+        scores=np.load(path / "scores.npy", mmap_mode="r"),
+        history_lengths=np.load(path / "history_lengths.npy", mmap_mode="r"),
+        meta=meta,
+    )
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Offline bulk top-K precomputation for the chatbot recommender.
+
+Scores every user of a published checkpoint in large batches (optionally
+across a process pool) and writes the memory-mappable ``<checkpoint>.topk``
+table next to it. The chatbot serves users from the table and only runs the
+model for users whose history changed after the snapshot.
+
+Usage:
+  python tasks/precompute_recommendations.py                       # checkpoint the chatbot would load
+  python tasks/precompute_recommendations.py --checkpoint recommender/saved/versions/BERT4Rec-xxx.pth --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+  sys.path.insert(0, str(PROJECT_ROOT))
+
+from services.api import app as service  # noqa: E402
+from services.api.inference_batcher import score_sequences  # noqa: E402
+from services.api.topk_table import topk_table_path, write_topk_table  # noqa: E402
+
+LOGGER = logging.getLogger("ai_agent.precompute")
+
+DEFAULT_TOPK = 50
+DEFAULT_BATCH_SIZE = 256
+
+# Loaded once in the parent; forked workers inherit it copy-on-write.
+_ARTIFACTS: Dict[str, object] = {}
+
+
+def score_users(uids: np.ndarray, topk: int, batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+  """Return ``[len(uids), topk]`` internal item ids (-1 padded) and scores."""
+  scorer = _ARTIFACTS["scorer"]
+  history_index = _ARTIFACTS["history_index"]
+  item_lookup = _ARTIFACTS["item_lookup"]
+  max_len = int(_ARTIFACTS["config"]["MAX_ITEM_LIST_LENGTH"])
+
+  item_ids = np.full((len(uids), topk), -1, dtype=np.int32)
+  scores = np.zeros((len(uids), topk), dtype=np.float32)
+  for start in range(0, len(uids), batch_size):
+    chunk = uids[start:start + batch_size]
+    sequences = [history_index.recent(int(uid), max_len).tolist() for uid in chunk]
+    seen = [history_index.history(int(uid)) for uid in chunk]
+    indices, values, counts = item_lookup.top_indices_batch(score_sequences(scorer, sequences), seen, topk)
+    for row, count in enumerate(counts.tolist()):
+      item_ids[start + row, :count] = indices[row, :count]
+      scores[start + row, :count] = values[row, :count]
+  return item_ids, scores
+
+
+def _score_in_worker(uids: np.ndarray, topk: int, batch_size: int) -> Tuple[np.ndarray, np.ndarray]:
+  torch.set_num_threads(1)
+  return score_users(uids, topk, batch_size)
+
+
+def precompute(checkpoint: Optional[Path], topk: int, batch_size: int, workers: int) -> Path:
+  global _ARTIFACTS
+  started = time.perf_counter()
+  # Exact full-sort scores regardless of the serving backend; the endpoint-only structures are not built.
+  _ARTIFACTS = service.load_artifacts(
+      checkpoint,
+      backend=service.TOPK_TABLE_BACKEND,
+      retrieval="full",
+      serving=False,
+  )
+  checkpoint_path = Path(_ARTIFACTS["checkpoint_path"])
+  history_index = _ARTIFACTS["history_index"]
+
+  lengths = np.diff(history_index.offsets)
+  active = np.flatnonzero(lengths > 0)
+  item_ids = np.full((history_index.user_count, topk), -1, dtype=np.int32)
+  scores = np.zeros((history_index.user_count, topk), dtype=np.float32)
+
+  if workers > 1 and len(active) > batch_size:
+    shards: List[np.ndarray] = np.array_split(active, workers)
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+      results = list(pool.map(_score_in_worker, shards, [topk] * len(shards), [batch_size] * len(shards)))
+    for shard, (shard_ids, shard_scores) in zip(shards, results):
+      item_ids[shard] = shard_ids
+      scores[shard] = shard_scores
+  else:
+    item_ids[active], scores[active] = score_users(active, topk, batch_size)
+
+  path = write_topk_table(
+      topk_table_path(checkpoint_path),
+      item_ids,
+      scores,
+      lengths,
+      {
+          "checkpoint": str(checkpoint_path),
+          "checkpoint_sha256": _ARTIFACTS["checkpoint_sha256"],
+          "model_version": _ARTIFACTS["model_version"],
+          "inference_backend": _ARTIFACTS["inference_backend"],
+          "users": int(history_index.user_count),
+          "scored_users": int(len(active)),
+          "created_at": datetime.now(UTC).isoformat(),
+      },
+  )
+  LOGGER.info(
+      "Precomputed top-%s for %s users in %.1fs → %s",
+      topk,
+      len(active),
+      time.perf_counter() - started,
+      path,
+  )
+  return path
+
+
+def parse_args() -> argparse.Namespace:
+  parser = argparse.ArgumentParser(description="Precompute per-user top-K recommendations for a checkpoint.")
+  parser.add_argument("--checkpoint", type=Path, help="Checkpoint to score (default: the one the chatbot loads).")
+  parser.add_argument("--topk", type=int, default=DEFAULT_TOPK, help="Items kept per user.")
+  parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Users per forward pass.")
+  parser.add_argument("--workers", type=int, default=1, help="Scoring processes (forked after loading).")
+  return parser.parse_args()
+
+
+def main() -> int:
+  logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+  args = parse_args()
+  path = precompute(args.checkpoint, args.topk, args.batch_size, args.workers)
+  print(f"📦 Đã ghi bảng top-K {path}")
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -61,6 +61,11 @@ SERVING_DIR = PROJECT_ROOT / "recommender" / "saved"
 SERVING_VERSIONS = SERVING_DIR / "versions"
 SERVING_CURRENT_LINK = SERVING_DIR / "current.pth"
 SERVING_LATEST_MANIFEST = SERVING_DIR / "latest_model.json"
+SERVING_BUNDLE_SUFFIX = ".serving.safetensors"
+# TorchScript artifacts for CHATBOT_INFERENCE_BACKEND=scripted|quantized.
+INFERENCE_MODEL_SUFFIXES = (".scripted.pt", ".int8.pt")
+TOPK_TABLE_SUFFIX = ".topk"
+TASKS_DIR = PROJECT_ROOT / "tasks"
 
 DEFAULT_INTERVAL_SECONDS = int(os.getenv("AI_RETRAIN_INTERVAL", "300"))
 DEFAULT_KEEP_VERSIONS = int(os.getenv("AI_RETRAIN_KEEP_VERSIONS", "6"))
@@ -125,11 +130,11 @@ def ensure_relative_symlink(link_path: Path, target: Path, *, is_dir: bool = Fal
   os.replace(tmp_link, link_path)
 
 
-def prune_versions(directory: Path, keep: int) -> None:
+def prune_versions(directory: Path, keep: int, pattern: str = "*") -> None:
   if keep <= 0 or not directory.exists():
     return
   versions = sorted(
-      [path for path in directory.iterdir() if path.is_file() or path.is_dir()],
+      [path for path in directory.glob(pattern) if path.is_file() or path.is_dir()],
       key=lambda p: p.stat().st_mtime,
       reverse=True,
   )
@@ -150,7 +155,7 @@ def load_latest_dataset_manifest() -> Optional[Dict[str, Any]]:
   return None
 
 
-def publish_latest_checkpoint(keep: int) -> Dict[str, Any]:
+def publish_latest_checkpoint(keep: int, dataset_manifest: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
   SERVING_DIR.mkdir(parents=True, exist_ok=True)
   SERVING_VERSIONS.mkdir(parents=True, exist_ok=True)
 
@@ -166,15 +171,40 @@ def publish_latest_checkpoint(keep: int) -> Dict[str, Any]:
   dest_version = SERVING_VERSIONS / src.name
   shutil.copy2(src, dest_version)
 
+  # The serving bundle lets the chatbot skip RecBole dataset preparation and checkpoint unpickling on (re)load.
+  src_bundle = src.with_name(src.stem + SERVING_BUNDLE_SUFFIX)
+  dest_bundle: Optional[Path] = None
+  if src_bundle.exists():
+    dest_bundle = SERVING_VERSIONS / src_bundle.name
+    shutil.copy2(src_bundle, dest_bundle)
+  else:
+    LOGGER.warning("Serving bundle %s not found; chatbot will rebuild the dataset on reload.", src_bundle)
+
+  inference_models: Dict[str, str] = {}
+  for suffix in INFERENCE_MODEL_SUFFIXES:
+    src_model = src.with_name(src.stem + suffix)
+    if src_model.exists():
+      dest_model = SERVING_VERSIONS / src_model.name
+      shutil.copy2(src_model, dest_model)
+      inference_models[suffix] = str(dest_model)
+
   ensure_relative_symlink(SERVING_CURRENT_LINK, dest_version)
 
-  prune_versions(SERVING_VERSIONS, keep)
+  prune_versions(SERVING_VERSIONS, keep, pattern="BERT4Rec-*.pth")
+  prune_versions(SERVING_VERSIONS, keep, pattern=f"*{SERVING_BUNDLE_SUFFIX}")
+  for suffix in INFERENCE_MODEL_SUFFIXES:
+    prune_versions(SERVING_VERSIONS, keep, pattern=f"*{suffix}")
 
   manifest = {
       "version": src.stem.replace("BERT4Rec-", "", 1),
       "saved_at": iso(datetime.fromtimestamp(dest_version.stat().st_mtime, tz=UTC)),
       "file": str(dest_version),
+      "bundle": str(dest_bundle) if dest_bundle else None,
+      "inference_models": inference_models,
       "current_link": str(SERVING_CURRENT_LINK),
+      # Extraction watermark of the training data; the chatbot drops live events up to it on reload.
+      "dataset_version": (dataset_manifest or {}).get("version"),
+      "source_watermark": (dataset_manifest or {}).get("source_watermark"),
   }
 
   tmp_path = SERVING_LATEST_MANIFEST.with_suffix(SERVING_LATEST_MANIFEST.suffix + ".tmp")
@@ -186,13 +216,26 @@ def publish_latest_checkpoint(keep: int) -> Dict[str, Any]:
   return manifest
 
 
+def precompute_recommendations(manifest: Dict[str, Any], keep: int) -> Optional[str]:
+  """Build the per-user top-K table for the published checkpoint; the chatbot falls back to live inference without it."""
+  try:
+    run_step([sys.executable, "precompute_recommendations.py", "--checkpoint", manifest["file"]], TASKS_DIR)
+  except Exception as exc:  # noqa: BLE001
+    LOGGER.warning("Không thể tính trước bảng top-K: %s", exc)
+    return None
+  prune_versions(SERVING_VERSIONS, keep, pattern=f"*{TOPK_TABLE_SUFFIX}")
+  table = Path(manifest["file"]).with_suffix(TOPK_TABLE_SUFFIX)
+  return str(table) if table.exists() else None
+
+
 def trigger_chatbot_reload(manifest: Dict[str, Any]) -> None:
   url = (CHATBOT_RELOAD_URL or "").strip()
   if not url:
     LOGGER.info("CHATBOT_RELOAD_URL không được thiết lập, bỏ qua reload chatbot.")
     return
 
-  payload: Dict[str, Any] = {}
+  # The chatbot skips the rebuild when it already serves this version.
+  payload: Dict[str, Any] = {"expected_version": manifest.get("version")}
   if CHATBOT_RELOAD_TOKEN:
     payload["token"] = CHATBOT_RELOAD_TOKEN
 
@@ -297,8 +340,11 @@ def execute_pipeline(keep_versions: int) -> RunResult:
   prune_versions(DATASET_VERSIONS, keep_versions)
 
   run_step([sys.executable, "train_bert4rec.py"], TRAINING_DIR)
+  run_step([sys.executable, "export_serving_bundle.py"], TRAINING_DIR)
+  run_step([sys.executable, "export_inference_model.py"], TRAINING_DIR)
 
-  model_manifest = publish_latest_checkpoint(keep_versions)
+  model_manifest = publish_latest_checkpoint(keep_versions, dataset_manifest)
+  model_manifest["topk_table"] = precompute_recommendations(model_manifest, keep_versions)
   trigger_chatbot_reload(model_manifest)
 
   finished = now()
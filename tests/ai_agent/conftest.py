@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+AI_AGENT_DIR = Path(__file__).resolve().parents[2] / "ai-agent"
+if str(AI_AGENT_DIR) not in sys.path:
+    sys.path.insert(0, str(AI_AGENT_DIR))
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+
+from services.api.ann_index import IVFIndex
+
+
+def exact_topk(queries: np.ndarray, embeddings: np.ndarray, bias: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ embeddings.T + bias
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def test_probing_every_list_matches_exact_inner_product_search() -> None:
+    rng = np.random.default_rng(3)
+    embeddings = rng.normal(size=(300, 8)).astype(np.float32)
+    bias = rng.normal(size=300).astype(np.float32)
+    queries = rng.normal(size=(5, 8)).astype(np.float32)
+    index = IVFIndex.build(embeddings, bias, np.arange(300) + 1000, n_lists=12)
+
+    candidates = index.search(queries, k=10, nprobe=index.n_lists)
+
+    np.testing.assert_array_equal(candidates, exact_topk(queries, embeddings, bias, 10) + 1000)
+
+
+def test_lists_partition_items_and_short_results_are_padded() -> None:
+    rng = np.random.default_rng(4)
+    embeddings = rng.normal(size=(40, 4)).astype(np.float32)
+    index = IVFIndex.build(embeddings, np.zeros(40), np.arange(40), n_lists=6)
+
+    assert index.offsets[-1] == 40
+    assert sorted(index.item_ids.tolist()) == list(range(40))
+    list_of_item = dict(zip(index.item_ids.tolist(), index.row_lists.tolist()))
+    candidates = index.search(rng.normal(size=(3, 4)), k=60, nprobe=1)
+    for row in candidates:
+        found = row[row >= 0]
+        assert 0 < found.size < 40
+        assert (row[found.size:] == -1).all()
+        assert len({list_of_item[item] for item in found.tolist()}) == 1
+
+
+def test_clustered_catalog_recall_with_few_probes() -> None:
+    rng = np.random.default_rng(5)
+    centers = rng.normal(size=(20, 16)).astype(np.float32) * 3
+    embeddings = centers[rng.integers(20, size=2000)] + rng.normal(size=(2000, 16)).astype(np.float32) * 0.3
+    bias = np.zeros(2000, dtype=np.float32)
+    queries = centers[rng.integers(20, size=50)]
+    index = IVFIndex.build(embeddings, bias, np.arange(2000))
+
+    expected = exact_topk(queries, embeddings, bias, 10)
+    actual = index.search(queries, k=10, nprobe=8)
+
+    recall = np.mean([len(set(want) & set(got)) / 10 for want, got in zip(expected, actual)])
+    assert recall >= 0.9
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
+
+from services.api.history_index import UserHistoryIndex
+
+
+def test_history_is_grouped_by_user_and_ordered_by_time() -> None:
+    users = np.array([2, 1, 2, 1, 2])
+    items = np.array([10, 20, 30, 40, 50])
+    timestamps = np.array([5, 3, 1, 4, 2])
+
+    index = UserHistoryIndex.build(users, items, timestamps=timestamps, user_num=4)
+
+    assert index.user_count == 4
+    assert index.history(1).tolist() == [20, 40]
+    assert index.history(2).tolist() == [30, 50, 10]
+    assert index.history(3).tolist() == []
+
+
+def test_recent_returns_tail_and_handles_unknown_users() -> None:
+    index = UserHistoryIndex.build(np.array([1, 1, 1]), np.array([7, 8, 9]), user_num=2)
+
+    assert index.recent(1, 2).tolist() == [8, 9]
+    assert index.recent(1, 10).tolist() == [7, 8, 9]
+    assert index.recent(5, 2).tolist() == []
+    assert index.recent(1, 0).tolist() == []
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("recbole")
+
+from recbole.model.sequential_recommender import BERT4Rec  # noqa: E402
+
+from services.api.inference_backends import (  # noqa: E402
+    export_backend_artifacts,
+    load_inference_backend,
+)
+from services.api.serving_bundle import ServingDataset  # noqa: E402
+
+MAX_LEN = 6
+CONFIG = {
+    "USER_ID_FIELD": "user_id",
+    "ITEM_ID_FIELD": "item_id",
+    "TIME_FIELD": "timestamp",
+    "LIST_SUFFIX": "_list",
+    "ITEM_LIST_LENGTH_FIELD": "item_length",
+    "NEG_PREFIX": "neg_",
+    "MAX_ITEM_LIST_LENGTH": MAX_LEN,
+    "n_layers": 1,
+    "n_heads": 2,
+    "hidden_size": 8,
+    "inner_size": 16,
+    "hidden_dropout_prob": 0.1,
+    "attn_dropout_prob": 0.1,
+    "hidden_act": "gelu",
+    "layer_norm_eps": 1e-12,
+    "mask_ratio": 0.2,
+    "MASK_ITEM_SEQ": "Mask_item_id_list",
+    "POS_ITEMS": "Pos_item_id",
+    "NEG_ITEMS": "Neg_item_id",
+    "MASK_INDEX": "MASK_INDEX",
+    "loss_type": "CE",
+    "initializer_range": 0.02,
+    "device": "cpu",
+}
+
+
+@pytest.fixture()
+def model() -> BERT4Rec:
+    torch.manual_seed(0)
+    dataset = ServingDataset(
+        CONFIG,
+        np.array(["[PAD]", "u1", "u2"]),
+        np.array(["[PAD]"] + [str(item) for item in range(1, 12)]),
+    )
+    return BERT4Rec(CONFIG, dataset).eval()
+
+
+def batch(lengths):
+    item_seq = torch.zeros((len(lengths), max(lengths)), dtype=torch.long)
+    for row, length in enumerate(lengths):
+        item_seq[row, :length] = torch.arange(1, length + 1)
+    return {"item_id_list": item_seq, "item_length": torch.tensor(lengths, dtype=torch.long)}
+
+
+def test_scripted_backend_matches_eager_for_unseen_batch_shapes(model: BERT4Rec) -> None:
+    backend = load_inference_backend("scripted", model, None, max_len=MAX_LEN)
+
+    with torch.no_grad():
+        for lengths in ([3], [MAX_LEN, 2, 4], [1, 1, 1, 1, 5]):
+            interaction = batch(lengths)
+            expected = model.full_sort_predict(interaction)
+            torch.testing.assert_close(backend.full_sort_predict(interaction), expected)
+
+
+def test_exported_artifacts_are_loaded_next_to_checkpoint(model: BERT4Rec, tmp_path: Path) -> None:
+    checkpoint = tmp_path / "BERT4Rec-test.pth"
+    checkpoint.write_bytes(b"")
+
+    written = export_backend_artifacts(model, checkpoint, MAX_LEN)
+
+    assert sorted(path.name for path in written.values()) == ["BERT4Rec-test.int8.pt", "BERT4Rec-test.scripted.pt"]
+    assert all(path.stat().st_mode & 0o777 == 0o644 for path in written.values())
+    interaction = batch([4, 2])
+    with torch.no_grad():
+        quantized = load_inference_backend("quantized", model, checkpoint, max_len=MAX_LEN)
+        assert quantized.full_sort_predict(interaction).shape == (2, model.n_items)
+
+
+def test_unknown_backend_is_rejected(model: BERT4Rec) -> None:
+    with pytest.raises(ValueError):
+        load_inference_backend("onnx", model, None, max_len=MAX_LEN)
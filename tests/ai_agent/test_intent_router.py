@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import unicodedata
+from pathlib import Path
+
+import pytest
+
+from services.api.intent_router import IntentRouter, normalize_text
+
+CONFIG = {
+    "recommendation": {"keywords": ["gợi ý", "gợi ý sản phẩm", "recommend"]},
+    "faq": [
+        {"topic": "delivery", "keywords": ["giao"], "reply": "delivery"},
+        {"topic": "shipping_fee", "keywords": ["ship"], "reply": "shipping"},
+        {"topic": "warranty", "keywords": ["bảo hành"], "reply": "warranty"},
+    ],
+    "fallback_reply": "fallback",
+}
+
+
+def test_normalize_text_folds_vietnamese_diacritics() -> None:
+    assert normalize_text("GỢI Ý Sản Phẩm Đẹp") == "goi y san pham dep"
+    # Decomposed input (base letter + combining marks) folds the same way.
+    assert normalize_text(unicodedata.normalize("NFD", "Gợi ý")) == "goi y"
+
+
+def test_keywords_match_with_or_without_diacritics() -> None:
+    router = IntentRouter.from_config(CONFIG)
+
+    for message in ("Gợi ý sản phẩm cho user 12", "goi   y san pham cho user 12"):
+        intent = router.route(message)
+        assert intent.name == "recommendation"
+        assert intent.keywords == ("goi y san pham",)
+        assert intent.entities == {"user_id": "12"}
+
+
+def test_first_faq_rule_in_table_order_wins() -> None:
+    router = IntentRouter.from_config(CONFIG)
+
+    intent = router.route("Phí SHIP và thời gian GIAO hàng cho đơn 55?")
+
+    assert (intent.name, intent.topic, intent.reply) == ("faq", "delivery", "delivery")
+    assert intent.keywords == ("ship", "giao")
+    assert intent.entities == {"user_id": "55"}
+
+
+def test_keywords_must_start_a_word_and_unmatched_messages_fall_back() -> None:
+    router = IntentRouter.from_config(CONFIG)
+
+    assert router.route("relationship tips").name == "fallback"
+    assert router.route("Bảo hành bao lâu?").topic == "warranty"
+    intent = router.route("Giá bao nhiêu vậy")
+    assert (intent.name, intent.reply, intent.entities) == ("fallback", "fallback", {})
+
+
+def test_starred_keywords_also_match_inside_words() -> None:
+    config = {**CONFIG, "faq": [*CONFIG["faq"], {"topic": "order", "keywords": ["*order"], "reply": "order"}]}
+    router = IntentRouter.from_config(config)
+
+    for message in ("Reorder đơn 12", "preorder máy ảnh", "order của tôi"):
+        intent = router.route(message)
+        assert (intent.topic, intent.keywords) == ("order", ("order",))
+    assert router.route("freeship không?").name == "fallback"  # "ship" still has to start a word
+
+
+def test_keyword_shared_by_two_intents_is_rejected() -> None:
+    config = {**CONFIG, "faq": [{"topic": "x", "keywords": ["goi y"], "reply": "x"}]}
+    with pytest.raises(ValueError):
+        IntentRouter.from_config(config)
+
+
+def test_shipped_intent_table_loads() -> None:
+    path = Path(__file__).resolve().parents[2] / "ai-agent" / "services" / "api" / "intents.json"
+
+    router = IntentRouter.load(path)
+
+    assert router.route("goi y cho minh").name == "recommendation"
+    assert router.route("thanh toán thế nào").topic == "payment"
+    assert router.route("Mình muốn reorder").topic == "order_tracking"
+    assert router.route("có freeship không").topic == "shipping_fee"
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data.storage.interaction_store import (
+    load_interactions,
+    partition_days,
+    read_store,
+    write_day_partitions,
+    write_events,
+)
+
+
+def test_events_are_split_by_day_and_read_back_typed(tmp_path: Path) -> None:
+    events = pd.DataFrame({
+        "session_id": ["s1", "s1", "s2"],
+        "user_id": ["u1", "u1", "u2"],
+        "product_id": ["10", "20", "10"],
+        "timestamp": pd.to_datetime(
+            ["2025-10-01 23:59:59", "2025-10-02 00:00:01", "2025-10-02 08:00:00"], utc=True
+        ).as_unit("us").asi8,
+        "event_type": ["view", "purchase", "view"],
+    })
+
+    files = write_day_partitions(tmp_path, events, "part-0")
+
+    assert files == ["day=2025-10-01/part-0.safetensors", "day=2025-10-02/part-0.safetensors"]
+    assert partition_days(tmp_path) == ["2025-10-01", "2025-10-02"]
+    second_day = read_store(tmp_path, days=["2025-10-02"])
+    assert second_day["product_id"].dtype == "category"
+    assert second_day["timestamp"].dtype == "int64"
+    assert second_day["event_type"].tolist() == ["purchase", "view"]
+    assert load_interactions(tmp_path, ["product_id", "timestamp"]).equals(events[["product_id", "timestamp"]])
+
+
+def test_legacy_csv_is_read_with_the_same_types(tmp_path: Path) -> None:
+    csv = tmp_path / "interactions.csv"
+    csv.write_text("session_id,product_id,timestamp\ns1,10,2025-10-01 10:00:00\ns1,20,not-a-date\n")
+
+    df = load_interactions(csv, ["product_id", "timestamp"])
+
+    assert df["product_id"].tolist() == ["10"]
+    assert df["timestamp"].tolist() == [pd.Timestamp("2025-10-01 10:00:00", tz="UTC").value // 1000]
+
+
+def test_dictionaries_of_several_files_merge_into_sorted_categories(tmp_path: Path) -> None:
+    day = pd.Timestamp("2025-10-01", tz="UTC").value // 1000
+    first = pd.DataFrame({
+        "session_id": ["phiên-dài-hơn-tám-byte", "b"],
+        "user_id": ["u2", "u10"],
+        "product_id": ["9", "10"],
+        "timestamp": [day, day + 1],
+        "event_type": ["view", "click"],
+    })
+    second = first.iloc[::-1].assign(session_id=["a", "phiên-dài-hơn-tám-byte"], timestamp=[day + 2, day + 3])
+    write_events(tmp_path / "day=2025-10-01" / "a.safetensors", first)
+    write_events(tmp_path / "day=2025-10-01" / "b.safetensors", second)
+
+    df = read_store(tmp_path)
+
+    assert df["session_id"].cat.categories.tolist() == sorted({*first["session_id"], *second["session_id"]})
+    assert df["product_id"].cat.categories.tolist() == ["10", "9"]
+    assert df["session_id"].tolist() == [*first["session_id"], *second["session_id"]]
+    assert df["user_id"].tolist() == ["u2", "u10", "u10", "u2"]
+
+
+def test_missing_ids_stay_missing_and_similar_strings_stay_distinct(tmp_path: Path) -> None:
+    day = pd.Timestamp("2025-10-01", tz="UTC").value // 1000
+    events = pd.DataFrame({
+        "session_id": [None, "s", "s\0"],
+        "user_id": ["u1", np.nan, "u1"],
+        "product_id": ["9", "9", "10"],
+        "timestamp": [day, day + 1, day + 2],
+        "event_type": ["view", "view", "click"],
+    })
+    write_events(tmp_path / "day=2025-10-01" / "a.safetensors", events)
+
+    df = read_store(tmp_path)
+    loaded = load_interactions(tmp_path, ["session_id", "user_id"])
+
+    assert df["session_id"].cat.categories.tolist() == ["s", "s\0"]
+    assert df["session_id"].isna().tolist() == [True, False, False]
+    assert loaded["user_id"].isna().tolist() == [False, True, False]
+    assert "nan" not in loaded["user_id"].tolist()
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from services.api.item_lookup import ItemLookup  # noqa: E402
+
+
+@pytest.fixture()
+def lookup() -> ItemLookup:
+    return ItemLookup.build(["[PAD]", "11", "12", "abc", "14", "15"], {"12": "Áo khoác"})
+
+
+def test_top_items_skips_seen_and_invalid_tokens(lookup: ItemLookup) -> None:
+    scores = torch.tensor([9.0, 1.0, 5.0, 8.0, 3.0, 4.0])
+
+    item_ids, names, values = lookup.top_items(scores, np.array([5]), topk=2)
+
+    assert item_ids.tolist() == [12, 14]
+    assert names.tolist() == ["Áo khoác", "Sản phẩm 14"]
+    assert values.tolist() == [5.0, 3.0]
+
+
+def test_batch_matches_row_by_row(lookup: ItemLookup) -> None:
+    torch.manual_seed(1)
+    scores = torch.randn(4, 6)
+    seen = [np.array([1, 2]), np.array([], dtype=np.int64), np.array([1, 2, 4, 5]), np.array([4])]
+
+    batch = lookup.top_items_batch(scores, seen, topk=3)
+
+    for row, (item_ids, names, values) in enumerate(batch):
+        expected_ids, expected_names, expected_values = lookup.top_items(scores[row], seen[row], topk=3)
+        assert item_ids.tolist() == expected_ids.tolist()
+        assert names.tolist() == expected_names.tolist()
+        np.testing.assert_allclose(values, expected_values)
+    assert batch[2][0].size == 0
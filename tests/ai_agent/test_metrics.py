@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+
+from services.api.metrics import MetricsRegistry
+
+
+def test_render_counters_gauges_and_cumulative_histogram_buckets() -> None:
+    registry = MetricsRegistry()
+    requests = registry.counter("chatbot_requests_total", "Requests.", ["intent"])
+    latency = registry.histogram("stage_seconds", "Latency.", ["stage"], buckets=(0.01, 0.1))
+    registry.gauge("model_ready", "Ready.", callback=lambda: [((), 1.0)])
+
+    requests.inc("faq")
+    requests.inc("faq")
+    requests.inc('re"co')
+    for value in (0.005, 0.01, 0.05, 3.0):
+        latency.observe(value, "forward")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE chatbot_requests_total counter" in lines
+    assert 'chatbot_requests_total{intent="faq"} 2' in lines
+    assert 'chatbot_requests_total{intent="re\\"co"} 1' in lines
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{stage="forward",le="0.01"} 2' in lines
+    assert 'stage_seconds_bucket{stage="forward",le="0.1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="forward",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="forward"} 4' in lines
+    assert "model_ready 1" in lines
+    assert latency.count("forward") == 4
+
+
+def test_duplicate_metric_names_are_rejected() -> None:
+    registry = MetricsRegistry()
+    registry.counter("dup_total", "First.")
+    with pytest.raises(ValueError):
+        registry.gauge("dup_total", "Second.")
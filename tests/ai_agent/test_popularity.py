@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from services.api.popularity import build_popularity_ranking, rank_from_counts, rank_from_interactions
+
+
+def test_interactions_are_weighted_by_event_type_and_recency(tmp_path: Path) -> None:
+    interactions = tmp_path / "interactions.csv"
+    interactions.write_text(
+        "session_id,user_id,product_id,timestamp,event_type\n"
+        "s1,1,10,2025-01-01 00:00:00,view\n"
+        "s1,1,10,2025-01-01 00:01:00,view\n"
+        "s2,2,20,2025-01-01 00:00:00,purchase\n"
+        "s3,3,30,2024-01-01 00:00:00,purchase\n"
+        "s4,4,40,2025-01-01 00:00:00,reject\n",
+        encoding="utf-8",
+    )
+
+    ranking = rank_from_interactions(interactions, half_life_days=30)
+
+    assert [item_id for item_id, _ in ranking] == [20, 10, 30]
+
+
+def test_counts_fallback_skips_padding_and_non_integer_tokens(tmp_path: Path) -> None:
+    id2token = ["[PAD]", "5", "abc", "7"]
+    item_column = np.array([3, 1, 3, 2, 2, 2])
+
+    assert [item_id for item_id, _ in rank_from_counts(item_column, id2token)] == [7, 5]
+    assert build_popularity_ranking(tmp_path / "missing.csv", item_column, id2token)[0][0] == 7
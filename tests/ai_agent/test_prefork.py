@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+import signal
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("recbole")
+pytest.importorskip("uvicorn")
+
+from services.api import app as service  # noqa: E402
+from services.api.history_index import UserHistoryIndex  # noqa: E402
+from services.api.prefork import RELOAD_SIGNAL, ReloadChannel, Supervisor, share_fields, shared_array  # noqa: E402
+
+
+def test_shared_arrays_are_read_only_copies_visible_to_forked_children() -> None:
+    index = UserHistoryIndex.build(np.array([1, 0, 1]), np.array([5, 6, 7]), user_num=2)
+
+    shared = share_fields(index)
+
+    assert shared.items.tolist() == index.items.tolist()
+    assert not shared.items.flags.writeable
+    with pytest.raises(ValueError):
+        shared.items[0] = 0
+    assert shared_array(np.array(["a"], dtype=object)).dtype == object
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if shared.history(1).tolist() == [5, 7] else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_reload_channel_hands_jobs_to_the_supervisor(tmp_path: Path) -> None:
+    received = []
+    previous = signal.signal(RELOAD_SIGNAL, lambda signum, frame: received.append(signum))
+    try:
+        channel = ReloadChannel(tmp_path, os.getpid())
+        job = service.ReloadJob(job_id="abc123", requested_at=1.0, force=True)
+
+        channel.submit(job)
+    finally:
+        signal.signal(RELOAD_SIGNAL, previous)
+
+    assert received == [RELOAD_SIGNAL]
+    assert [queued.job_id for queued in channel.jobs()] == ["abc123"]
+    job.status, job.finished_at = "succeeded", 2.0
+    channel.write(job)
+    assert channel.lookup("abc123").status == "succeeded"
+    assert channel.lookup("../abc123") is None
+    channel.prune(keep=0)
+    assert channel.jobs() == []
+
+
+def test_supervisor_only_merges_jobs_with_identical_conditions(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    checkpoint = tmp_path / "BERT4Rec-v2.pth"
+    checkpoint.write_bytes(b"weights-v2")
+    monkeypatch.setattr(service, "resolve_checkpoint", lambda: checkpoint)
+    monkeypatch.setattr(
+        service,
+        "ARTIFACTS",
+        {"checkpoint_sha256": service.checkpoint_sha256(checkpoint), "model_version": "v2"},
+    )
+    (tmp_path / "jobs").mkdir()
+    channel = ReloadChannel(tmp_path / "jobs", os.getpid())
+    queued = [("a", None, False), ("b", None, True), ("c", None, True), ("d", "v3", True)]
+    for requested_at, (job_id, expected_version, force) in enumerate(queued):
+        channel.write(
+            service.ReloadJob(job_id=job_id, expected_version=expected_version, force=force, requested_at=requested_at)
+        )
+    supervisor = Supervisor(None, 1, channel)
+    loaded = []
+    monkeypatch.setattr(
+        supervisor,
+        "refresh",
+        lambda path: loaded.append(path) or {"checkpoint_path": path, "model_version": "v2"},
+    )
+
+    supervisor.reload()
+
+    statuses = {job_id: channel.lookup(job_id).status for job_id in "abcd"}
+    assert statuses == {"a": "skipped", "b": "succeeded", "c": "succeeded", "d": "failed"}
+    assert loaded == [checkpoint]
+
+
+def test_delegated_reloads_are_always_handed_to_the_supervisor(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    previous = signal.signal(RELOAD_SIGNAL, signal.SIG_IGN)
+    try:
+        channel = ReloadChannel(tmp_path, os.getpid())
+        monkeypatch.setattr(service, "RELOAD_DELEGATE", channel)
+        first = service.schedule_reload(expected_version="v2")
+        second = service.schedule_reload(expected_version="v2")
+    finally:
+        signal.signal(RELOAD_SIGNAL, previous)
+
+    assert first.job_id != second.job_id
+    assert sorted(job.job_id for job in channel.jobs()) == sorted([first.job_id, second.job_id])
+    assert first.job_id not in service.RELOAD_JOBS
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from data.preprocessing import prepare_interactions_for_recbole as prepare
+from data.storage.interaction_store import load_interactions
+
+
+def events(*rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["session_id", "user_id", "product_id", "timestamp", "event_type"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True).dt.as_unit("us").astype("int64")
+    return df
+
+
+def test_merge_appends_only_unseen_events_and_compacts(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(prepare, "BASELINE_DIR", tmp_path)
+    monkeypatch.setattr(prepare, "MAX_DAY_SEGMENTS", 2)
+    first = events(("s1", "u1", "p1", "2025-10-01 10:00:00", "view"), ("s1", "u1", "p2", "2025-10-02 10:00:00", "view"))
+
+    assert prepare.merge_into_baseline(first, "b1") == {"appended": 2, "days": 2, "compacted": 0}
+    assert prepare.merge_into_baseline(first, "b2") == {"appended": 0, "days": 0, "compacted": 0}
+
+    second = events(
+        ("s1", "u1", "p2", "2025-10-02 10:00:00", "view"),  # already stored
+        ("s2", "u2", "p3", "2025-10-02 11:00:00", "purchase"),
+        ("s2", "u2", "p3", "2025-10-02 11:00:00", "purchase"),  # duplicated within the batch
+    )
+    assert prepare.merge_into_baseline(second, "b3") == {"appended": 1, "days": 1, "compacted": 0}
+    third = events(("s3", "u1", "p1", "2025-10-02 12:00:00", "click"))
+    assert prepare.merge_into_baseline(third, "b4") == {"appended": 1, "days": 1, "compacted": 1}
+
+    assert sorted(path.name for path in (tmp_path / "day=2025-10-02").iterdir()) == ["seg-b4.safetensors"]
+    stored = load_interactions(tmp_path, ["session_id", "product_id"])
+    assert stored["product_id"].tolist() == ["p1", "p2", "p3", "p1"]
+    assert stored["session_id"].tolist() == ["s1", "s1", "s2", "s3"]
+
+
+def test_typed_training_frame_matches_string_processing() -> None:
+    combined = events(
+        ("s2", "u10", "p9", "2025-10-01 10:00:00", "view"),
+        ("s1", "u9", "p10", "2025-10-01 10:00:00", "purchase"),
+        ("s1", "u9", "p10", "2025-10-01 10:00:00", "view"),
+        ("s3", "u9", "p10", "2025-10-01 10:00:00", "view"),  # same user/item/second/event in another session
+        ("s1", "u10", "p1", "2025-10-01 09:00:00", "click"),
+    )
+    combined[["session_id", "user_id", "product_id", "event_type"]] = combined[
+        ["session_id", "user_id", "product_id", "event_type"]
+    ].astype("category")
+    combined["user_id"] = combined["user_id"].cat.reorder_categories(["u9", "u10"])  # not in string order
+
+    expected = combined.astype(str).astype({"timestamp": "int64"}).sort_values(by=prepare.SORT_COLUMNS)
+    expected["item_id"] = expected["product_id"]
+    expected["label"] = (expected["event_type"] == "purchase").astype(int)
+    expected["timestamp"] //= 10**6
+    expected = expected.drop_duplicates(subset=["user_id", "item_id", "timestamp", "event_type"], keep="last")
+    expected = expected.sort_values(by=["user_id", "timestamp"])
+
+    typed = prepare.build_training_frame(prepare.sort_events(combined))
+
+    columns = ["user_id", "item_id", "timestamp", "label"]
+    assert typed[columns].to_csv(sep="\t", index=False) == expected[columns].to_csv(sep="\t", index=False)
+    assert typed["user_id"].dtype == "category"
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("recbole")
+
+from services.api import app as service  # noqa: E402
+
+
+@pytest.fixture
+def published(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    checkpoint = tmp_path / "BERT4Rec-v2.pth"
+    checkpoint.write_bytes(b"weights-v2")
+    monkeypatch.setattr(service, "resolve_checkpoint", lambda: checkpoint)
+    monkeypatch.setattr(service, "ARTIFACTS", {})
+    return checkpoint
+
+
+def fake_refresh(loaded: list):
+    def refresh(checkpoint_path: Path):
+        loaded.append(checkpoint_path)
+        return {"checkpoint_path": checkpoint_path, "model_version": service.checkpoint_version(checkpoint_path)}
+
+    return refresh
+
+
+def test_unchanged_checkpoint_is_skipped_unless_forced(published: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        service,
+        "ARTIFACTS",
+        {"checkpoint_sha256": service.checkpoint_sha256(published), "model_version": "v2"},
+    )
+    loaded: list = []
+
+    skipped = service.ReloadJob(job_id="a")
+    service.run_reload_job(skipped, refresh=fake_refresh(loaded))
+    forced = service.ReloadJob(job_id="b", force=True)
+    service.run_reload_job(forced, refresh=fake_refresh(loaded))
+
+    assert (skipped.status, skipped.version) == ("skipped", "v2")
+    assert forced.status == "succeeded"
+    assert loaded == [published]
+
+
+def test_reload_fails_when_published_version_differs_from_expected(published: Path) -> None:
+    loaded: list = []
+
+    stale = service.ReloadJob(job_id="a", expected_version="v1", force=True)
+    service.run_reload_job(stale, refresh=fake_refresh(loaded))
+    matching = service.ReloadJob(job_id="b", expected_version="v2")
+    service.run_reload_job(matching, refresh=fake_refresh(loaded))
+
+    assert (stale.status, stale.version) == ("failed", "v2")
+    assert "v1" in stale.error
+    assert (matching.status, matching.version) == ("succeeded", "v2")
+    assert loaded == [published]
+
+
+def test_reload_finds_the_checkpoint_published_by_retrain(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("requests")
+    from tasks import retrain
+
+    training_saved = tmp_path / "training" / "saved"
+    serving_dir = tmp_path / "saved"
+    training_saved.mkdir(parents=True)
+    (training_saved / "BERT4Rec-Nov-12-2025_11-33-53.pth").write_bytes(b"weights-new")
+    monkeypatch.setattr(retrain, "TRAINING_SAVED", training_saved)
+    monkeypatch.setattr(retrain, "SERVING_DIR", serving_dir)
+    monkeypatch.setattr(retrain, "SERVING_VERSIONS", serving_dir / "versions")
+    monkeypatch.setattr(retrain, "SERVING_CURRENT_LINK", serving_dir / "current.pth")
+    monkeypatch.setattr(retrain, "SERVING_LATEST_MANIFEST", serving_dir / "latest_model.json")
+    monkeypatch.setattr(retrain.LOGGER, "handlers", [])
+    manifest = retrain.publish_latest_checkpoint(keep=3)
+    # A legacy checkpoint left in the serving directory, newer on disk than the published one.
+    legacy = serving_dir / "BERT4Rec-Oct-13-2025_00-21-35.pth"
+    legacy.write_bytes(b"weights-old")
+    os.utime(legacy, (time.time() + 60, time.time() + 60))
+
+    monkeypatch.delenv("CHATBOT_MODEL_PATH", raising=False)
+    monkeypatch.delenv("CHATBOT_MODEL_DIR", raising=False)
+    monkeypatch.setattr(service, "DEFAULT_MODEL_DIR", serving_dir)
+    monkeypatch.setattr(service, "FALLBACK_MODEL_DIRS", [training_saved])
+    monkeypatch.setattr(service, "ARTIFACTS", {})
+    loaded: list = []
+
+    job = service.ReloadJob(job_id="a", expected_version=manifest["version"])
+    service.run_reload_job(job, refresh=fake_refresh(loaded))
+
+    assert (job.status, job.version) == ("succeeded", "Nov-12-2025_11-33-53")
+    assert loaded == [Path(manifest["file"])]
+
+    (serving_dir / "latest_model.json").unlink()
+    assert service.resolve_checkpoint() == Path(manifest["file"]).resolve()  # through current.pth
+    (serving_dir / "current.pth").unlink()
+    assert service.resolve_checkpoint() == legacy
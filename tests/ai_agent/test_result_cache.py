@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import time
+
+from services.api.result_cache import RecommendationCache
+
+
+def test_lru_eviction_by_entry_count() -> None:
+    cache = RecommendationCache(max_entries=2, max_bytes=0, ttl_seconds=60)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    assert cache.get("a") == [1]
+    cache.put("c", [3])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_and_ttl() -> None:
+    cache = RecommendationCache(max_entries=10, max_bytes=100, ttl_seconds=0.01, size_of=lambda value: 40 * len(value))
+    cache.put("a", [1])
+    cache.put("b", [1, 2])
+    assert cache.stats()["entries"] == 1
+    cache.put("huge", [1, 2, 3])
+    assert cache.get("huge") is None
+
+    time.sleep(0.02)
+    assert cache.get("b") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_clear_and_disabled_cache() -> None:
+    cache = RecommendationCache(max_entries=10)
+    cache.put("a", [1])
+    cache.clear()
+    assert cache.get("a") is None
+
+    disabled = RecommendationCache(max_entries=0)
+    disabled.put("a", [1])
+    assert disabled.get("a") is None
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.api.history_index import UserHistoryIndex
+from services.api.serving_bundle import MODEL_CONFIG_KEYS, load_serving_bundle, write_serving_bundle
+from data.storage.tensor_file import load_tensor_file
+
+
+def test_written_bundle_round_trips_vocabularies_and_histories(tmp_path: Path) -> None:
+    config = {key: index for index, key in enumerate(MODEL_CONFIG_KEYS)}
+    config.update({"USER_ID_FIELD": "user_id", "ITEM_ID_FIELD": "item_id", "TIME_FIELD": "timestamp"})
+    history_index = UserHistoryIndex.build(
+        np.array([2, 1, 2, 1]),
+        np.array([3, 1, 2, 2]),
+        timestamps=np.array([30, 10, 20, 5]),
+        user_num=3,
+    )
+
+    path = write_serving_bundle(
+        tmp_path / "BERT4Rec-test.serving.safetensors",
+        {**config, "unused": "dropped"},
+        np.array(["[PAD]", "u1", "u2"]),
+        np.array(["[PAD]", "10", "20", "30"]),
+        history_index,
+    )
+    bundle = load_serving_bundle(path)
+
+    assert bundle.config["device"] == "cpu"
+    assert "unused" not in bundle.config
+    assert bundle.dataset.token2id("user_id", ["u2"]).tolist() == [2]
+    assert bundle.dataset.id2token("item_id", [3]).tolist() == ["30"]
+    assert bundle.history_index.history(1).tolist() == [2, 1]
+    assert bundle.history_index.history(2).tolist() == [2, 3]
+    assert path.stat().st_mode & 0o777 == 0o644  # readable by a service running as another user
+
+
+def test_bundle_weights_are_mapped_views_of_the_file(tmp_path: Path) -> None:
+    config = {key: index for index, key in enumerate(MODEL_CONFIG_KEYS)}
+    config.update({"USER_ID_FIELD": "user_id", "ITEM_ID_FIELD": "item_id"})
+    weights = {
+        "item_embedding.weight": np.arange(12, dtype=np.float32).reshape(4, 3),
+        "output_bias": np.ones(4, dtype=np.float32),
+    }
+
+    path = write_serving_bundle(
+        tmp_path / "BERT4Rec-test.serving.safetensors",
+        config,
+        np.array(["[PAD]", "người dùng"]),
+        np.array(["[PAD]", "10", "20", "30"]),
+        UserHistoryIndex.build(np.array([1]), np.array([2]), user_num=2),
+        weights,
+    )
+    bundle = load_serving_bundle(path)
+
+    assert bundle.dataset.token2id("user_id", ["người dùng"]).tolist() == [1]
+    assert set(bundle.weights) == set(weights)
+    embedding = bundle.weights["item_embedding.weight"]
+    assert isinstance(embedding.base, np.memmap)
+    assert embedding.ctypes.data % embedding.itemsize == 0
+    np.testing.assert_array_equal(embedding, weights["item_embedding.weight"])
+    # Copy-on-write: writes stay private to the process.
+    embedding[0, 0] = 42.0
+    assert load_tensor_file(path)[0]["weights.item_embedding.weight"][0, 0] == 0.0
+
+    with pytest.raises(ValueError):
+        write_serving_bundle(tmp_path / "bad.serving.safetensors", config, np.array(["a\nb"]), np.array(["x"]), bundle.history_index)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.api.history_index import UserHistoryIndex
+from services.api.serving_bundle import ServingDataset
+from services.api.session_events import SessionEventBuffer
+
+
+def test_ring_buffer_keeps_latest_events_per_user() -> None:
+    buffer = SessionEventBuffer(max_events_per_user=3)
+    for item in ["1", "2", "3", "4"]:
+        buffer.append("u1", item)
+
+    revision, items = buffer.snapshot("u1")
+
+    assert items == ["2", "3", "4"]
+    assert revision > 0
+    assert buffer.snapshot("u2") == (0, [])
+
+
+def test_revision_changes_on_every_append() -> None:
+    buffer = SessionEventBuffer()
+    buffer.append("u1", "1")
+    first, _ = buffer.snapshot("u1")
+    buffer.append("u2", "1")
+    buffer.append("u1", "1")
+
+    assert buffer.snapshot("u1")[0] > first
+
+
+def test_least_recently_active_user_is_evicted() -> None:
+    buffer = SessionEventBuffer(max_users=2)
+    buffer.append("u1", "1")
+    buffer.append("u2", "1")
+    buffer.append("u1", "2")
+    buffer.append("u3", "1")
+
+    assert buffer.snapshot("u2") == (0, [])
+    assert buffer.snapshot("u1")[1] == ["1", "2"]
+    assert buffer.stats()["evicted_users"] == 1
+
+
+def test_idle_users_expire() -> None:
+    buffer = SessionEventBuffer(ttl_seconds=0.01)
+    buffer.append("u1", "1")
+    time.sleep(0.02)
+
+    assert buffer.snapshot("u1") == (0, [])
+    assert buffer.stats()["expired_users"] == 1
+
+
+def test_discard_before_drops_absorbed_events_and_bumps_revision() -> None:
+    buffer = SessionEventBuffer()
+    buffer.append("u1", "1")
+    buffer.append("u2", "1")
+    cutoff = time.time()
+    buffer.append("u1", "2")
+    revision, _ = buffer.snapshot("u1")
+
+    assert buffer.discard_before(cutoff) == 2
+
+    assert buffer.snapshot("u2") == (0, [])
+    assert buffer.snapshot("u1")[1] == ["2"]
+    assert buffer.snapshot("u1")[0] > revision
+    assert buffer.stats()["discarded_events"] == 2
+
+
+@pytest.fixture()
+def service(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    service = pytest.importorskip("services.api.app")
+    checkpoint = tmp_path / "saved" / "versions" / "BERT4Rec-v2.pth"
+    checkpoint.parent.mkdir(parents=True)
+    checkpoint.write_bytes(b"weights-v2")
+    monkeypatch.setattr(service, "DATA_DIR", tmp_path / "dataset")
+    config = {"USER_ID_FIELD": "user_id", "ITEM_ID_FIELD": "item_id", "MAX_ITEM_LIST_LENGTH": 5}
+    artifacts = {
+        "checkpoint_path": checkpoint,
+        "config": config,
+        "dataset": ServingDataset(config, np.array(["[PAD]", "u1"]), np.array(["[PAD]", "10", "11", "12"])),
+        "uid_field": "user_id",
+        "iid_field": "item_id",
+        "history_index": UserHistoryIndex.build(np.array([1, 1]), np.array([1, 2]), user_num=2),
+    }
+    monkeypatch.setattr(service, "ARTIFACTS", artifacts)
+    monkeypatch.setattr(service, "MODEL_READY", True)
+    monkeypatch.setattr(service, "MODEL_STATUS", "test")
+    monkeypatch.setattr(service, "RELOAD_TOKEN", "secret")
+    monkeypatch.setattr(service, "EVENTS_MAX_BATCH", 2)
+    monkeypatch.setattr(service, "SESSION_EVENTS", SessionEventBuffer())
+    return service
+
+
+def post_events(service, *items: str, token: str = "secret"):
+    events = [service.InteractionEvent(user_id="u1", item_id=item) for item in items]
+    return service.ingest_events(service.InteractionEventBatch(token=token, events=events))
+
+
+def test_live_events_are_merged_until_a_snapshot_absorbs_them(service) -> None:
+    artifacts = service.ARTIFACTS
+    post_events(service, "12")
+    assert service.user_sequence(artifacts, "u1")[1] == [1, 2, 3]
+
+    # The retrain extracted events up to here, then trained while another click arrived.
+    watermark = pd.Timestamp.now(tz="UTC")
+    post_events(service, "11")
+    service.activate_artifacts(artifacts)
+    assert service.user_sequence(artifacts, "u1")[1] == [1, 2, 3, 2]  # no watermark published: nothing dropped
+
+    manifest = {"version": "v2", "source_watermark": {"occurred_at": watermark.isoformat(), "event_id": "9"}}
+    (artifacts["checkpoint_path"].parents[1] / "latest_model.json").write_text(json.dumps(manifest))
+    service.activate_artifacts(artifacts)
+
+    assert service.SESSION_EVENTS.snapshot("u1")[1] == ["11"]
+    assert service.user_sequence(artifacts, "u1")[1] == [1, 2, 2]
+
+
+def test_events_endpoint_requires_token_and_caps_batch(service) -> None:
+    with pytest.raises(service.HTTPException) as denied:
+        post_events(service, "10", token="wrong")
+    with pytest.raises(service.HTTPException) as too_large:
+        post_events(service, "10", "11", "12")
+
+    assert denied.value.status_code == 403
+    assert too_large.value.status_code == 413
+    assert service.SESSION_EVENTS.stats()["appended"] == 0
+    assert post_events(service, "10", "11") == {"accepted": 2}
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.api.similar_items import SIMILAR_TOP_N, SimilarItemsTable, session_cooccurrence
+
+
+def test_neighbours_rank_by_cosine_and_skip_self_and_invalid_items() -> None:
+    embeddings = np.array(
+        [[0.0, 0.0], [1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [1.0, 0.05]],
+        dtype=np.float32,
+    )
+    valid = np.array([False, True, True, True, False])
+
+    table = SimilarItemsTable.build(embeddings, valid, top_n=5)
+
+    assert table.top_n == 2
+    ids, scores = table.lookup(1, topk=10)
+    assert ids.tolist() == [2, 3]
+    assert scores[0] > scores[1]
+    assert table.lookup(0, topk=10)[0].size == 0
+    assert table.lookup(4, topk=10)[0].size == 0
+    assert table.lookup(99, topk=10)[0].size == 0
+    assert table.lookup(1, topk=1)[0].tolist() == [2]
+
+
+def test_session_cooccurrence_boosts_items_seen_together(tmp_path: Path) -> None:
+    interactions = tmp_path / "interactions.csv"
+    pd.DataFrame({
+        "session_id": ["a", "a", "a", "b", "b", "c"],
+        "product_id": ["10", "30", "10", "10", "30", "20"],
+        "timestamp": ["1", "2", "3", "1", "2", "1"],
+    }).to_csv(interactions, index=False)
+    token2id = {"10": 1, "20": 2, "30": 3}
+
+    cooccurrence = session_cooccurrence(interactions, token2id, n_items=4)
+
+    row = slice(cooccurrence.offsets[1], cooccurrence.offsets[2])
+    assert cooccurrence.columns[row].tolist() == [3]
+    assert cooccurrence.weights[row].tolist() == [1.0]
+    assert cooccurrence.offsets[3] == cooccurrence.offsets[2]
+
+    # Item 2 is the closer embedding of item 1, but 1 and 3 share two sessions.
+    embeddings = np.array([[0.0, 0.0], [1.0, 0.0], [0.9, 0.3], [0.5, 0.8]], dtype=np.float32)
+    valid = np.array([False, True, True, True])
+    assert SimilarItemsTable.build(embeddings, valid, top_n=2).lookup(1, 2)[0].tolist() == [2, 3]
+    boosted = SimilarItemsTable.build(embeddings, valid, cooccurrence, top_n=2, cooccurrence_weight=0.5)
+    assert boosted.lookup(1, 2)[0].tolist() == [3, 2]
+
+
+@pytest.mark.parametrize("top_k", [0, -1, SIMILAR_TOP_N + 1])
+def test_endpoint_rejects_top_k_outside_the_table(top_k: int) -> None:
+    testclient = pytest.importorskip("fastapi.testclient")
+    service = pytest.importorskip("services.api.app")
+
+    response = testclient.TestClient(service.app).get("/items/1/similar", params={"top_k": top_k})
+
+    assert response.status_code == 422
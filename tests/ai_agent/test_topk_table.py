@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.api.topk_table import load_topk_table, topk_table_path, write_topk_table
+
+
+@pytest.fixture()
+def table_path(tmp_path: Path) -> Path:
+    path = topk_table_path(tmp_path / "BERT4Rec-v1.pth")
+    write_topk_table(
+        path,
+        item_ids=np.array([[-1, -1, -1], [4, 2, 7], [3, -1, -1]]),
+        scores=np.array([[0, 0, 0], [0.9, 0.5, 0.1], [0.7, 0, 0]]),
+        history_lengths=np.array([0, 5, 2]),
+        meta={"checkpoint_sha256": "abc"},
+    )
+    return path
+
+
+def test_rows_are_memory_mapped_and_trimmed(table_path: Path) -> None:
+    table = load_topk_table(table_path)
+
+    assert table_path.name == "BERT4Rec-v1.topk"
+    assert isinstance(table.item_ids, np.memmap)
+    assert table.k == 3 and table.meta["checkpoint_sha256"] == "abc"
+    item_ids, scores = table.lookup(1, topk=2, history_length=5)
+    assert item_ids.tolist() == [4, 2]
+    np.testing.assert_allclose(scores, [0.9, 0.5])
+    assert table.lookup(2, topk=3, history_length=2)[0].tolist() == [3]
+
+
+def test_lookup_misses_when_row_cannot_answer(table_path: Path) -> None:
+    table = load_topk_table(table_path)
+
+    assert table.lookup(1, topk=4, history_length=5) is None  # deeper than the table
+    assert table.lookup(1, topk=2, history_length=6) is None  # history changed since the snapshot
+    assert table.lookup(0, topk=2, history_length=0) is None
+    assert table.lookup(9, topk=2, history_length=1) is None
+
+
+def test_rewrite_replaces_existing_table(table_path: Path) -> None:
+    write_topk_table(
+        table_path,
+        item_ids=np.array([[1]]),
+        scores=np.array([[1.0]]),
+        history_lengths=np.array([1]),
+        meta={"checkpoint_sha256": "def"},
+    )
+
+    table = load_topk_table(table_path)
+    assert table.meta["checkpoint_sha256"] == "def" and table.user_count == 1
+    assert sorted(path.name for path in table_path.parent.iterdir()) == ["BERT4Rec-v1.topk"]
+
+
+@pytest.mark.parametrize("backend, served", [("eager", True), ("quantized", False), (None, False)])
+def test_service_refuses_tables_not_scored_exactly(tmp_path: Path, backend, served: bool) -> None:
+    service = pytest.importorskip("services.api.app")
+    checkpoint = tmp_path / "BERT4Rec-v1.pth"
+    meta = {"checkpoint_sha256": "abc"} if backend is None else {"checkpoint_sha256": "abc", "inference_backend": backend}
+    write_topk_table(
+        topk_table_path(checkpoint),
+        item_ids=np.array([[1]]),
+        scores=np.array([[1.0]]),
+        history_lengths=np.array([1]),
+        meta=meta,
+    )
+
+    assert (service.load_topk_table_for(checkpoint, "abc") is not None) is served
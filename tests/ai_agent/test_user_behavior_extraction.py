@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from data.preprocessing import user_behavior_advanced as extraction
+from data.preprocessing.prepare_interactions_for_recbole import pending_batches
+from data.storage.interaction_store import read_files
+
+
+class SqliteCursor:
+    """psycopg-style (``%s``) cursor over SQLite standing in for Postgres."""
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self._cursor = connection.cursor()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query: str, params) -> None:
+        self._cursor.execute(query.replace("%s", "?"), params)
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+
+def make_events_table() -> sqlite3.Connection:
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        'CREATE TABLE ai_interaction_events (id TEXT, "sessionId" TEXT, "userId" TEXT, '
+        '"productId" TEXT, "eventType" TEXT, "occurredAt" TEXT)'
+    )
+    return connection
+
+
+def insert(connection: sqlite3.Connection, *rows) -> None:
+    connection.executemany("INSERT INTO ai_interaction_events VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+
+def extract(connection: sqlite3.Connection, store: Path, extracted_at: datetime):
+    watermark = extraction.load_store_manifest(store).get("watermark")
+    chunks = extraction.fetch_events(SqliteCursor(connection), watermark, chunk_rows=1)
+    return extraction.write_batch(chunks, store, extracted_at)
+
+
+def test_extraction_only_fetches_events_after_the_watermark(tmp_path: Path) -> None:
+    connection = make_events_table()
+    same_time = "2025-10-01T10:00:00+00:00"
+    insert(
+        connection,
+        ("b", "s1", "u1", "p1", "view", same_time),
+        ("a", "s1", "u1", "p2", "click", same_time),
+        ("c", None, "u2", "p3", "view", "2025-10-01T09:00:00+00:00"),
+    )
+
+    first = extract(connection, tmp_path, datetime(2025, 10, 1, 11, tzinfo=timezone.utc))
+
+    assert first["rows"] == 2  # the session-less event is dropped but still advances the watermark
+    assert first["event_types"] == {"view": 1, "click": 1}
+    assert first["watermark"] == {"occurred_at": same_time, "event_id": "b"}
+    assert extract(connection, tmp_path, datetime(2025, 10, 1, 12, tzinfo=timezone.utc)) is None
+
+    # Same timestamp, later id: only the tie-breaker separates it from the last extracted row.
+    insert(connection, ("c2", "s2", "u2", "p1", "purchase", same_time))
+    second = extract(connection, tmp_path, datetime(2025, 10, 1, 13, tzinfo=timezone.utc))
+
+    assert second["rows"] == 1
+    assert second["files"] == [f"day=2025-10-01/part-{second['batch']}-00000.safetensors"]
+    assert read_files(tmp_path, second["files"])["event_type"].tolist() == ["purchase"]
+    events = read_files(tmp_path, first["files"])
+    assert events["product_id"].tolist() == ["p2", "p1"]  # extraction order
+    assert events["timestamp"].tolist() == [pd.Timestamp(same_time).value // 1000] * 2
+    manifest = extraction.load_store_manifest(tmp_path)
+    assert manifest["watermark"] == second["watermark"]
+    assert [b["batch"] for b in pending_batches(manifest, first["batch"])] == [second["batch"]]
+    assert [b["batch"] for b in pending_batches(manifest, None)] == [first["batch"], second["batch"]]
+
+
+def test_psql_query_inlines_quoted_watermark() -> None:
+    query, params = extraction.build_query({"occurred_at": "2025-10-01T10:00:00+00:00", "event_id": "x'y"}, inline=True)
+
+    assert params == []
+    assert "('2025-10-01T10:00:00+00:00', 'x''y')" in query
+    assert extraction.build_query(None) == (extraction.QUERY.format(watermark_filter=""), [])
+
+
+def test_psql_export_streams_copy_output_in_chunks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    psql = tmp_path / "psql"
+    psql.write_text(
+        "#!/bin/sh\n"
+        "echo event_id,session_id,user_id,product_id,event_type,occurred_at\n"
+        "echo 1,s1,u1,p1,view,2025-10-01 10:00:00+00\n"
+        "echo 2,s1,u1,p2,click,2025-10-01 10:00:05+00\n"
+        "echo 3,s2,u2,p1,view,2025-10-01 10:00:09+00\n"
+        "exit ${FAKE_PSQL_EXIT:-0}\n"
+    )
+    psql.chmod(0o755)
+    monkeypatch.setenv("PSQL_COMMAND", str(psql))
+    conn = {"host": "localhost", "port": "5432", "user": "u", "dbname": "db", "password": "p"}
+
+    chunks = list(extraction.export_via_psql(conn, chunk_rows=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert extraction.watermark_of(chunks[-1]) == {"occurred_at": "2025-10-01T10:00:09+00:00", "event_id": "3"}
+
+    monkeypatch.setenv("FAKE_PSQL_EXIT", "1")
+    with pytest.raises(RuntimeError):
+        extraction.write_batch(extraction.export_via_psql(conn, chunk_rows=2), tmp_path / "store")
+    assert not list((tmp_path / "store").rglob("*.safetensors"))